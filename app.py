@@ -1,197 +1,295 @@
-from flask import Flask, render_template, request, jsonify
-import requests
-from bs4 import BeautifulSoup
-import google.generativeai as genai
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context, g
 import os
 from dotenv import load_dotenv
+import http_client
+import host_limiter
+import tracing
+import http_compression
+import content_cache
+import result_cache
+import history_store
+import chat_sessions
+from news_index import NewsIndex
+import prompt_budget
+import summary_cache
+import story_clusters
+import prefetch
+import extractors
+import rss_feed
+import url_resolver
+import hashlib
 import json
 import re
-from urllib.parse import quote_plus, urlparse, parse_qs
+from urllib.parse import quote_plus, urlparse, unquote
 import time
-from datetime import datetime
+import threading
+import queue
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 
 load_dotenv()
 
 app = Flask(__name__)
 
 # Gemini API 키: 환경변수에서만 로드 (배포 시 Vercel 환경변수에 GEMINI_API_KEY 설정)
+# google.generativeai는 import만 0.7초 넘게 걸려 첫 Gemini 호출 때 불러와 설정함 (get_gemini_model)
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-
-# 최근 검색 결과 (대화 기능용, 프로세스 메모리 기준)
-last_search = {
-    "keyword": None,
-    "news": [],
-    "summary": ""
-}
+LAZY_INIT = os.getenv('LAZY_INIT', '1') == '1'   # 0이면 시작할 때 Gemini/HTTP 세션/저장소를 미리 준비 (상시 실행 서버용)
 
-# 검색 히스토리 저장 파일
-HISTORY_FILE = os.path.join(os.path.dirname(__file__), "history.json")
+# 스트리밍 검색에서 첫 결과를 보내기까지 걸린 시간(초) 최근 기록
+stream_first_result_times = deque(maxlen=500)
 
+# 본문 병렬 수집 설정 (환경변수로 조정 가능)
+FETCH_MAX_WORKERS = int(os.getenv('FETCH_MAX_WORKERS', '8'))        # 동시 본문 수집 스레드 수
+FETCH_PER_DOMAIN = int(os.getenv('FETCH_PER_DOMAIN', '4'))          # 도메인당 동시 요청 수
+FETCH_DOMAIN_INTERVAL = float(os.getenv('FETCH_DOMAIN_INTERVAL', '0.2'))  # 같은 도메인 요청 시작 간격(초)
+FETCH_DEADLINE = float(os.getenv('FETCH_DEADLINE', '20'))           # 본문 수집 전체 제한 시간(초)
+ARTICLE_CHUNK_SIZE = 16 * 1024                                      # 기사 페이지를 읽는 조각 크기(바이트)
 
-def save_history(keyword, news_items, summary):
-    """키워드와 수집한 뉴스들을 로컬 JSON 파일에 저장"""
-    record = {
-        "keyword": keyword,
-        "summary": summary,
-        "news": news_items,
-        "timestamp": datetime.utcnow().isoformat() + "Z"
-    }
+# 여러 키워드 일괄 검색(/search/batch) 설정
+BATCH_MAX_KEYWORDS = int(os.getenv('BATCH_MAX_KEYWORDS', '20'))         # 한 번에 받는 최대 키워드 수
+BATCH_DISCOVER_WORKERS = int(os.getenv('BATCH_DISCOVER_WORKERS', '6'))  # 키워드별 후보 수집 동시 실행 수
+BATCH_SUMMARY_WORKERS = int(os.getenv('BATCH_SUMMARY_WORKERS', '4'))    # 동시 요약(Gemini 호출) 수
+BATCH_SUMMARY_GROUP = int(os.getenv('BATCH_SUMMARY_GROUP', '4'))        # 묶음 요약 시 Gemini 호출 하나에 넣는 키워드 수
+BATCH_FETCH_DEADLINE_MAX = float(os.getenv('BATCH_FETCH_DEADLINE_MAX', '120'))  # 일괄 검색 본문 수집 제한 시간 상한(초)
 
-    data = []
-    try:
-        if os.path.exists(HISTORY_FILE):
-            with open(HISTORY_FILE, "r", encoding="utf-8") as f:
-                loaded = json.load(f)
-                if isinstance(loaded, list):
-                    data = loaded
-    except Exception as e:
-        # 파일 읽기 실패 시 새로 생성
-        print(f"히스토리 읽기 오류: {e}")
-
-    data.append(record)
 
+def save_history(keyword, news_items, summary):
+    """키워드와 수집한 뉴스들을 히스토리 저장소(SQLite)에 한 건 추가"""
     try:
-        with open(HISTORY_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        with tracing.stage('save_history'):
+            history_store.get_store().append(keyword, news_items, summary)
     except Exception as e:
         print(f"히스토리 저장 오류: {e}")
 
-def extract_news_content(url):
-    """뉴스 URL에서 본문 내용 추출"""
+
+def extract_text_from_html(html):
+    """기사 HTML에서 정리된 본문 텍스트(최대 2000자) 추출"""
+    # 본문 내용 추출 - 여러 패턴 시도 (lxml 빠른 경로, 실패 시 BeautifulSoup)
+    return tidy_article_text(extractors.extract_article_text(html))
+
+
+def tidy_article_text(content):
+    """추출한 본문의 공백 정리 후 최대 2000자로 자름"""
+    if content:
+        # 연속된 공백 제거
+        content = re.sub(r'\s+', ' ', content)
+        # 최대 2000자로 제한
+        content = content[:2000].strip()
+    return content
+
+
+# 기사 본문 요청 헤더
+ARTICLE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'ko-KR,ko;q=0.9'
+}
+
+
+def extract_news_content(url, throttle=None):
+    """뉴스 URL에서 본문 내용 추출 (throttle이 주어지면 도메인별 요청 제한 적용)
+
+    추출 결과는 본문 캐시에 리다이렉트 URL과 실제 URL 모두로 저장되며,
+    실패한 페이지도 짧은 기간 동안 캐시해 반복 요청을 막습니다.
+    """
+    throttle = throttle or NO_THROTTLE
+    original_url = url
+    is_redirect = 'news.google.com/rss/articles' in url
+    # 리다이렉트 URL은 실제 URL 조회까지 마친 뒤에 미스로 집계
+    cached = content_cache.lookup(url, count_miss=not is_redirect)
+    if cached is not None:
+        tracing.count('content_cache', result='hit')
+        return cached
+
+    started = time.monotonic()
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'ko-KR,ko;q=0.9'
-        }
+        headers = ARTICLE_HEADERS
         
-        # 구글 뉴스 리다이렉트 URL 처리
-        if 'news.google.com/rss/articles' in url:
-            # 구글 뉴스 링크는 실제 URL로 리다이렉트 필요
-            response = requests.get(url, headers=headers, timeout=10, allow_redirects=True)
-            url = response.url
+        # 구글 뉴스 기사 링크는 실제 언론사 URL로 해석 (캐시/토큰 디코딩/리다이렉트 헤더 우선)
+        html = None
+        if is_redirect:
+            with tracing.stage('resolve'):
+                resolution = url_resolver.resolve(url, headers=headers, throttle=throttle)
+            tracing.count('url_resolution', method=resolution.method)
+            url = resolution.url
+            # 해석에 실패했으면 이미 받아 둔 구글 페이지를 그대로 사용
+            html = resolution.html
+            cached = content_cache.lookup(url)
+            if cached is not None:
+                tracing.count('content_cache', result='hit')
+                content_cache.add_alias(original_url, url)
+                return cached
         
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # 불필요한 태그 제거
-        for tag in soup(['script', 'style', 'nav', 'header', 'footer', 'aside', 'iframe', 'noscript']):
-            tag.decompose()
-        
-        # 본문 내용 추출 - 여러 패턴 시도
-        content = ""
-        
-        # 패턴 1: article 태그
-        article = soup.find('article')
-        if article:
-            paragraphs = article.find_all(['p', 'div'], class_=re.compile(r'(article|content|body|text|post)', re.I))
-            if paragraphs:
-                content = '\n'.join([p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True)])
-        
-        # 패턴 2: 본문 클래스 찾기
-        if not content:
-            content_divs = soup.find_all(['div', 'section'], class_=re.compile(r'(article|content|body|text|post|main)', re.I))
-            for div in content_divs:
-                paragraphs = div.find_all('p')
-                if len(paragraphs) > 3:  # 최소 3개 이상의 문단이 있어야 본문으로 인정
-                    content = '\n'.join([p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True)])
-                    break
-        
-        # 패턴 3: 일반 p 태그들
-        if not content:
-            paragraphs = soup.find_all('p')
-            if len(paragraphs) > 3:
-                # 너무 짧은 문단 제외
-                valid_paragraphs = [p.get_text(strip=True) for p in paragraphs 
-                                  if len(p.get_text(strip=True)) > 50]
-                if len(valid_paragraphs) > 2:
-                    content = '\n'.join(valid_paragraphs[:10])  # 최대 10개 문단
-        
-        # 패턴 4: 메타 태그에서 설명 가져오기
-        if not content:
-            meta_desc = soup.find('meta', property='og:description')
-            if meta_desc:
-                content = meta_desc.get('content', '')
+        tracing.count('content_cache', result='miss')
+        if html is None:
+            with throttle.slot(url):
+                content = download_article_text(url, headers)
+        else:
+            with tracing.stage('parse'):
+                content = extract_text_from_html(html)
         
-        # 내용 정리
-        if content:
-            # 연속된 공백 제거
-            content = re.sub(r'\s+', ' ', content)
-            # 최대 2000자로 제한
-            content = content[:2000]
-            return content.strip()
+        content_cache.store(url, content, cost=time.monotonic() - started, aliases=(original_url,))
+        return content
         
+    except http_client.CircuitOpenError as e:
+        # 호스트가 일시 중단된 것뿐이므로 실패로 캐시하지 않음
+        print(f"본문 추출 건너뜀 ({url}): {e}")
+        tracing.count('article_failures', reason='circuit_open')
         return ""
-        
     except Exception as e:
         print(f"본문 추출 오류 ({url}): {e}")
+        tracing.count('article_failures', reason=type(e).__name__)
+        content_cache.store(url, "", ok=False, aliases=(original_url,))
         return ""
 
-def search_google_news(keyword, num_results=10):
-    """구글 뉴스 검색 - RSS 피드와 웹 스크래핑 조합"""
+
+def download_article_text(url, headers):
+    """기사 페이지를 스트리밍으로 받으며 파싱 (크기 제한, 본문을 충분히 모으면 나머지는 받지 않음)"""
+    started = time.monotonic()
+    parser = None
+    response = http_client.get(url, headers=headers, timeout=10, stream=True)
+    try:
+        response.raise_for_status()
+        content_type = response.headers.get('Content-Type', '')
+        if not extractors.is_html_content_type(content_type):
+            extractors.count_stream('skipped_content_type')
+            raise ValueError(f"HTML이 아닌 응답 ({content_type})")
+        parser = extractors.StreamingExtractor(content_type)
+        for chunk in response.iter_content(chunk_size=ARTICLE_CHUNK_SIZE):
+            if parser.feed(chunk):
+                break
+        content = parser.close()
+    finally:
+        response.close()
+        record_download(started, parser)
+    return tidy_article_text(content)
+
+
+def record_download(started, parser):
+    """기사 다운로드 한 건의 네트워크 시간/파싱 시간/받은 바이트 수 기록"""
+    parse_seconds = parser.parse_seconds if parser else 0.0
+    tracing.record_stage('download', time.monotonic() - started - parse_seconds)
+    if parser:
+        tracing.record_stage('parse', parse_seconds)
+        tracing.count('article_bytes', parser.bytes_read)
+
+
+class DomainThrottle:
+    """도메인별 동시 요청 수와 요청 시작 간격을 제한 (전역 sleep 대신 사용)"""
+
+    def __init__(self, per_domain=FETCH_PER_DOMAIN, interval=FETCH_DOMAIN_INTERVAL):
+        self.per_domain = max(1, per_domain)
+        self.interval = max(0.0, interval)
+        self._lock = threading.Lock()
+        self._semaphores = {}
+        self._next_slot = {}
+
+    def _semaphore(self, domain):
+        with self._lock:
+            if domain not in self._semaphores:
+                self._semaphores[domain] = threading.BoundedSemaphore(self.per_domain)
+            return self._semaphores[domain]
+
+    def _reserve_slot(self, domain):
+        """다음 요청 시작 시각을 예약하고 기다려야 할 시간을 반환"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_slot.get(domain, now))
+            self._next_slot[domain] = start + self.interval
+            return start - now
+
+    @contextmanager
+    def slot(self, url):
+        """해당 URL 도메인의 요청 슬롯을 얻을 때까지 대기"""
+        domain = urlparse(url).netloc.lower()
+        with self._semaphore(domain):
+            delay = self._reserve_slot(domain)
+            if delay > 0:
+                time.sleep(delay)
+            yield
+
+
+class _NoThrottle:
+    @contextmanager
+    def slot(self, url):
+        yield
+
+
+NO_THROTTLE = _NoThrottle()
+
+
+def iter_news_contents(news_items, max_workers=FETCH_MAX_WORKERS, deadline=FETCH_DEADLINE):
+    """뉴스 후보들의 본문을 병렬로 추출하며, 끝나는 순서대로 (인덱스, 본문)을 yield
+
+    전체 제한 시간(deadline) 안에 끝나지 않은 기사는 건너뜁니다.
+    """
+    if not news_items:
+        return
+
+    throttle = DomainThrottle()
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(news_items))))
+    futures = {
+        executor.submit(tracing.in_context(extract_news_content), item['link'], throttle): index
+        for index, item in enumerate(news_items)
+    }
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            try:
+                content = future.result() or ''
+            except Exception as e:
+                print(f"본문 수집 오류 ({news_items[futures[future]]['link']}): {e}")
+                content = ''
+            yield futures[future], content
+    except FuturesTimeoutError:
+        pending = sum(1 for future in futures if not future.done())
+        print(f"본문 수집 제한 시간 초과: {pending}개 기사 본문 생략")
+    finally:
+        # 제한 시간이 지난 작업은 기다리지 않고 응답을 먼저 돌려줌
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def fetch_news_contents(news_items, max_workers=FETCH_MAX_WORKERS, deadline=FETCH_DEADLINE):
+    """수집한 뉴스 후보들의 본문을 병렬로 추출해 'content'에 채움
+
+    전체 제한 시간(deadline) 안에 끝나지 않은 기사는 본문 없이(빈 문자열) 반환합니다.
+    """
+    for index, content in iter_news_contents(news_items, max_workers=max_workers, deadline=deadline):
+        news_items[index]['content'] = content
+    return news_items
+
+def discover_news(keyword, num_results=10, hl='ko', gl='KR', use_rss=True):
+    """구글 뉴스 후보 목록 수집 (제목/링크/스니펫만, 본문은 비어 있음)
+
+    RSS 피드 → 구글 뉴스 웹 → 구글 뉴스 탭 검색 순서로 시도합니다. (hl: 언어, gl: 국가)
+    use_rss=False면 RSS 단계를 건너뜁니다 (RSS를 이미 다른 경로로 받아 본 경우).
+    """
     news_items = []
+    locale = f"hl={quote_plus(hl)}&gl={quote_plus(gl)}&ceid={quote_plus(f'{gl}:{hl}')}"
     
     # 방법 1: 구글 뉴스 RSS 피드 시도
-    try:
-        encoded_keyword = quote_plus(keyword)
-        rss_url = f"https://news.google.com/rss/search?q={encoded_keyword}&hl=ko&gl=KR&ceid=KR:ko"
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        response = requests.get(rss_url, headers=headers, timeout=10)
-        if response.status_code == 200:
-            # XML을 정규표현식으로 직접 파싱 (lxml 없이도 작동)
-            import re
-            content = response.text
+    if use_rss:
+        try:
+            rss_url = rss_feed.search_feed_url(keyword, hl=hl, gl=gl)
             
-            # <item> 태그 찾기
-            items = re.findall(r'<item>(.*?)</item>', content, re.DOTALL)
-            
-            for item_xml in items[:num_results]:
-                try:
-                    # title 추출
-                    title_match = re.search(r'<title>(.*?)</title>', item_xml, re.DOTALL)
-                    # link 추출
-                    link_match = re.search(r'<link>(.*?)</link>', item_xml, re.DOTALL)
-                    # description 추출
-                    desc_match = re.search(r'<description>(.*?)</description>', item_xml, re.DOTALL)
-                    
-                    if title_match and link_match:
-                        title_text = re.sub(r'<[^>]+>', '', title_match.group(1)).strip()
-                        link_text = link_match.group(1).strip()
-                        snippet_text = ""
-                        
-                        if desc_match:
-                            snippet_text = re.sub(r'<[^>]+>', '', desc_match.group(1)).strip()
-                        
-                        if title_text and link_text:
-                            # 뉴스 본문 추출
-                            content = extract_news_content(link_text)
-                            news_items.append({
-                                'title': title_text,
-                                'link': link_text,
-                                'snippet': snippet_text[:200] if snippet_text else "",
-                                'content': content
-                            })
-                            time.sleep(0.5)  # 요청 간격 조절
-                except Exception as e:
-                    continue
+            # 피드를 받는 대로 파싱하고 num_results개를 채우면 중단
+            with tracing.stage('discover_rss'):
+                for entry in rss_feed.fetch_feed(rss_url, headers=rss_feed.FEED_HEADERS, limit=num_results, timeout=10):
+                    news_items.append(entry.to_news_item())
             
             if news_items:
+                tracing.count('discover', source='rss')
                 return news_items[:num_results]
-    except Exception as e:
-        print(f"RSS 피드 오류: {e}")
+        except Exception as e:
+            print(f"RSS 피드 오류: {e}")
     
     # 방법 2: 구글 뉴스 웹 검색 (개선된 파싱)
+    tracing.count('discover_fallbacks', to='news_web')
     try:
+        web_started = time.monotonic()
         encoded_keyword = quote_plus(keyword)
-        search_url = f"https://news.google.com/search?q={encoded_keyword}&hl=ko&gl=KR&ceid=KR:ko"
+        search_url = f"https://news.google.com/search?q={encoded_keyword}&{locale}"
         
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -200,9 +298,11 @@ def search_google_news(keyword, num_results=10):
             'Referer': 'https://www.google.com/'
         }
         
-        response = requests.get(search_url, headers=headers, timeout=15)
+        response = http_client.get(search_url, headers=headers, timeout=15)
         response.raise_for_status()
+        tracing.count('discover_bytes', len(response.content), source='news_web')
         
+        from bs4 import BeautifulSoup  # RSS가 실패했을 때만 필요 (import 비용을 첫 대체 경로로 미룸)
         soup = BeautifulSoup(response.text, 'html.parser')
         
         # 구글 뉴스의 다양한 구조 시도
@@ -245,27 +345,30 @@ def search_google_news(keyword, num_results=10):
                     snippet_text = snippet_elem.get_text(strip=True) if snippet_elem else ""
                     
                     if title_text and len(title_text) > 3:
-                        # 뉴스 본문 추출
-                        content = extract_news_content(href)
                         news_items.append({
                             'title': title_text,
                             'link': href,
                             'snippet': snippet_text[:200] if snippet_text else "",
-                            'content': content
+                            'content': ''
                         })
-                        time.sleep(0.5)  # 요청 간격 조절
                         
                         if len(news_items) >= num_results:
                             break
                 except:
                     continue
         
+        tracing.record_stage('discover_news_web', time.monotonic() - web_started)
+        
         # 방법 3: 일반 구글 검색 페이지에서 뉴스 섹션 찾기
         if not news_items:
-            search_url = f"https://www.google.com/search?q={encoded_keyword}&tbm=nws&num={num_results}&hl=ko"
-            response = requests.get(search_url, headers=headers, timeout=15)
+            tracing.count('discover_fallbacks', to='google_nws')
+            web_started = time.monotonic()
+            search_url = f"https://www.google.com/search?q={encoded_keyword}&tbm=nws&num={num_results}&hl={quote_plus(hl)}"
+            response = http_client.get(search_url, headers=headers, timeout=15)
             
             if response.status_code == 200:
+                tracing.count('discover_bytes', len(response.content), source='google_nws')
+                from bs4 import BeautifulSoup
                 soup = BeautifulSoup(response.text, 'html.parser')
                 
                 # 더 정확한 파싱: 뉴스 결과 컨테이너 찾기
@@ -291,7 +394,7 @@ def search_google_news(keyword, num_results=10):
                                     href = link_elem.get('href', '')
                                     if '/url?q=' in href:
                                         url_part = href.split('/url?q=')[1].split('&')[0]
-                                        url_part = requests.utils.unquote(url_part)
+                                        url_part = unquote(url_part)
                                     elif href.startswith('http'):
                                         url_part = href
                                     else:
@@ -302,15 +405,12 @@ def search_google_news(keyword, num_results=10):
                                         snippet_text = snippet_elem.get_text(strip=True) if snippet_elem else ""
                                         
                                         if not any(item['link'] == url_part for item in news_items):
-                                            # 뉴스 본문 추출
-                                            content = extract_news_content(url_part)
                                             news_items.append({
                                                 'title': title_text,
                                                 'link': url_part,
                                                 'snippet': snippet_text[:200] if snippet_text else "",
-                                                'content': content
+                                                'content': ''
                                             })
-                                            time.sleep(0.5)  # 요청 간격 조절
                                             
                                             if len(news_items) >= num_results:
                                                 break
@@ -329,7 +429,7 @@ def search_google_news(keyword, num_results=10):
                             href = link_elem.get('href', '')
                             if '/url?q=' in href:
                                 url_part = href.split('/url?q=')[1].split('&')[0]
-                                url_part = requests.utils.unquote(url_part)
+                                url_part = unquote(url_part)
                             elif href.startswith('http'):
                                 url_part = href
                             else:
@@ -348,15 +448,12 @@ def search_google_news(keyword, num_results=10):
                                 
                                 # 중복 체크
                                 if not any(item['link'] == url_part for item in news_items):
-                                    # 뉴스 본문 추출
-                                    content = extract_news_content(url_part)
                                     news_items.append({
                                         'title': title_text,
                                         'link': url_part,
                                         'snippet': snippet_text[:200] if snippet_text else "",
-                                        'content': content
+                                        'content': ''
                                     })
-                                    time.sleep(0.5)  # 요청 간격 조절
                                     
                                     if len(news_items) >= num_results:
                                         break
@@ -370,7 +467,7 @@ def search_google_news(keyword, num_results=10):
                             href = link.get('href', '')
                             if '/url?q=' in href:
                                 url_part = href.split('/url?q=')[1].split('&')[0]
-                                url_part = requests.utils.unquote(url_part)
+                                url_part = unquote(url_part)
                                 
                                 if url_part.startswith('http') and 'google.com' not in url_part:
                                     title_text = link.get_text(strip=True)
@@ -378,70 +475,284 @@ def search_google_news(keyword, num_results=10):
                                     if title_text and len(title_text) > 3:
                                         # 중복 체크
                                         if not any(item['link'] == url_part for item in news_items):
-                                            # 뉴스 본문 추출
-                                            content = extract_news_content(url_part)
                                             news_items.append({
                                                 'title': title_text,
                                                 'link': url_part,
                                                 'snippet': "",
-                                                'content': content
+                                                'content': ''
                                             })
-                                            time.sleep(0.5)  # 요청 간격 조절
                                             
                                             if len(news_items) >= num_results:
                                                 break
                         except:
                             continue
+            tracing.record_stage('discover_google_nws', time.monotonic() - web_started)
+            source = 'google_nws'
+        else:
+            source = 'news_web'
         
+        tracing.count('discover', source=source if news_items else 'none')
         return news_items[:num_results]
         
     except Exception as e:
         print(f"웹 검색 오류: {e}")
+        tracing.count('discover', source='error')
         import traceback
         traceback.print_exc()
         return news_items[:num_results] if news_items else []
 
+def search_google_news(keyword, num_results=10, hl='ko', gl='KR'):
+    """구글 뉴스 검색 - 후보 수집 → 같은 사건 기사 묶기 → 대표 기사 본문만 병렬로 채움"""
+    with tracing.stage('discover'):
+        news_items = discover_news(keyword, num_results=num_results, hl=hl, gl=gl)
+    with tracing.stage('cluster'):
+        news_items = story_clusters.cluster_by_title(news_items, keyword)
+    with tracing.stage('fetch'):
+        news_items = fetch_news_contents(news_items)
+    with tracing.stage('cluster'):
+        return story_clusters.merge_by_body(news_items)
+
+GEMINI_MODEL_NAME = 'gemini-pro'
+_gemini_model = None
+_gemini_model_lock = threading.Lock()
+
+
+def get_gemini_model():
+    """프로세스에서 공유하는 Gemini 모델 클라이언트 (요청마다 새로 만들지 않음)"""
+    global _gemini_model
+    if _gemini_model is None:
+        with _gemini_model_lock:
+            if _gemini_model is None:
+                import google.generativeai as genai  # 콜드 스타트 단축: 첫 호출 때만 import
+                if GEMINI_API_KEY:
+                    genai.configure(api_key=GEMINI_API_KEY)
+                _gemini_model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+    return _gemini_model
+
+
+def warm_up():
+    """첫 요청이 느려지지 않도록 지연 초기화 대상을 미리 준비 (LAZY_INIT=0이면 import 시 실행)"""
+    started = time.monotonic()
+    try:
+        http_client.get_session()
+        history_store.get_store()
+        import bs4  # noqa: F401 - RSS 실패 시 웹 검색 파싱용
+        if GEMINI_API_KEY:
+            get_gemini_model()
+    except Exception as e:
+        print(f"사전 초기화 오류: {e}")
+        return
+    print(f"사전 초기화 완료 ({time.monotonic() - started:.2f}초)")
+
+
+SUMMARY_GENERATION_CONFIG = {
+    'max_output_tokens': 800,
+    'temperature': 0.7,
+}
+
+
+def build_summary_prompt(news_items, keyword):
+    """요약용 Gemini 프롬프트 생성 (기사 컨텍스트는 토큰 예산 안에서 구성, 링크는 넣지 않음)"""
+    context, _ = prompt_budget.pack_news(news_items, prompt_budget.PROMPT_SUMMARY_BUDGET)
+    news_text = f"키워드: {keyword}\n\n{context}"
+
+    return f"""당신은 뉴스 요약 전문가입니다. 주어진 뉴스들을 간결하고 명확하게 요약해주세요.
+
+다음 뉴스들을 요약해주세요:
+
+{news_text}
+
+위 뉴스들을 종합하여 핵심 내용을 간결하게 요약해주세요."""
+
+
+def build_delta_summary_prompt(plan, keyword):
+    """이전 요약 + 바뀐 기사만으로 요약을 갱신하는 Gemini 프롬프트 생성"""
+    context, _ = prompt_budget.pack_news(plan.added, prompt_budget.PROMPT_SUMMARY_BUDGET)
+    removed = "\n".join(f"- {prompt_budget.clean_text(title)}" for title in plan.removed) or "(없음)"
+    return f"""당신은 뉴스 요약 전문가입니다. 아래는 같은 키워드로 이전에 만든 뉴스 요약입니다.
+
+키워드: {keyword}
+
+이전 요약:
+{plan.base_summary}
+
+목록에서 빠진 기사:
+{removed}
+
+새로 추가된 기사:
+{context}
+
+이전 요약에서 빠진 기사에만 근거한 내용은 덜어내고, 새로 추가된 기사의 핵심 내용을 반영해
+이전 요약과 같은 형식으로 간결하게 갱신된 요약 전체를 작성해주세요."""
+
+
+def _summary_prompt(plan, news_items, keyword):
+    if plan.mode == summary_cache.DELTA:
+        return build_delta_summary_prompt(plan, keyword)
+    return build_summary_prompt(news_items, keyword)
+
+
 def summarize_news(news_items, keyword):
     """뉴스 요약 - Gemini API 사용"""
     if not news_items:
         return "검색된 뉴스가 없습니다."
     
-    # 뉴스 정보를 텍스트로 정리
-    news_text = f"키워드: {keyword}\n\n"
-    for i, item in enumerate(news_items, 1):
-        news_text += f"{i}. {item['title']}\n"
-        if item.get('content'):
-            news_text += f"   내용: {item['content'][:500]}\n"  # 본문 내용 사용
-        elif item.get('snippet'):
-            news_text += f"   요약: {item['snippet']}\n"
-        news_text += f"   링크: {item['link']}\n\n"
-    
     # Gemini API를 사용한 요약 (환경변수 GEMINI_API_KEY가 있을 때만)
     if not GEMINI_API_KEY:
+        tracing.count('summary_fallbacks', reason='no_api_key')
         return simple_summarize(news_items, keyword)
     try:
-        model = genai.GenerativeModel('gemini-pro')
-        prompt = f"""당신은 뉴스 요약 전문가입니다. 주어진 뉴스들을 간결하고 명확하게 요약해주세요.
+        with tracing.stage('summarize'):
+            # 같은 기사 묶음이면 저장된 요약, 일부만 바뀌었으면 바뀐 기사만 요약해 갱신
+            plan = summary_cache.plan(news_items, keyword)
+            tracing.count('summary_plan', mode=plan.mode)
+            if plan.mode == summary_cache.HIT:
+                return plan.summary
 
-다음 뉴스들을 요약해주세요:
+            prompt = _summary_prompt(plan, news_items, keyword)
+            started = time.monotonic()
+            with tracing.stage('gemini_summary'):
+                response = get_gemini_model().generate_content(
+                    prompt,
+                    generation_config=SUMMARY_GENERATION_CONFIG
+                )
+            prompt_budget.record_usage(f'summary_{plan.mode}', prompt, response, time.monotonic() - started)
+            summary_cache.store(plan, response.text)
+            return response.text
+    except Exception as e:
+        print(f"Gemini API 오류: {e}")
+        import traceback
+        traceback.print_exc()
+        tracing.count('summary_fallbacks', reason='gemini_error')
+        return simple_summarize(news_items, keyword)
 
-{news_text}
 
-위 뉴스들을 종합하여 핵심 내용을 간결하게 요약해주세요."""
-        
-        response = model.generate_content(
+def summarize_news_stream(news_items, keyword):
+    """뉴스 요약을 생성되는 대로 조각 단위로 yield (Gemini 스트리밍)
+
+    API 키가 없거나 첫 조각 전에 실패하면 기본 요약을 한 번에 yield 합니다.
+    """
+    if not news_items:
+        yield "검색된 뉴스가 없습니다."
+        return
+    if not GEMINI_API_KEY:
+        tracing.count('summary_fallbacks', reason='no_api_key')
+        yield simple_summarize(news_items, keyword)
+        return
+
+    emitted = False
+    try:
+        plan = summary_cache.plan(news_items, keyword)
+        tracing.count('summary_plan', mode=plan.mode)
+        if plan.mode == summary_cache.HIT:
+            yield plan.summary
+            return
+
+        prompt = _summary_prompt(plan, news_items, keyword)
+        started = time.monotonic()
+        response = get_gemini_model().generate_content(
             prompt,
-            generation_config={
-                'max_output_tokens': 800,
-                'temperature': 0.7,
-            }
+            generation_config=SUMMARY_GENERATION_CONFIG,
+            stream=True
         )
-        return response.text
+        chunks = []
+        for chunk in response:
+            text = chunk.text
+            if text:
+                emitted = True
+                chunks.append(text)
+                yield text
+        elapsed = time.monotonic() - started
+        tracing.record_stage('gemini_summary', elapsed)
+        prompt_budget.record_usage(f'summary_stream_{plan.mode}', prompt, response, elapsed)
+        summary_cache.store(plan, ''.join(chunks))
     except Exception as e:
-        print(f"Gemini API 오류: {e}")
+        print(f"Gemini API 스트리밍 오류: {e}")
         import traceback
         traceback.print_exc()
-        return simple_summarize(news_items, keyword)
+        if not emitted:
+            tracing.count('summary_fallbacks', reason='gemini_error')
+            yield simple_summarize(news_items, keyword)
+
+BATCH_SUMMARY_TOKENS = 500   # 묶음 요약에서 키워드 하나에 허용하는 응답 토큰
+_BATCH_SECTION_RE = re.compile(r'^\s*===\s*(\d+)\s*===\s*$', re.M)
+
+
+def build_batch_summary_prompt(groups):
+    """여러 키워드를 한 번에 요약하는 Gemini 프롬프트 ([(키워드, 뉴스 목록)], 키워드마다 '=== 번호 ===' 구획)"""
+    # 키워드가 여럿이라 키워드당 기사 컨텍스트는 단건 요약 예산의 절반
+    budget = prompt_budget.PROMPT_SUMMARY_BUDGET // 2
+    sections = []
+    for number, (keyword, news_items) in enumerate(groups, 1):
+        context, _ = prompt_budget.pack_news(news_items, budget)
+        sections.append(f"=== {number} ===\n키워드: {keyword}\n\n{context}")
+    news_text = "\n\n".join(sections)
+
+    return f"""당신은 뉴스 요약 전문가입니다. 아래에는 키워드 {len(groups)}개의 뉴스 묶음이 '=== 번호 ===' 줄로 구분되어 있습니다.
+
+{news_text}
+
+묶음마다 핵심 내용을 간결하게 요약해주세요. 각 요약은 같은 번호의 '=== 번호 ===' 줄로 시작하고,
+다른 묶음의 내용은 섞지 마세요."""
+
+
+def parse_batch_summary(text, count):
+    """'=== 번호 ===' 구획으로 나뉜 응답 → {묶음 순서(0부터): 요약}"""
+    parts = _BATCH_SECTION_RE.split(text or '')
+    summaries = {}
+    for number, body in zip(parts[1::2], parts[2::2]):
+        index = int(number) - 1
+        if 0 <= index < count and body.strip():
+            summaries[index] = body.strip()
+    return summaries
+
+
+def summarize_news_batch(groups):
+    """여러 키워드의 뉴스 요약을 Gemini 호출 한 번으로 생성 ([(키워드, 뉴스 목록)] → 요약 목록)
+
+    요약 캐시에 있는 키워드는 빼고 묶으며, 응답에서 구획을 찾지 못한 키워드는 따로 요약합니다.
+    """
+    summaries = [None] * len(groups)
+    pending = []  # (groups 안 위치, 요약 계획)
+    for position, (keyword, news_items) in enumerate(groups):
+        if not news_items or not GEMINI_API_KEY:
+            summaries[position] = summarize_news(news_items, keyword)
+            continue
+        plan = summary_cache.plan(news_items, keyword)
+        tracing.count('summary_plan', mode=plan.mode)
+        if plan.mode == summary_cache.HIT:
+            summaries[position] = plan.summary
+        else:
+            pending.append((position, plan))
+    if not pending:
+        return summaries
+
+    parsed = {}
+    prompt = build_batch_summary_prompt([groups[position] for position, _ in pending])
+    try:
+        with tracing.stage('summarize'):
+            started = time.monotonic()
+            with tracing.stage('gemini_summary'):
+                response = get_gemini_model().generate_content(
+                    prompt,
+                    generation_config=dict(SUMMARY_GENERATION_CONFIG,
+                                           max_output_tokens=BATCH_SUMMARY_TOKENS * len(pending))
+                )
+            prompt_budget.record_usage('summary_batch', prompt, response, time.monotonic() - started)
+            parsed = parse_batch_summary(response.text, len(pending))
+    except Exception as e:
+        print(f"Gemini 묶음 요약 오류: {e}")
+
+    for number, (position, plan) in enumerate(pending):
+        if parsed.get(number):
+            summary_cache.store(plan, parsed[number])
+            summaries[position] = parsed[number]
+        else:
+            tracing.count('summary_fallbacks', reason='batch_missing')
+            keyword, news_items = groups[position]
+            summaries[position] = summarize_news(news_items, keyword)
+    return summaries
+
 
 def simple_summarize(news_items, keyword):
     """간단한 요약 (OpenAI API 없이)"""
@@ -449,6 +760,8 @@ def simple_summarize(news_items, keyword):
     
     for i, item in enumerate(news_items, 1):
         summary += f"【{i}】 {item['title']}\n"
+        if item.get('duplicates'):
+            summary += f"   (같은 소식 {len(item['duplicates'])}건 더)\n"
         if item.get('content'):
             summary += f"   {item['content'][:300]}...\n"  # 본문 내용 표시
         elif item.get('snippet'):
@@ -458,28 +771,27 @@ def simple_summarize(news_items, keyword):
     return summary
 
 
-def build_news_context(news_items, max_items=6):
-    """대화용 뉴스 컨텍스트 문자열 생성"""
-    lines = []
-    for i, item in enumerate(news_items[:max_items], 1):
-        title = item.get("title", "")
-        content = item.get("content") or item.get("snippet") or ""
-        content = (content or "")[:600]
-        lines.append(f"{i}. 제목: {title}\n   내용: {content}")
-    return "\n\n".join(lines)
+def build_news_context(news_items, question=None, index=None, budget=None):
+    """대화용 뉴스 컨텍스트 문자열 생성 (토큰 예산 안에서, 링크 없이)
 
+    index와 질문이 있으면 질문과 관련 높은 문단 순서로 채우고,
+    관련 문단이 없으면 모든 기사의 앞 문장부터 고르게 채웁니다.
+    """
+    budget = budget or prompt_budget.PROMPT_CHAT_BUDGET
+    ranked = index.rank_passages(question, limit=len(index.passages)) if index is not None and question else []
+    if ranked:
+        passages = [(passage.doc, passage.text) for _, passage in ranked]
+        context, _ = prompt_budget.pack_news(index.items, budget, passages=passages)
+    else:
+        context, _ = prompt_budget.pack_news(news_items, budget)
+    return context
 
-def simple_chat_answer(question, news_items, keyword):
-    """API 없이 동작하는 Q&A - 질문에 따라 답변 형식을 다르게"""
-    question_lower = question.strip().lower()
-    scored = []
-    for item in news_items:
-        text = (item.get("title", "") + " " + (item.get("content") or "")).lower()
-        score = sum(1 for w in question_lower.split() if len(w) > 1 and w in text)
-        scored.append((score, item))
-    scored.sort(key=lambda x: x[0], reverse=True)
 
-    top = [it for s, it in scored if s > 0][:4] or [it for _, it in scored[:4]]
+def simple_chat_answer(question, news_items, keyword, index=None):
+    """API 없이 동작하는 Q&A - 질문에 따라 답변 형식을 다르게"""
+    if index is None:
+        index = NewsIndex(news_items)
+    top = index.top_articles(question, limit=4)
     if not top:
         return f"'{keyword}' 관련 뉴스는 있는데, 이 질문과 딱 맞는 내용은 찾기 어려워요. 다른 방식으로 물어보시거나, 더 구체적인 질문을 주시면 도와드릴게요."
 
@@ -497,65 +809,646 @@ def simple_chat_answer(question, news_items, keyword):
         intro = "질문하신 걸 기준으로 뉴스에서 찾아본 내용이에요. "
 
     lines = [intro]
-    for i, item in enumerate(top, 1):
+    for _, item, content in top:
         title = item.get("title", "")
-        content = item.get("content") or item.get("snippet") or ""
         lines.append(f"• {title}")
-        if content:
+        if content and content != title:
             lines.append(f"  {content[:240].strip()}{'...' if len(content) > 240 else ''}")
     return "\n".join(lines)
 
 
+def answer_news_question(question, news_items, keyword, index=None):
+    """뉴스 목록을 근거로 질문에 답변 - Gemini API 사용, 없으면 기본 답변"""
+    # Gemini API 사용 (환경변수 GEMINI_API_KEY가 있을 때만)
+    if not GEMINI_API_KEY:
+        tracing.count('chat_fallbacks', reason='no_api_key')
+        answer = simple_chat_answer(question, news_items, keyword, index=index)
+    else:
+        try:
+            context = build_news_context(news_items, question=question, index=index)
+            prompt = f"""당신은 뉴스에 대해 대화하는 친근한 전문가입니다.
+
+【중요】
+- 사용자의 질문에 **정확히 맞는** 답만 하세요. 질문이 바뀌면 답도 완전히 달라져야 합니다.
+- "요약해줘", "핵심만", "어떤 게 중요해?" 등 질문 유형에 맞게 **그 질문에만 해당하는** 답을 하세요.
+- 뉴스 내용을 근거로 하되, 말투는 자연스럽고 자유롭게. 짧은 질문에는 짧게, 구체적인 질문에는 구체적으로 답하세요.
+- 뉴스에 없는 내용은 추측하지 말고 "뉴스에서는 이 부분이 안 나와 있어요"처럼 말하세요.
+
+키워드: {keyword}
+
+뉴스 목록:
+{context}
+
+사용자 질문: {question}
+
+위 뉴스만 참고해서, **이 질문에만 해당하는** 답변을 자유롭게 해주세요."""
+            started = time.monotonic()
+            with tracing.stage('gemini_chat'):
+                response = get_gemini_model().generate_content(
+                    prompt,
+                    generation_config={
+                        'max_output_tokens': 1024,
+                        'temperature': 0.8,
+                    }
+                )
+            prompt_budget.record_usage('chat', prompt, response, time.monotonic() - started)
+            answer = response.text
+        except Exception as e:
+            print(f"뉴스 대화 Gemini API 오류: {e}")
+            import traceback
+            traceback.print_exc()
+            tracing.count('chat_fallbacks', reason='gemini_error')
+            answer = simple_chat_answer(question, news_items, keyword, index=index)
+    return answer
+
+
+@app.before_request
+def _start_trace():
+    g.trace = tracing.start(request.url_rule.rule if request.url_rule else 'unmatched')
+
+
+@app.after_request
+def _timing_header(response):
+    """단계별 소요 시간 헤더 (스트리밍 응답은 본문을 보내기 전이라 제외)"""
+    tracer, _ = g.get('trace', (None, None))
+    if (tracer is not None and not response.is_streamed
+            and tracing.wants_header(request.headers.get(tracing.TRACE_REQUEST_HEADER))):
+        response.headers['Server-Timing'] = tracer.server_timing()
+    return response
+
+
+@app.after_request
+def _compress_response(response):
+    """Accept-Encoding에 맞춰 JSON/HTML 응답을 brotli/gzip으로 압축 (스트리밍 응답 제외)"""
+    if (response.is_streamed or response.direct_passthrough or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers):
+        return response
+    if response.mimetype not in http_compression.COMPRESSIBLE_TYPES:
+        return response
+    response.vary.add('Accept-Encoding')
+    body, encoding = http_compression.encode_body(response.get_data(), response.mimetype,
+                                                  request.headers.get('Accept-Encoding'))
+    if encoding:
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+
+@app.teardown_request
+def _finish_trace(exc=None):
+    tracer, token = g.pop('trace', (None, None))
+    if tracer is not None:
+        tracing.finish(tracer, token)
+
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
 
-@app.route('/search', methods=['POST'])
+def _request_session_id():
+    """요청의 대화 세션 ID (X-Session-Id 헤더 또는 쿠키). 없거나 형식이 틀리면 None"""
+    session_id = request.headers.get(chat_sessions.SESSION_HEADER) or request.cookies.get(chat_sessions.SESSION_COOKIE)
+    return session_id if chat_sessions.valid_session_id(session_id) else None
+
+
+def _set_session_cookie(response, session_id):
+    response.set_cookie(chat_sessions.SESSION_COOKIE, session_id, max_age=int(chat_sessions.CHAT_SESSION_TTL),
+                        httponly=True, samesite='Lax')
+    return response
+
+
+def response_options(data):
+    """응답 크기 옵션 (fields, lite) - JSON 본문 또는 쿼리 문자열 dict
+
+    fields: 기사 항목에 남길 필드 목록 (쉼표 구분 문자열 또는 배열)
+    lite: 기사 본문(content)을 빼고 content_hash/content_length만 보냄 (본문은 /article/<content_hash>)
+    fields 형식이 틀리면 ValueError (400 응답용 문구)
+    """
+    fields = data.get('fields')
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    if fields is not None and not (isinstance(fields, list) and all(isinstance(field, str) for field in fields)):
+        raise ValueError('fields는 필드 이름 목록 또는 쉼표로 구분한 문자열이어야 합니다.')
+    fields = {field.strip() for field in fields or [] if field.strip()} or None
+    lite = data.get('lite')
+    lite = lite is True or str(lite).lower() in ('1', 'true')
+    return fields, lite
+
+
+def select_news_fields(news_items, fields=None, lite=False):
+    """응답용 기사 목록 (원본은 캐시와 공유하므로 복사본)"""
+    shaped = []
+    for item in news_items:
+        item = dict(item)
+        if lite:
+            content = item.pop('content', '') or ''
+            item['content_length'] = len(content)
+            item['content_hash'] = history_store.content_hash(content) if content else None
+        if fields:
+            item = {key: value for key, value in item.items() if key in fields}
+        shaped.append(item)
+    return shaped
+
+
+def result_etag(keyword, summary, news_items, session_id):
+    """검색 결과 응답의 ETag - 요약 + (필드 선택 후) 기사 목록 + 세션의 내용 해시
+
+    응답 본문에 session_id가 들어 있으므로 세션도 ETag에 포함합니다 (다른 세션의 본문을 304로 재사용하지 않도록).
+    """
+    payload = json.dumps([keyword, summary, news_items, session_id], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def run_search_pipeline(keyword, num_results=10, hl='ko', gl='KR', record_history=True):
+    """뉴스 검색 → 요약 → 히스토리 저장. 뉴스가 없으면 None"""
+    news_items = search_google_news(keyword, num_results=num_results, hl=hl, gl=gl)
+    if not news_items:
+        return None
+
+    summary = summarize_news(news_items, keyword)
+
+    # 검색 히스토리 저장 (프리페치는 인기 키워드 집계를 왜곡하지 않도록 저장하지 않음)
+    if record_history:
+        save_history(keyword, news_items, summary)
+
+    return {
+        "news": news_items,
+        "summary": summary
+    }
+
+
+def warm_search(keyword, hl='ko', gl='KR'):
+    """프리페치용 - 검색을 실행해 결과/본문/요약 캐시를 채움. 결과가 있으면 True"""
+    key = result_cache.make_key(keyword, hl=hl, gl=gl, num_results=10)
+    value = run_search_pipeline(keyword, num_results=10, hl=hl, gl=gl, record_history=False)
+    result_cache.put(key, value)
+    if value is not None:
+        # 히스토리에는 남기지 않지만 lite 응답의 본문 지연 로딩(/article)을 위해 본문은 저장
+        try:
+            history_store.get_store().put_contents(value['news'])
+        except Exception as e:
+            print(f"프리페치 본문 저장 오류: {e}")
+    return value is not None
+
+
+prefetcher = prefetch.Prefetcher(warm_search)
+
+
+def batch_fetch_deadline(unique_links):
+    """일괄 검색 본문 수집 제한 시간 - 구글 뉴스 링크는 호스트당 초당 HOST_RATE건씩만 해석되므로 링크 수에 비례해 늘림"""
+    deadline = FETCH_DEADLINE + unique_links / max(0.1, host_limiter.HOST_RATE)
+    return min(max(FETCH_DEADLINE, BATCH_FETCH_DEADLINE_MAX), deadline)
+
+
+def _batch_search_worker(keywords, hl, gl, batch_summary, events, stats):
+    """일괄 검색 작업 (백그라운드 스레드) - 키워드가 끝날 때마다 events에 (키워드, 결과, 오류) 추가
+
+    1) 키워드별 후보 수집을 동시에 실행 2) 모든 키워드 기사 링크의 합집합에서 같은 기사는 본문을 한 번만 수집
+    3) 본문이 다 모인 키워드부터 요약 (batch_summary면 BATCH_SUMMARY_GROUP개씩 묶어 Gemini 한 번)
+    """
+    reported = set()
+    reported_lock = threading.Lock()
+
+    def report(keyword, result, error=None):
+        with reported_lock:  # 키워드마다 이벤트는 한 번만 (오류 처리 후 늦게 끝난 요약은 버림)
+            if keyword in reported:
+                return
+            reported.add(keyword)
+        events.put((keyword, result, error))
+
+    def discover(keyword):
+        return story_clusters.cluster_by_title(discover_news(keyword, num_results=10, hl=hl, gl=gl), keyword)
+
+    summarizer = ThreadPoolExecutor(max_workers=max(1, BATCH_SUMMARY_WORKERS))
+    try:
+        found = {}
+        with tracing.stage('discover'):
+            with ThreadPoolExecutor(max_workers=max(1, min(BATCH_DISCOVER_WORKERS, len(keywords)))) as executor:
+                futures = {executor.submit(tracing.in_context(discover), keyword): keyword for keyword in keywords}
+                for future in as_completed(futures):
+                    keyword = futures[future]
+                    try:
+                        news_items = future.result()
+                    except Exception as e:
+                        print(f"후보 수집 오류 ({keyword}): {e}")
+                        news_items = []
+                    if news_items:
+                        found[keyword] = news_items
+                    else:
+                        report(keyword, None)
+
+        articles = {}   # 정규화 링크 -> 본문 수집용 항목
+        owners = {}     # 정규화 링크 -> [(키워드, 기사 번호)]
+        remaining = {}  # 키워드 -> 본문을 기다리는 링크 수
+        for keyword, news_items in found.items():
+            links = set()
+            for index, item in enumerate(news_items):
+                link = rss_feed.canonical_url(item['link'])
+                articles.setdefault(link, {'link': item['link']})
+                owners.setdefault(link, []).append((keyword, index))
+                links.add(link)
+            remaining[keyword] = len(links)
+        stats['articles'] = sum(len(news_items) for news_items in found.values())
+        stats['unique_articles'] = len(articles)
+        tracing.count('batch_articles', len(articles), kind='fetched')
+        tracing.count('batch_articles', stats['articles'] - len(articles), kind='shared')
+
+        def finish(group):
+            with tracing.stage('cluster'):
+                group = [(keyword, story_clusters.merge_by_body(found[keyword])) for keyword in group]
+            if batch_summary:
+                summaries = summarize_news_batch(group)
+            else:
+                summaries = [summarize_news(news_items, keyword) for keyword, news_items in group]
+            for (keyword, news_items), summary in zip(group, summaries):
+                result = {"news": news_items, "summary": summary}
+                result_cache.put(result_cache.make_key(keyword, hl=hl, gl=gl, num_results=10), result)
+                save_history(keyword, news_items, summary)
+                report(keyword, result)
+
+        group_size = max(1, BATCH_SUMMARY_GROUP) if batch_summary else 1
+        ready = []
+        jobs = []
+
+        def flush(force=False):
+            while ready and (force or len(ready) >= group_size):
+                group = ready[:group_size]
+                del ready[:group_size]
+                jobs.append(summarizer.submit(tracing.in_context(finish), group))
+
+        links = list(articles)
+        deadline = batch_fetch_deadline(len(links))
+        with tracing.stage('fetch'):
+            for position, content in iter_news_contents([articles[link] for link in links], deadline=deadline):
+                for keyword, index in owners[links[position]]:
+                    found[keyword][index]['content'] = content
+                for keyword in {keyword for keyword, _ in owners[links[position]]}:
+                    remaining[keyword] -= 1
+                    if remaining[keyword] == 0:
+                        ready.append(keyword)
+                flush()
+        # 제한 시간 안에 본문이 다 모이지 않은 키워드도 받은 본문까지로 요약
+        ready.extend(keyword for keyword, count in remaining.items() if count > 0)
+        flush(force=True)
+        for job in jobs:
+            try:
+                job.result()
+            except Exception as e:
+                print(f"일괄 검색 요약 오류: {e}")
+    except Exception as e:
+        print(f"일괄 검색 오류: {e}")
+    finally:
+        summarizer.shutdown(wait=False)
+        for keyword in keywords:
+            report(keyword, None, '처리 중 오류가 발생했습니다.')
+
+
+def iter_batch_search(keywords, hl='ko', gl='KR', batch_summary=False):
+    """여러 키워드 일괄 검색 - 결과가 준비되는 키워드부터 이벤트(dict)를 yield
+
+    결과 캐시가 신선한 키워드는 바로 돌려주고, 나머지는 후보 수집/본문 수집/요약을 한 번에 처리합니다.
+    이벤트 종류: result(키워드별 뉴스/요약) / error(키워드별 실패) → done(기사 공유 통계)
+    """
+    stats = {'keywords': len(keywords), 'articles': 0, 'unique_articles': 0, 'cached': 0}
+    pending = []
+    for keyword in keywords:
+        cached, cache_status = result_cache.peek(result_cache.make_key(keyword, hl=hl, gl=gl, num_results=10))
+        if cached and cache_status == result_cache.FRESH:
+            tracing.count('result_cache', status=cache_status)
+            stats['cached'] += 1
+            yield _batch_result_event(keyword, cached, cache_status)
+        else:
+            tracing.count('result_cache', status=result_cache.MISS)
+            pending.append(keyword)
+
+    if pending:
+        events = queue.Queue()
+        worker = threading.Thread(target=tracing.in_context(_batch_search_worker),
+                                  args=(pending, hl, gl, batch_summary, events, stats), daemon=True)
+        worker.start()
+        for _ in pending:
+            keyword, result, error = events.get()
+            if result:
+                yield _batch_result_event(keyword, result, result_cache.MISS)
+            else:
+                yield {'type': 'error', 'keyword': keyword,
+                       'error': error or '뉴스를 찾을 수 없습니다. 다른 키워드로 시도해보세요.'}
+
+    yield dict(stats, type='done', shared_articles=stats['articles'] - stats['unique_articles'])
+
+
+def _batch_result_event(keyword, result, cache_status):
+    return {'type': 'result', 'keyword': keyword, 'cache': cache_status, 'count': len(result['news']),
+            'news': result['news'], 'summary': result['summary']}
+
+
+@app.route('/search', methods=['GET', 'POST'])
 def search():
-    global last_search
+    """뉴스 검색 + 요약 (GET은 쿼리 문자열, POST는 JSON 본문)
+
+    fields/lite로 응답 크기를 줄일 수 있고, 응답의 ETag를 If-None-Match로 보내면
+    결과가 같을 때 본문 없이 304를 돌려줍니다.
+    """
     try:
-        data = request.json or {}
-        keyword = data.get('keyword', '').strip()
+        data = (request.get_json(silent=True) or {}) if request.method == 'POST' else request.args
+        keyword = data.get('keyword') or ''
+        hl = data.get('hl') or 'ko'
+        gl = data.get('gl') or 'KR'
         
+        if not isinstance(keyword, str):
+            return jsonify({'error': '키워드는 문자열이어야 합니다.'}), 400
+        keyword = keyword.strip()
         if not keyword:
             return jsonify({'error': '키워드를 입력해주세요.'}), 400
+        if not isinstance(hl, str) or not isinstance(gl, str):
+            return jsonify({'error': 'hl, gl은 문자열이어야 합니다.'}), 400
+        try:
+            fields, lite = response_options(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # 뉴스 검색
-        news_items = search_google_news(keyword, num_results=10)
+        # 뉴스 검색 + 요약 (키워드별 결과 캐시, 동일 키워드 동시 요청은 한 번만 계산)
+        key = result_cache.make_key(keyword, hl=hl, gl=gl, num_results=10)
+        result, cache_status = result_cache.get_or_compute(
+            key, lambda: run_search_pipeline(keyword, num_results=10, hl=hl, gl=gl)
+        )
+        tracing.count('result_cache', status=cache_status)
         
-        if not news_items:
+        if not result:
             return jsonify({
                 'error': '뉴스를 찾을 수 없습니다. 다른 키워드로 시도해보세요.',
                 'news': [],
                 'summary': ''
             }), 404
         
-        # 뉴스 요약
-        summary = summarize_news(news_items, keyword)
-
-        # 최근 검색 결과 갱신 (대화 기능용)
-        last_search = {
-            "keyword": keyword,
-            "news": news_items,
-            "summary": summary
-        }
+        news_items = result['news']
+        summary = result['summary']
 
-        # 검색 히스토리 저장
-        save_history(keyword, news_items, summary)
-        
-        return jsonify({
-            'success': True,
-            'keyword': keyword,
-            'news': news_items,
-            'summary': summary,
-            'count': len(news_items)
-        })
+        # 이 세션의 대화 컨텍스트 갱신
+        session_id = _request_session_id() or chat_sessions.new_session_id()
+        chat_sessions.save(session_id, keyword, news_items, summary)
+
+        shaped = select_news_fields(news_items, fields, lite)
+        etag = result_etag(keyword, summary, shaped, session_id)
+        if request.if_none_match.contains_weak(etag):
+            tracing.count('not_modified', endpoint='search')
+            response = Response(status=304)
+        else:
+            response = jsonify({
+                'success': True,
+                'keyword': keyword,
+                'news': shaped,
+                'summary': summary,
+                'count': len(news_items),
+                'session_id': session_id
+            })
+        # 압축된 표현도 같은 ETag를 쓰므로 약한 ETag
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.headers['X-Cache'] = cache_status
+        return _set_session_cookie(response, session_id)
     
     except Exception as e:
         return jsonify({'error': f'오류가 발생했습니다: {str(e)}'}), 500
 
 
+@app.route('/article/<content_hash>', methods=['GET'])
+def article_content(content_hash):
+    """lite 검색 결과의 기사 본문 (content_hash로 조회, 내용이 바뀌지 않으므로 오래 캐시 가능)"""
+    store = history_store.get_store()
+    if request.if_none_match.contains_weak(content_hash) and store.has_content(content_hash.lower()):
+        response = Response(status=304)
+    else:
+        content = store.content(content_hash.lower())
+        if content is None:
+            return jsonify({'error': '기사 본문을 찾을 수 없습니다.'}), 404
+        response = jsonify({'content_hash': content_hash, 'content': content})
+    # 압축 여부와 관계없이 같은 ETag를 쓰므로 약한 ETag (304도 인코딩별로 캐시되도록 Vary)
+    response.set_etag(content_hash, weak=True)
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = 'public, max-age=86400, immutable'
+    return response
+
+
+def _stream_event(event, sse=False):
+    """스트리밍 이벤트 한 건 직렬화 (NDJSON 한 줄 또는 SSE 메시지)"""
+    data = json.dumps(event, ensure_ascii=False)
+    if sse:
+        return f"event: {event['type']}\ndata: {data}\n\n"
+    return data + "\n"
+
+
+def _latency_summary(samples):
+    values = sorted(samples)
+    if not values:
+        return {'count': 0}
+    return {
+        'count': len(values),
+        'p50_ms': round(values[len(values) // 2] * 1000, 1),
+        'p95_ms': round(values[min(len(values) - 1, int(len(values) * 0.95))] * 1000, 1),
+        'last_ms': round(samples[-1] * 1000, 1),
+    }
+
+
+def _stream_item(index, item):
+    return {'type': 'item', 'index': index, 'title': item['title'], 'link': item['link'],
+            'snippet': item.get('snippet', ''), 'duplicates': item.get('duplicates', [])}
+
+
+def _stream_news(news_items, provisional=None):
+    """최종 기사 목록 이벤트 - 본문으로 다시 묶은 뒤의 순서와 각 기사의 임시 번호(item/content의 index)"""
+    return {'type': 'news', 'news': [
+        {'index': index, 'provisional_index': provisional[id(item)] if provisional else index,
+         'title': item['title'], 'link': item['link'], 'duplicates': item.get('duplicates', [])}
+        for index, item in enumerate(news_items)
+    ]}
+
+
+@app.route('/search/stream', methods=['GET', 'POST'])
+def search_stream():
+    """뉴스 검색 스트리밍 - 기사 목록, 본문, 요약을 준비되는 대로 전송
+
+    기본은 NDJSON(한 줄에 이벤트 하나), format=sse 또는 Accept: text/event-stream이면 SSE.
+    이벤트 종류: item(제목/링크) → content(본문) → news(최종 목록) → summary(요약 조각) → done / error
+    """
+    data = request.get_json(silent=True) or {}
+    keyword = data.get('keyword') or request.args.get('keyword') or ''
+    hl = data.get('hl') or request.args.get('hl') or 'ko'
+    gl = data.get('gl') or request.args.get('gl') or 'KR'
+    sse = (request.args.get('format') == 'sse'
+           or 'text/event-stream' in request.headers.get('Accept', ''))
+
+    if not isinstance(keyword, str):
+        return jsonify({'error': '키워드는 문자열이어야 합니다.'}), 400
+    keyword = keyword.strip()
+    if not keyword:
+        return jsonify({'error': '키워드를 입력해주세요.'}), 400
+    if not isinstance(hl, str) or not isinstance(gl, str):
+        return jsonify({'error': 'hl, gl은 문자열이어야 합니다.'}), 400
+
+    session_id = _request_session_id() or chat_sessions.new_session_id()
+
+    def generate():
+        started = time.monotonic()
+        first_result_at = None
+        key = result_cache.make_key(keyword, hl=hl, gl=gl, num_results=10)
+
+        def mark_first_result():
+            nonlocal first_result_at
+            if first_result_at is None:
+                first_result_at = time.monotonic() - started
+                stream_first_result_times.append(first_result_at)
+
+        def emit_result(result):
+            """캐시/다른 요청이 만든 결과를 이벤트로 전송 (번호가 이미 확정됨)"""
+            for index, item in enumerate(result['news']):
+                yield _stream_event(_stream_item(index, item), sse)
+                mark_first_result()
+                yield _stream_event({'type': 'content', 'index': index,
+                                     'content': item.get('content', '')}, sse)
+            yield _stream_event(_stream_news(result['news']), sse)
+            yield _stream_event({'type': 'summary', 'text': result['summary']}, sse)
+
+        try:
+            cached, cache_status = result_cache.peek(key)
+            tracing.count('result_cache', status=cache_status if cached else result_cache.MISS)
+            if cached and cache_status == result_cache.STALE:
+                result_cache.refresh(key, lambda: run_search_pipeline(keyword, num_results=10, hl=hl, gl=gl))
+            if not cached:
+                # 같은 키워드를 이미 다른 요청이 계산 중이면 그 결과를 기다려 보냄 (single flight)
+                future, owner = result_cache.claim(key)
+                if not owner:
+                    cache_status = result_cache.SHARED
+                    try:
+                        cached = future.result()
+                    except result_cache.Abandoned:  # 먼저 시작한 스트림이 중간에 끊긴 경우
+                        cached, cache_status = result_cache.get_or_compute(
+                            key, lambda: run_search_pipeline(keyword, num_results=10, hl=hl, gl=gl))
+                    if not cached:
+                        yield _stream_event({'type': 'error',
+                                             'error': '뉴스를 찾을 수 없습니다. 다른 키워드로 시도해보세요.'}, sse)
+                        return
+            if cached:
+                yield from emit_result(cached)
+                news_items, summary = cached['news'], cached['summary']
+            else:
+                cache_status = result_cache.MISS
+                value = error = None
+                try:
+                    news_items = story_clusters.cluster_by_title(
+                        discover_news(keyword, num_results=10, hl=hl, gl=gl), keyword)
+                    if not news_items:
+                        yield _stream_event({'type': 'error',
+                                             'error': '뉴스를 찾을 수 없습니다. 다른 키워드로 시도해보세요.'}, sse)
+                        return
+
+                    # item/content의 index는 임시 번호 - 본문으로 다시 묶은 뒤의 최종 목록은 news 이벤트로 보냄
+                    for index, item in enumerate(news_items):
+                        yield _stream_event(_stream_item(index, item), sse)
+                    mark_first_result()
+
+                    for index, content in iter_news_contents(news_items):
+                        news_items[index]['content'] = content
+                        yield _stream_event({'type': 'content', 'index': index, 'content': content}, sse)
+                    provisional = {id(item): index for index, item in enumerate(news_items)}
+                    news_items = story_clusters.merge_by_body(news_items)
+                    yield _stream_event(_stream_news(news_items, provisional), sse)
+
+                    chunks = []
+                    for text in summarize_news_stream(news_items, keyword):
+                        chunks.append(text)
+                        yield _stream_event({'type': 'summary', 'text': text}, sse)
+                    summary = ''.join(chunks)
+                    value = {"news": news_items, "summary": summary}
+                except GeneratorExit:
+                    error = result_cache.Abandoned(keyword)
+                    raise
+                except Exception as e:
+                    error = e
+                    raise
+                finally:
+                    # 기다리는 요청이 멈추지 않도록 항상 종료 - 뉴스가 없으면 None, 연결이 끊기면 다시 계산하게 함
+                    result_cache.settle(key, future, value, error)
+                save_history(keyword, news_items, summary)
+
+            # 이 세션의 대화 컨텍스트 갱신
+            chat_sessions.save(session_id, keyword, news_items, summary)
+
+            yield _stream_event({
+                'type': 'done',
+                'keyword': keyword,
+                'count': len(news_items),
+                'cache': cache_status,
+                'session_id': session_id,
+                'first_result_ms': round((first_result_at or 0) * 1000, 1),
+                'total_ms': round((time.monotonic() - started) * 1000, 1),
+            }, sse)
+        except Exception as e:
+            yield _stream_event({'type': 'error', 'error': f'오류가 발생했습니다: {str(e)}'}, sse)
+
+    response = Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream' if sse else 'application/x-ndjson'
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return _set_session_cookie(response, session_id)
+
+
+@app.route('/search/batch', methods=['POST'])
+def search_batch():
+    """여러 키워드 일괄 검색 - 키워드별 결과를 끝나는 순서대로 스트리밍 (NDJSON, format=sse면 SSE)
+
+    요청: {"keywords": [...], "hl": "ko", "gl": "KR", "summary": "each" | "batch"}
+    여러 키워드에 함께 나온 기사는 본문을 한 번만 받고, summary=batch면 요약도 여러 키워드씩 묶어 생성합니다.
+    대화 세션은 갱신하지 않습니다 (키워드 하나를 고른 뒤 /search로 대화 컨텍스트를 만듦).
+    """
+    data = request.get_json(silent=True) or {}
+    keywords = data.get('keywords') or []
+    if isinstance(keywords, str):
+        keywords = keywords.split(',')
+    if not isinstance(keywords, list):
+        return jsonify({'error': 'keywords는 키워드 목록이어야 합니다.'}), 400
+    hl = data.get('hl') or 'ko'
+    gl = data.get('gl') or 'KR'
+    if not isinstance(hl, str) or not isinstance(gl, str):
+        return jsonify({'error': 'hl, gl은 문자열이어야 합니다.'}), 400
+    batch_summary = data.get('summary') == 'batch'
+    sse = (request.args.get('format') == 'sse'
+           or 'text/event-stream' in request.headers.get('Accept', ''))
+
+    # 같은 키워드(대소문자/공백만 다른 경우 포함)는 한 번만
+    unique = {}
+    for keyword in keywords:
+        keyword = str(keyword).strip()
+        if keyword:
+            unique.setdefault(result_cache.normalize_keyword(keyword), keyword)
+    keywords = list(unique.values())
+    if not keywords:
+        return jsonify({'error': '키워드를 입력해주세요.'}), 400
+    if len(keywords) > BATCH_MAX_KEYWORDS:
+        return jsonify({'error': f'키워드는 한 번에 {BATCH_MAX_KEYWORDS}개까지 검색할 수 있습니다.'}), 400
+
+    def generate():
+        started = time.monotonic()
+        try:
+            for event in iter_batch_search(keywords, hl=hl, gl=gl, batch_summary=batch_summary):
+                if event['type'] == 'done':
+                    event['total_ms'] = round((time.monotonic() - started) * 1000, 1)
+                yield _stream_event(event, sse)
+        except Exception as e:
+            yield _stream_event({'type': 'error', 'error': f'오류가 발생했습니다: {str(e)}'}, sse)
+
+    response = Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream' if sse else 'application/x-ndjson'
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @app.route('/chat', methods=['POST'])
 def chat_with_news():
     """수집한 뉴스들을 가지고 대화하는 엔드포인트 - Gemini API 사용"""
@@ -566,56 +1459,119 @@ def chat_with_news():
         if not question:
             return jsonify({'error': '질문을 입력해주세요.'}), 400
 
-        if not last_search.get("news"):
+        session = chat_sessions.load(_request_session_id())
+        if session is None or not session.news:
             return jsonify({'error': '먼저 키워드를 검색해서 뉴스를 불러와 주세요.'}), 400
 
-        keyword = last_search.get("keyword") or ""
-        news_items = last_search.get("news") or []
+        with tracing.stage('chat'):
+            answer = answer_news_question(question, session.news, session.keyword, index=session.index)
 
-        # Gemini API 사용 (환경변수 GEMINI_API_KEY가 있을 때만)
-        if not GEMINI_API_KEY:
-            answer = simple_chat_answer(question, news_items, keyword)
-        else:
-            try:
-                context = build_news_context(news_items)
-                model = genai.GenerativeModel('gemini-pro')
-                prompt = f"""당신은 뉴스에 대해 대화하는 친근한 전문가입니다.
+        return jsonify({
+            "success": True,
+            "answer": answer
+        })
 
-【중요】
-- 사용자의 질문에 **정확히 맞는** 답만 하세요. 질문이 바뀌면 답도 완전히 달라져야 합니다.
-- "요약해줘", "핵심만", "어떤 게 중요해?" 등 질문 유형에 맞게 **그 질문에만 해당하는** 답을 하세요.
-- 뉴스 내용을 근거로 하되, 말투는 자연스럽고 자유롭게. 짧은 질문에는 짧게, 구체적인 질문에는 구체적으로 답하세요.
-- 뉴스에 없는 내용은 추측하지 말고 "뉴스에서는 이 부분이 안 나와 있어요"처럼 말하세요.
+    except Exception as e:
+        return jsonify({'error': f'대화 처리 중 오류가 발생했습니다: {str(e)}'}), 500
 
-키워드: {keyword}
+def _history_page_args():
+    """목록/검색 공통 쿼리 인자 (limit, before는 정수)"""
+    return {
+        'keyword': request.args.get('keyword', '').strip() or None,
+        'since': request.args.get('since') or None,
+        'until': request.args.get('until') or None,
+        'before': int(request.args['before']) if request.args.get('before') else None,
+        'limit': int(request.args.get('limit', '20')),
+    }
 
-뉴스 목록:
-{context}
 
-사용자 질문: {question}
+def _history_page_response(records, next_cursor):
+    for record in records:
+        record['count'] = len(record['news'])
+    return jsonify({'items': records, 'next_cursor': next_cursor})
 
-위 뉴스만 참고해서, **이 질문에만 해당하는** 답변을 자유롭게 해주세요."""
-                response = model.generate_content(
-                    prompt,
-                    generation_config={
-                        'max_output_tokens': 1024,
-                        'temperature': 0.8,
-                    }
-                )
-                answer = response.text
-            except Exception as e:
-                print(f"뉴스 대화 Gemini API 오류: {e}")
-                import traceback
-                traceback.print_exc()
-                answer = simple_chat_answer(question, news_items, keyword)
 
-        return jsonify({
-            "success": True,
-            "answer": answer
-        })
+@app.route('/history', methods=['GET'])
+def history_list():
+    """지난 검색 기록 목록 (최신순, 본문 제외) - keyword/since/until 필터, before 커서로 다음 페이지"""
+    try:
+        args = _history_page_args()
+    except ValueError:
+        return jsonify({'error': 'limit과 before는 정수여야 합니다.'}), 400
+    try:
+        return _history_page_response(*history_store.get_store().page(**args))
+    except Exception as e:
+        return jsonify({'error': f'오류가 발생했습니다: {str(e)}'}), 500
+
 
+@app.route('/history/search', methods=['GET'])
+def history_search():
+    """지난 검색 결과 전문 검색 (키워드/요약/제목/본문) - q의 모든 단어가 들어 있는 기록을 최신순으로"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': '검색어(q)를 입력해주세요.'}), 400
+    try:
+        args = _history_page_args()
+    except ValueError:
+        return jsonify({'error': 'limit과 before는 정수여야 합니다.'}), 400
+    try:
+        return _history_page_response(*history_store.get_store().page(text=query, **args))
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
-        return jsonify({'error': f'대화 처리 중 오류가 발생했습니다: {str(e)}'}), 500
+        return jsonify({'error': f'오류가 발생했습니다: {str(e)}'}), 500
+
+
+@app.route('/history/<int:search_id>', methods=['GET'])
+def history_detail(search_id):
+    """지난 검색 기록 한 건 (기사 본문 포함)"""
+    try:
+        record = history_store.get_store().get(search_id)
+        if record is None:
+            return jsonify({'error': '기록을 찾을 수 없습니다.'}), 404
+        return jsonify(record)
+
+    except Exception as e:
+        return jsonify({'error': f'오류가 발생했습니다: {str(e)}'}), 500
+
+
+@app.route('/prefetch/status', methods=['GET'])
+def prefetch_status():
+    """백그라운드 프리페치 상태 (큐 길이, 키워드별 마지막 갱신 시각 등)"""
+    return jsonify(dict(prefetcher.status(), enabled=prefetch.PREFETCH_ENABLED))
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus 형식 지표 - 단계별 소요 시간 히스토그램, 요청 시간, 캐시/대체 경로/바이트 카운터"""
+    return Response(tracing.render_metrics(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    """성능 관련 내부 통계 (HTTP 커넥션 재사용 등)"""
+    return jsonify({
+        'http': http_client.connection_stats(),
+        'host_limiter': host_limiter.get_limiter().stats(),
+        'article_downloads': extractors.stream_stats(),
+        'content_cache': content_cache.stats(),
+        'result_cache': result_cache.stats(),
+        'url_resolver': url_resolver.stats(),
+        'chat_sessions': chat_sessions.stats(),
+        'gemini_usage': prompt_budget.usage_stats(),
+        'summary_cache': summary_cache.stats(),
+        'story_clusters': story_clusters.stats(),
+        'stream_first_result': _latency_summary(list(stream_first_result_times))
+    })
+
+
+if not LAZY_INIT:
+    warm_up()
 
 if __name__ == '__main__':
+    # 디버그 리로더의 감시 프로세스가 아니라 실제 서버 프로세스에서만 프리페치 시작
+    if prefetch.PREFETCH_ENABLED and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        prefetcher.start()
     app.run(debug=True, host='0.0.0.0', port=5000)
+elif prefetch.PREFETCH_ENABLED:
+    prefetcher.start()
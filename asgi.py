@@ -0,0 +1,521 @@
+"""비동기(ASGI) 서버 모드 - 느린 스크래핑/Gemini 호출이 워커 스레드를 붙잡지 않도록 처리
+
+/search, /chat 요청은 이벤트 루프에서 처리합니다.
+  - RSS/기사/링크 해석 요청: httpx.AsyncClient (논블로킹, 도메인별 동시 요청 제한)
+  - HTML 파싱, 캐시/히스토리(SQLite) 접근: 작은 I/O 스레드 풀
+  - Gemini 호출(blocking SDK): 별도 스레드 풀
+따라서 프로세스 하나가 수백 개의 검색을 동시에 기다릴 수 있습니다.
+그 밖의 경로(/, /stats, /search/stream 등)는 asgiref로 감싼 기존 Flask 앱이 처리합니다.
+
+실행:
+    pip install -r requirements-asgi.txt
+    uvicorn asgi:app --host 0.0.0.0 --port 8000
+"""
+import asyncio
+from http.cookies import SimpleCookie
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+import httpx
+
+import app as news_app
+import chat_sessions
+import content_cache
+import extractors
+import host_limiter
+import http_compression
+import result_cache
+import rss_feed
+import story_clusters
+import tracing
+import url_resolver
+
+try:
+    from asgiref.wsgi import WsgiToAsgi
+except ImportError:  # asgiref가 없으면 /search, /chat 외 경로는 404
+    WsgiToAsgi = None
+
+ASGI_MAX_CONNECTIONS = int(os.getenv('ASGI_MAX_CONNECTIONS', '200'))     # 전체 동시 연결 수
+ASGI_MAX_KEEPALIVE = int(os.getenv('ASGI_MAX_KEEPALIVE', '50'))          # 유지할 keep-alive 연결 수
+ASGI_IO_WORKERS = int(os.getenv('ASGI_IO_WORKERS', '8'))                 # 파싱/SQLite 작업 스레드 수
+ASGI_GEMINI_WORKERS = int(os.getenv('ASGI_GEMINI_WORKERS', '32'))        # Gemini 호출 스레드 수
+ASGI_PARSE_WORKERS = int(os.getenv('ASGI_PARSE_WORKERS', '8'))           # 기사 스트리밍 파싱 스레드 수
+
+_io_pool = ThreadPoolExecutor(max_workers=ASGI_IO_WORKERS, thread_name_prefix='asgi-io')
+_gemini_pool = ThreadPoolExecutor(max_workers=ASGI_GEMINI_WORKERS, thread_name_prefix='asgi-gemini')
+# lxml 파서는 만든 스레드에서만 써야 하므로 기사 하나는 끝까지 같은 단일 스레드 실행기에서 파싱
+_parse_lanes = [ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'asgi-parse-{i}')
+                for i in range(max(1, ASGI_PARSE_WORKERS))]
+_parse_turn = itertools.count()
+
+_client = None
+_inflight = {}  # 결과 캐시 키 -> asyncio.Task (동일 검색 합치기)
+
+
+def get_client():
+    """이벤트 루프에서 공유하는 비동기 HTTP 클라이언트"""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(10.0),
+            limits=httpx.Limits(max_connections=ASGI_MAX_CONNECTIONS,
+                                max_keepalive_connections=ASGI_MAX_KEEPALIVE),
+        )
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def run_io(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(_io_pool, tracing.in_context(func), *args)
+
+
+async def run_gemini(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(_gemini_pool, tracing.in_context(func), *args)
+
+
+async def limited_request(method, url, **kwargs):
+    """호스트별 속도 제한/서킷 브레이커를 적용한 공유 클라이언트 요청 (서킷이 열려 있으면 CircuitOpenError)"""
+    limiter = host_limiter.get_limiter()
+    host = host_limiter.host_of(url)
+    wait = limiter.reserve(host)
+    client = get_client()
+    try:
+        if wait > 0:
+            await asyncio.sleep(wait)
+        if kwargs.pop('stream', False):  # 본문은 호출하는 쪽에서 읽고 aclose()
+            follow_redirects = kwargs.pop('follow_redirects', False)
+            response = await client.send(client.build_request(method, url, **kwargs), stream=True,
+                                         follow_redirects=follow_redirects)
+        else:
+            response = await client.request(method, url, **kwargs)
+    except httpx.HTTPError as e:
+        limiter.record(host, error=e)
+        raise
+    except BaseException:
+        limiter.cancel(host)
+        raise
+    limiter.record(host, status=response.status_code, retry_after=response.headers.get('Retry-After'))
+    return response
+
+
+class AsyncDomainThrottle:
+    """DomainThrottle의 asyncio 버전 - 도메인별 동시 요청 수와 요청 시작 간격 제한"""
+
+    def __init__(self, per_domain=news_app.FETCH_PER_DOMAIN, interval=news_app.FETCH_DOMAIN_INTERVAL):
+        self.per_domain = max(1, per_domain)
+        self.interval = max(0.0, interval)
+        self._semaphores = {}
+        self._next_slot = {}
+
+    @asynccontextmanager
+    async def slot(self, url):
+        domain = urlsplit(url).netloc.lower()
+        semaphore = self._semaphores.setdefault(domain, asyncio.Semaphore(self.per_domain))
+        async with semaphore:
+            now = time.monotonic()
+            start = max(now, self._next_slot.get(domain, now))
+            self._next_slot[domain] = start + self.interval
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
+
+
+async def resolve_link(url, throttle):
+    """url_resolver.UrlResolver.resolve의 비동기 버전"""
+    resolver = url_resolver.get_resolver()
+    resolution = await run_io(resolver.resolve_offline, url)
+    if resolution is not None:
+        return resolution
+
+    async with throttle.slot(url):
+        response = await limited_request('GET', url, headers=news_app.ARTICLE_HEADERS, follow_redirects=False)
+    target = url_resolver.redirect_target(url, response.headers, response.is_redirect)
+    if target:
+        return await run_io(resolver.record, url, target, url_resolver.REDIRECT)
+    html = response.text if response.status_code == 200 else None
+
+    signature = url_resolver.page_signature(html)
+    if signature:
+        try:
+            form = url_resolver.batchexecute_form(url_resolver.article_token(url), *signature)
+            async with throttle.slot(url_resolver.BATCHEXECUTE_URL):
+                batch = await limited_request('POST', url_resolver.BATCHEXECUTE_URL, data=form,
+                                              headers=dict(news_app.ARTICLE_HEADERS, **url_resolver.BATCHEXECUTE_HEADERS))
+            batch.raise_for_status()
+            target = url_resolver.parse_batchexecute_response(batch.text)
+            if target:
+                return await run_io(resolver.record, url, target, url_resolver.BATCHEXECUTE)
+        except Exception as e:
+            print(f"구글 뉴스 링크 해석 오류 ({url}): {e}")
+
+    return await run_io(resolver.record, url, url, url_resolver.UNRESOLVED, html)
+
+
+async def extract_news_content(url, throttle):
+    """app.extract_news_content의 비동기 버전 (같은 본문 캐시 사용)"""
+    original_url = url
+    is_redirect = 'news.google.com/rss/articles' in url
+    cached = await run_io(content_cache.lookup, url, not is_redirect)
+    if cached is not None:
+        tracing.count('content_cache', result='hit')
+        return cached
+
+    started = time.monotonic()
+    try:
+        html = None
+        if is_redirect:
+            with tracing.stage('resolve'):
+                resolution = await resolve_link(url, throttle)
+            tracing.count('url_resolution', method=resolution.method)
+            url = resolution.url
+            html = resolution.html
+            cached = await run_io(content_cache.lookup, url)
+            if cached is not None:
+                tracing.count('content_cache', result='hit')
+                await run_io(content_cache.add_alias, original_url, url)
+                return cached
+
+        tracing.count('content_cache', result='miss')
+
+        if html is None:
+            async with throttle.slot(url):
+                content = await download_article_text(url)
+        else:
+            with tracing.stage('parse'):
+                content = await run_io(news_app.extract_text_from_html, html)
+        await run_io(lambda: content_cache.store(url, content, cost=time.monotonic() - started,
+                                                 aliases=(original_url,)))
+        return content
+    except host_limiter.CircuitOpenError as e:
+        print(f"본문 추출 건너뜀 ({url}): {e}")  # 일시 중단일 뿐이므로 실패로 캐시하지 않음
+        tracing.count('article_failures', reason='circuit_open')
+        return ""
+    except Exception as e:
+        print(f"본문 추출 오류 ({url}): {e}")
+        tracing.count('article_failures', reason=type(e).__name__)
+        await run_io(lambda: content_cache.store(url, "", ok=False, aliases=(original_url,)))
+        return ""
+
+
+async def download_article_text(url):
+    """app.download_article_text의 비동기 버전 - 조각 단위로 읽다가 한도/본문 충분 시 중단
+
+    파싱은 기사마다 정한 단일 스레드 실행기에서 조각이 올 때마다 실행 (이벤트 루프를 막지 않음)
+    """
+    started = time.monotonic()
+    parser = None
+    lane = _parse_lanes[next(_parse_turn) % len(_parse_lanes)]
+    loop = asyncio.get_running_loop()
+
+    def on_lane(func, *args):
+        return loop.run_in_executor(lane, tracing.in_context(func), *args)
+
+    response = await limited_request('GET', url, headers=news_app.ARTICLE_HEADERS, stream=True,
+                                     follow_redirects=True)
+    try:
+        response.raise_for_status()
+        content_type = response.headers.get('Content-Type', '')
+        if not extractors.is_html_content_type(content_type):
+            extractors.count_stream('skipped_content_type')
+            raise ValueError(f"HTML이 아닌 응답 ({content_type})")
+        parser = await on_lane(extractors.StreamingExtractor, content_type)
+        async for chunk in response.aiter_bytes(news_app.ARTICLE_CHUNK_SIZE):
+            if await on_lane(parser.feed, chunk):
+                break
+        content = await on_lane(parser.close)
+    finally:
+        await response.aclose()
+        news_app.record_download(started, parser)
+    return news_app.tidy_article_text(content)
+
+
+async def fetch_news_contents(news_items, deadline=news_app.FETCH_DEADLINE):
+    """모든 기사 본문을 동시에 받아 'content'에 채움 (제한 시간을 넘긴 기사는 본문 없음)"""
+    if not news_items:
+        return news_items
+    throttle = AsyncDomainThrottle()
+    tasks = {asyncio.ensure_future(extract_news_content(item['link'], throttle)): item for item in news_items}
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+    if pending:
+        print(f"본문 수집 제한 시간 초과: {len(pending)}개 기사 본문 생략")
+    for task in done:
+        if not task.cancelled() and task.exception() is None:
+            tasks[task]['content'] = task.result() or ''
+    return news_items
+
+
+async def discover_news(keyword, num_results=10, hl='ko', gl='KR'):
+    """RSS 피드를 비동기로 받아 파싱. 결과가 없으면 기존 웹 스크래핑 방식을 스레드에서 실행"""
+    news_items = []
+    try:
+        parser = rss_feed.FeedParser(limit=num_results)
+        url = rss_feed.search_feed_url(keyword, hl=hl, gl=gl)
+        rss_started = time.monotonic()
+        response = await limited_request('GET', url, headers=rss_feed.FEED_HEADERS, stream=True)
+        try:
+            if response.status_code == 200:
+                async for chunk in response.aiter_bytes():
+                    news_items.extend(entry.to_news_item() for entry in parser.feed(chunk))
+                    if parser.done:
+                        break
+        finally:
+            await response.aclose()
+            tracing.record_stage('discover_rss', time.monotonic() - rss_started)
+    except Exception as e:
+        print(f"RSS 피드 오류: {e}")
+    if news_items:
+        tracing.count('discover', source='rss')
+        return news_items[:num_results]
+    return await run_io(lambda: news_app.discover_news(keyword, num_results=num_results, hl=hl, gl=gl,
+                                                        use_rss=False))
+
+
+async def run_search_pipeline(keyword, num_results=10, hl='ko', gl='KR'):
+    """app.run_search_pipeline의 비동기 버전"""
+    with tracing.stage('discover'):
+        news_items = await discover_news(keyword, num_results=num_results, hl=hl, gl=gl)
+    if not news_items:
+        return None
+    with tracing.stage('cluster'):
+        news_items = story_clusters.cluster_by_title(news_items, keyword)
+    with tracing.stage('fetch'):
+        await fetch_news_contents(news_items)
+    with tracing.stage('cluster'):
+        news_items = story_clusters.merge_by_body(news_items)
+    summary = await run_gemini(news_app.summarize_news, news_items, keyword)
+    await run_io(news_app.save_history, keyword, news_items, summary)
+    return {"news": news_items, "summary": summary}
+
+
+def _start_search(key, keyword, num_results, hl, gl):
+    async def compute():
+        try:
+            value = await run_search_pipeline(keyword, num_results=num_results, hl=hl, gl=gl)
+            result_cache.put(key, value)
+            return value
+        finally:
+            _inflight.pop(key, None)
+
+    task = asyncio.ensure_future(compute())
+    _inflight[key] = task
+    return task
+
+
+def _log_refresh_error(task):
+    if not task.cancelled() and task.exception() is not None:
+        print(f"검색 결과 캐시 갱신 오류: {task.exception()}")
+
+
+async def cached_search(keyword, num_results=10, hl='ko', gl='KR'):
+    """결과 캐시(stale-while-revalidate) + 동일 검색 합치기. (결과, 캐시 상태) 반환"""
+    key = result_cache.make_key(keyword, hl=hl, gl=gl, num_results=num_results)
+    value, status = result_cache.peek(key)
+    if value is not None:
+        if status == result_cache.STALE and key not in _inflight:
+            _start_search(key, keyword, num_results, hl, gl).add_done_callback(_log_refresh_error)
+        result_cache.note(status)
+        tracing.count('result_cache', status=status)
+        return value, status
+
+    task = _inflight.get(key)
+    status = result_cache.SHARED if task is not None else result_cache.MISS
+    if task is None:
+        task = _start_search(key, keyword, num_results, hl, gl)
+    result_cache.note(status)
+    tracing.count('result_cache', status=status)
+    return await asyncio.shield(task), status
+
+
+def request_session_id(scope):
+    """요청의 대화 세션 ID (X-Session-Id 헤더 또는 쿠키). 없거나 형식이 틀리면 None"""
+    headers = dict(scope.get('headers') or [])
+    session_id = headers.get(chat_sessions.SESSION_HEADER.lower().encode(), b'').decode('latin-1')
+    if not session_id:
+        cookie = SimpleCookie(headers.get(b'cookie', b'').decode('latin-1'))
+        morsel = cookie.get(chat_sessions.SESSION_COOKIE)
+        session_id = morsel.value if morsel else ''
+    return session_id if chat_sessions.valid_session_id(session_id) else None
+
+
+def session_cookie_header(session_id):
+    value = (f"{chat_sessions.SESSION_COOKIE}={session_id}; Max-Age={int(chat_sessions.CHAT_SESSION_TTL)}; "
+             f"Path=/; HttpOnly; SameSite=Lax")
+    return (b'set-cookie', value.encode('latin-1'))
+
+
+async def read_json(receive):
+    body = b''
+    more = True
+    while more:
+        message = await receive()
+        body += message.get('body', b'')
+        more = message.get('more_body', False)
+    try:
+        data = json.loads(body or b'{}')
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def request_header(scope, name):
+    return dict(scope.get('headers') or []).get(name.lower().encode(), b'').decode('latin-1')
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match 목록에 etag가 있는지 (약한 비교: W/ 접두사 무시, *는 모두 일치)"""
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag == '*':
+            return True
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag.strip('"') == etag:
+            return True
+    return False
+
+
+async def send_json(send, status, payload, headers=(), accept_encoding=None):
+    """JSON 응답 전송 (accept_encoding이 주어지면 brotli/gzip 압축). payload가 None이면 본문 없이 전송(304)"""
+    headers = list(headers)
+    tracer = tracing.current()
+    if tracer is not None and tracer.header:
+        headers.append((b'server-timing', tracer.server_timing().encode('latin-1')))
+    if payload is None:
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    if accept_encoding is not None:
+        body, encoding = http_compression.encode_body(body, 'application/json', accept_encoding)
+        headers.append((b'vary', b'Accept-Encoding'))
+        if encoding:
+            headers.append((b'content-encoding', encoding.encode()))
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json; charset=utf-8'),
+                    (b'content-length', str(len(body)).encode())] + headers,
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def handle_search(scope, receive, send):
+    try:
+        data = await read_json(receive)
+        keyword = data.get('keyword') or ''
+        hl = data.get('hl') or 'ko'
+        gl = data.get('gl') or 'KR'
+
+        if not isinstance(keyword, str):
+            return await send_json(send, 400, {'error': '키워드는 문자열이어야 합니다.'})
+        keyword = keyword.strip()
+        if not keyword:
+            return await send_json(send, 400, {'error': '키워드를 입력해주세요.'})
+        if not isinstance(hl, str) or not isinstance(gl, str):
+            return await send_json(send, 400, {'error': 'hl, gl은 문자열이어야 합니다.'})
+        try:
+            fields, lite = news_app.response_options(data)
+        except ValueError as e:
+            return await send_json(send, 400, {'error': str(e)})
+
+        result, cache_status = await cached_search(keyword, num_results=10, hl=hl, gl=gl)
+        if not result:
+            return await send_json(send, 404, {
+                'error': '뉴스를 찾을 수 없습니다. 다른 키워드로 시도해보세요.',
+                'news': [],
+                'summary': ''
+            })
+
+        # 이 세션의 대화 컨텍스트 갱신
+        session_id = request_session_id(scope) or chat_sessions.new_session_id()
+        await run_io(chat_sessions.save, session_id, keyword, result['news'], result['summary'])
+
+        shaped = news_app.select_news_fields(result['news'], fields, lite)
+        etag = news_app.result_etag(keyword, result['summary'], shaped, session_id)
+        headers = [(b'etag', f'W/"{etag}"'.encode()), (b'cache-control', b'private, no-cache'),
+                   (b'x-cache', cache_status.encode()), session_cookie_header(session_id)]
+        if etag_matches(request_header(scope, 'if-none-match'), etag):
+            tracing.count('not_modified', endpoint='search')
+            return await send_json(send, 304, None, headers=headers)
+        await send_json(send, 200, {
+            'success': True,
+            'keyword': keyword,
+            'news': shaped,
+            'summary': result['summary'],
+            'count': len(result['news']),
+            'session_id': session_id
+        }, headers=headers, accept_encoding=request_header(scope, 'accept-encoding'))
+    except Exception as e:
+        await send_json(send, 500, {'error': f'오류가 발생했습니다: {str(e)}'})
+
+
+async def handle_chat(scope, receive, send):
+    try:
+        data = await read_json(receive)
+        question = (data.get('question') or '').strip()
+
+        if not question:
+            return await send_json(send, 400, {'error': '질문을 입력해주세요.'})
+
+        session = await run_io(chat_sessions.load, request_session_id(scope))
+        if session is None or not session.news:
+            return await send_json(send, 400, {'error': '먼저 키워드를 검색해서 뉴스를 불러와 주세요.'})
+
+        with tracing.stage('chat'):
+            answer = await run_gemini(lambda: news_app.answer_news_question(question, session.news, session.keyword,
+                                                                            index=session.index))
+        await send_json(send, 200, {"success": True, "answer": answer},
+                        accept_encoding=request_header(scope, 'accept-encoding'))
+    except Exception as e:
+        await send_json(send, 500, {'error': f'대화 처리 중 오류가 발생했습니다: {str(e)}'})
+
+
+ROUTES = {
+    ('POST', '/search'): handle_search,
+    ('POST', '/chat'): handle_chat,
+}
+
+_flask_asgi = WsgiToAsgi(news_app.app) if WsgiToAsgi else None
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await close_client()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI 진입점"""
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+
+    handler = ROUTES.get((scope['method'], scope['path']))
+    if handler is not None:
+        with tracing.trace(scope['path']) as tracer:
+            headers = dict(scope.get('headers') or [])
+            tracer.header = tracing.wants_header(
+                headers.get(tracing.TRACE_REQUEST_HEADER.lower().encode(), b'').decode('latin-1'))
+            return await handler(scope, receive, send)
+    if _flask_asgi is not None:
+        return await _flask_asgi(scope, receive, send)
+    await send_json(send, 404, {'error': 'Not Found'})
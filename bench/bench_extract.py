@@ -0,0 +1,81 @@
+"""본문 추출기 벤치마크 - 저장된 HTML 픽스처로 lxml / bs4 추출 속도와 결과 일치 여부 비교
+
+사용법:
+    python bench/bench_extract.py                 # 기본 20회 반복
+    python bench/bench_extract.py -n 50 --json out.json
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import extractors  # noqa: E402
+
+FIXTURE_DIR = os.path.join(ROOT, 'bench', 'fixtures', 'articles')
+
+
+def measure(func, html, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(html)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return result, {
+        'mean_ms': round(sum(timings) / len(timings) * 1000, 3),
+        'p50_ms': round(timings[len(timings) // 2] * 1000, 3),
+        'min_ms': round(timings[0] * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', '--repeat', type=int, default=20, help='픽스처당 반복 횟수')
+    parser.add_argument('--fixtures', default=FIXTURE_DIR, help='HTML 픽스처 디렉터리')
+    parser.add_argument('--json', help='결과를 저장할 JSON 파일 경로')
+    args = parser.parse_args()
+
+    backends = sorted(extractors.BACKENDS)
+    paths = sorted(glob.glob(os.path.join(args.fixtures, '*.html')))
+    if not paths:
+        print(f"픽스처가 없습니다: {args.fixtures}")
+        return 1
+
+    report = {'backends': backends, 'repeat': args.repeat, 'fixtures': []}
+    totals = {name: 0.0 for name in backends}
+
+    print(f"{'fixture':<28}{'KB':>8}" + ''.join(f"{name + ' ms':>12}" for name in backends) + '  same')
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            html = f.read()
+        row = {'fixture': os.path.basename(path), 'bytes': len(html.encode('utf-8')), 'results': {}}
+        outputs = {}
+        for name in backends:
+            outputs[name], row['results'][name] = measure(extractors.BACKENDS[name], html, args.repeat)
+            totals[name] += row['results'][name]['mean_ms']
+        row['same_output'] = len(set(outputs.values())) == 1
+        report['fixtures'].append(row)
+        print(f"{row['fixture']:<28}{row['bytes'] / 1024:>8.1f}"
+              + ''.join(f"{row['results'][name]['mean_ms']:>12.2f}" for name in backends)
+              + f"  {'yes' if row['same_output'] else 'NO'}")
+
+    report['total_mean_ms'] = {name: round(value, 3) for name, value in totals.items()}
+    print(f"{'total':<36}" + ''.join(f"{totals[name]:>12.2f}" for name in backends))
+    if 'lxml' in totals and totals['lxml']:
+        report['speedup'] = round(totals['bs4'] / totals['lxml'], 2)
+        print(f"lxml 속도 향상: {report['speedup']}x")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0 if all(row['same_output'] for row in report['fixtures']) else 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,302 @@
+"""오프라인 파이프라인 벤치마크 - 구글/언론사/Gemini 없이 녹화 픽스처와 가짜 모델로 성능 측정
+
+- 부하: 동시 요청 수별 /search, /chat 처리량과 p50/p95/p99 지연 시간 (Flask 또는 ASGI 앱을 프로세스 안에서 호출)
+- 마이크로: extract_news_content(기사 한 건), RSS 파싱, save_history
+결과를 JSON으로 저장해 두고 --compare로 이전 버전 결과와 비교할 수 있습니다.
+
+사용법:
+    python bench/bench_pipeline.py --json before.json
+    python bench/bench_pipeline.py -c 1 8 32 -n 64 --gemini-latency 0.5 --compare before.json
+    python bench/bench_pipeline.py --server asgi --cold     # ASGI 앱, 모든 캐시 끔
+    python bench/bench_pipeline.py --no-rss                 # RSS 실패 → 웹 검색 대체 경로 측정
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def ms(value):
+    return round(value * 1000, 2) if value is not None else None
+
+
+def summarize(latencies, elapsed=None):
+    row = {
+        'count': len(latencies),
+        'mean_ms': ms(sum(latencies) / len(latencies)) if latencies else None,
+        'p50_ms': ms(percentile(latencies, 50)),
+        'p95_ms': ms(percentile(latencies, 95)),
+        'p99_ms': ms(percentile(latencies, 99)),
+    }
+    if elapsed is not None:
+        row['elapsed_s'] = round(elapsed, 3)
+        row['throughput_rps'] = round(len(latencies) / elapsed, 2) if elapsed else None
+    return row
+
+
+def configure_environment(args, workdir):
+    """앱 모듈을 불러오기 전에 캐시 파일을 임시 디렉터리로 돌리고 외부 의존을 끔"""
+    os.environ.update({
+        'CONTENT_CACHE_PATH': os.path.join(workdir, 'content_cache.sqlite3'),
+        'SUMMARY_CACHE_PATH': os.path.join(workdir, 'summary_cache.sqlite3'),
+        'URL_RESOLVER_CACHE_PATH': os.path.join(workdir, 'url_resolution.sqlite3'),
+        'CHAT_SESSION_PATH': os.path.join(workdir, 'chat_sessions.sqlite3'),
+        'HISTORY_DB_PATH': os.path.join(workdir, 'history.db'),
+        'HOST_RATE': '100000',
+        'HOST_BURST': '100000',
+        'PREFETCH_ENABLED': '0',
+        'GEMINI_API_KEY': '',
+    })
+    if args.cold:
+        os.environ.update({'CONTENT_CACHE_ENABLED': '0', 'SUMMARY_CACHE_ENABLED': '0', 'RESULT_CACHE_ENABLED': '0'})
+
+
+class FlaskDriver:
+    """스레드마다 Flask 테스트 클라이언트 하나 (쿠키로 대화 세션 유지)"""
+
+    def __init__(self, news_app):
+        self.news_app = news_app
+        self._local = threading.local()
+
+    def _client(self):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.news_app.app.test_client()
+        return client
+
+    def post(self, path, payload):
+        response = self._client().post(path, json=payload)
+        return response.status_code, response.headers.get('X-Cache', '-')
+
+
+class AsgiDriver:
+    """스레드마다 이벤트 루프 + httpx ASGITransport 클라이언트 하나"""
+
+    def __init__(self, asgi_app):
+        import httpx
+        self.httpx = httpx
+        self.asgi_app = asgi_app
+        self._local = threading.local()
+
+    def post(self, path, payload):
+        import asyncio
+        state = self._local
+        if getattr(state, 'loop', None) is None:
+            state.loop = asyncio.new_event_loop()
+            state.client = self.httpx.AsyncClient(transport=self.httpx.ASGITransport(app=self.asgi_app),
+                                                  base_url='http://bench', timeout=300)
+        response = state.loop.run_until_complete(state.client.post(path, json=payload))
+        return response.status_code, response.headers.get('X-Cache', '-')
+
+
+def run_level(driver, concurrency, total, make_request, prepare=None):
+    """동시 요청 수 concurrency로 total개 요청. make_request(i) -> (경로, JSON), prepare는 스레드마다 측정 전 한 번"""
+    latencies, statuses, cache = [], {}, {}
+    lock = threading.Lock()
+    counter = iter(range(total))
+    ready = threading.Barrier(concurrency + 1)
+
+    def worker():
+        if prepare is not None:
+            prepare()
+        ready.wait()
+        while True:
+            with lock:
+                index = next(counter, None)
+            if index is None:
+                return
+            path, payload = make_request(index)
+            started = time.perf_counter()
+            try:
+                status, cache_status = driver.post(path, payload)
+                status = str(status)
+            except Exception as e:
+                status, cache_status = type(e).__name__, '-'
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                statuses[status] = statuses.get(status, 0) + 1
+                cache[cache_status] = cache.get(cache_status, 0) + 1
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    row = dict(summarize(latencies, time.perf_counter() - started), concurrency=concurrency)
+    row['statuses'] = statuses
+    row['x_cache'] = cache
+    return row
+
+
+def load_benchmarks(args, driver):
+    report = {'search': [], 'chat': []}
+    print(f"{'endpoint':<10}{'conc':>6}{'reqs':>7}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  status")
+    for concurrency in args.concurrency:
+        # 단계마다 새 키워드 (repeat-keywords면 같은 키워드 몇 개를 돌려 써서 결과 캐시 적중 측정)
+        def search_request(i, level=concurrency):
+            number = i % args.repeat_keywords if args.repeat_keywords else i
+            return '/search', {'keyword': f"벤치마크 {level}-{number}"}
+        report['search'].append(run_level(driver, concurrency, args.requests, search_request))
+
+        # 대화는 스레드마다 먼저 검색해 둔 세션으로 질문 (준비 검색은 측정에서 제외)
+        def chat_request(i):
+            return '/chat', {'question': ['요약해줘', '왜 이런 일이 생겼어?', '전망은 어때?'][i % 3]}
+
+        def open_session(level=concurrency):
+            driver.post('/search', {'keyword': f"벤치마크 {level}-0"})
+        report['chat'].append(run_level(driver, concurrency, args.requests, chat_request, prepare=open_session))
+
+        for name in ('search', 'chat'):
+            row = report[name][-1]
+            print(f"{'/' + name:<10}{concurrency:>6}{row['count']:>7}{row['throughput_rps']:>9}"
+                  f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}  {row['statuses']}")
+    return report
+
+
+def time_calls(func, repeat):
+    latencies = []
+    started = time.perf_counter()
+    for i in range(repeat):
+        call_started = time.perf_counter()
+        func(i)
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def micro_benchmarks(args, news_app, router):
+    import rss_feed
+
+    feed = router.feed.replace('__KEYWORD__', '벤치마크').encode('utf-8')
+    news_items = news_app.search_google_news('마이크로 벤치마크')
+    summary = news_app.simple_summarize(news_items, '마이크로 벤치마크')
+
+    def extract(i):
+        # 매번 다른 URL이라 본문 캐시에 적중하지 않음 (다운로드 → 파싱 → 캐시 저장 전체)
+        news_app.extract_news_content(f"https://micro.bench.example/article/{i}")
+
+    def parse_rss(i):
+        chunks = (feed[j:j + 8192] for j in range(0, len(feed), 8192))
+        list(rss_feed.parse_feed(chunks, limit=10))
+
+    def save(i):
+        news_app.save_history(f"마이크로 {i}", news_items, summary)
+
+    results = {}
+    print(f"{'micro':<22}{'calls':>7}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, func in (('extract_news_content', extract), ('rss_parse', parse_rss), ('save_history', save)):
+        row = time_calls(func, args.micro_repeat)
+        results[name] = row
+        print(f"{name:<22}{row['count']:>7}{row['mean_ms']:>10}{row['p50_ms']:>10}{row['p99_ms']:>10}")
+    return results
+
+
+def git_version():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _change(old, new, lower_is_better=True):
+    if old in (None, 0) or new is None:
+        return ''
+    pct = (new - old) / old * 100
+    worse = pct > 0 if lower_is_better else pct < 0
+    return f"{pct:+.1f}%" + (' (나빠짐)' if worse and abs(pct) >= 10 else '')
+
+
+def compare(baseline, report):
+    """이전 결과 대비 변화율 출력 (10% 넘게 나빠진 항목 표시)"""
+    print(f"\n비교 기준: {baseline.get('version') or '?'} → {report.get('version') or '?'}")
+    for name in ('search', 'chat'):
+        old_levels = {row['concurrency']: row for row in baseline.get('load', {}).get(name, [])}
+        for row in report['load'][name]:
+            old = old_levels.get(row['concurrency'])
+            if old:
+                print(f"/{name:<9} c={row['concurrency']:<4} rps {_change(old['throughput_rps'], row['throughput_rps'], False):<18}"
+                      f"p50 {_change(old['p50_ms'], row['p50_ms']):<18}p99 {_change(old['p99_ms'], row['p99_ms'])}")
+    for name, row in report['micro'].items():
+        old = baseline.get('micro', {}).get(name)
+        if old:
+            print(f"{name:<22} mean {_change(old['mean_ms'], row['mean_ms']):<18}p99 {_change(old['p99_ms'], row['p99_ms'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--server', choices=['flask', 'asgi'], default='flask', help='측정할 앱')
+    parser.add_argument('-c', '--concurrency', type=int, nargs='+', default=[1, 8, 32], help='동시 요청 수 단계')
+    parser.add_argument('-n', '--requests', type=int, default=32, help='단계별 요청 수')
+    parser.add_argument('--repeat-keywords', type=int, default=0,
+                        help='이 개수의 키워드만 돌려 사용 (0이면 요청마다 새 키워드)')
+    parser.add_argument('--micro-repeat', type=int, default=50, help='마이크로 벤치마크 반복 횟수')
+    parser.add_argument('--network-latency', type=float, default=0.02, help='가짜 HTTP 응답 지연(초)')
+    parser.add_argument('--gemini-latency', type=float, default=0.8, help='가짜 Gemini 응답 지연(초)')
+    parser.add_argument('--no-rss', action='store_true', help='RSS를 실패시켜 웹 검색 대체 경로 측정')
+    parser.add_argument('--cold', action='store_true', help='본문/요약/결과 캐시를 모두 끄고 측정')
+    parser.add_argument('--skip-load', action='store_true', help='부하 측정 생략 (마이크로만)')
+    parser.add_argument('--json', help='결과를 저장할 JSON 파일 경로')
+    parser.add_argument('--compare', help='비교할 이전 결과 JSON 파일 경로')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='news-bench-')
+    configure_environment(args, workdir)
+
+    from offline_fixtures import FakeGeminiModel, FixtureRouter, install_requests, mock_transport
+    import http_client
+    import app as news_app
+
+    router = FixtureRouter(latency=args.network_latency, rss=not args.no_rss)
+    install_requests(router, http_client.get_session())
+    model = FakeGeminiModel(latency=args.gemini_latency)
+    news_app.GEMINI_API_KEY = 'offline-benchmark'
+    news_app._gemini_model = model
+
+    if args.server == 'asgi':
+        import httpx
+        import asgi
+        asgi._client = httpx.AsyncClient(transport=mock_transport(router))
+        driver = AsgiDriver(asgi.app)
+    else:
+        driver = FlaskDriver(news_app)
+
+    report = {
+        'version': git_version(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'config': {k: v for k, v in vars(args).items() if k not in ('json', 'compare')},
+        'python': sys.version.split()[0],
+    }
+    report['load'] = {'search': [], 'chat': []} if args.skip_load else load_benchmarks(args, driver)
+    print()
+    report['micro'] = micro_benchmarks(args, news_app, router)
+    report['fake_calls'] = {'http': router.requests, 'gemini': model.calls}
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(json.load(f), report)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""콜드 스타트 벤치마크 - 새 파이썬 프로세스에서 `import app`과 첫 요청까지 걸리는 시간 측정
+
+- 프로세스마다 `python -X importtime`으로 실행해 최상위 패키지별 import 시간(자기 시간 합)을 집계
+- import 시간, 첫 `/` 요청 시간, 첫 Gemini 모델 준비 시간(지연 초기화로 미룬 비용), 프로세스 전체 시간
+- LAZY_INIT=1(기본, 지연 초기화)과 LAZY_INIT=0(시작 시 미리 준비)을 번갈아 측정해 비교
+
+사용법:
+    python bench/bench_startup.py                  # 모드별 5회
+    python bench/bench_startup.py -n 10 --top 15 --json startup.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {'lazy': '1', 'eager': '0'}
+IMPORT_DONE = '--- import app done ---'   # 이 줄 이후의 import(첫 요청/Gemini 준비)는 집계에서 제외
+
+# 자식 프로세스에서 실행: 단계별 시간을 마지막 줄에 JSON으로 출력
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+sys.stderr.write('""" + IMPORT_DONE + """\\n')
+response = app.app.test_client().get('/')
+first_request = time.perf_counter()
+app.get_gemini_model()
+gemini = time.perf_counter()
+print(json.dumps({'status': response.status_code,
+                  'import_ms': (imported - started) * 1000,
+                  'first_request_ms': (first_request - imported) * 1000,
+                  'gemini_init_ms': (gemini - first_request) * 1000}))
+"""
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def parse_importtime(stderr):
+    """-X importtime 출력 → {최상위 패키지: 자기 시간 합(ms)} (`import app`까지만)"""
+    packages = {}
+    for line in stderr.splitlines():
+        if line == IMPORT_DONE:
+            break
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, _, name = line[len('import time:'):].split('|')
+            top = name.strip().split('.')[0]
+            packages[top] = packages.get(top, 0.0) + int(self_us) / 1000
+        except ValueError:
+            continue
+    return packages
+
+
+def run_once(mode, workdir):
+    env = dict(os.environ, **{
+        'LAZY_INIT': MODES[mode],
+        'PREFETCH_ENABLED': '0',
+        'GEMINI_API_KEY': os.environ.get('GEMINI_API_KEY') or 'startup-benchmark',  # 모델 생성만 하고 호출은 안 함
+        'CONTENT_CACHE_PATH': os.path.join(workdir, 'content_cache.sqlite3'),
+        'SUMMARY_CACHE_PATH': os.path.join(workdir, 'summary_cache.sqlite3'),
+        'URL_RESOLVER_CACHE_PATH': os.path.join(workdir, 'url_resolution.sqlite3'),
+        'CHAT_SESSION_PATH': os.path.join(workdir, 'chat_sessions.sqlite3'),
+        'HISTORY_DB_PATH': os.path.join(workdir, 'history.db'),
+        'PYTHONWARNINGS': 'ignore',
+    })
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', PROBE], cwd=ROOT, env=env,
+                          capture_output=True, text=True, timeout=120)
+    wall_ms = (time.perf_counter() - started) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"{mode} 측정 실패:\n{proc.stderr[-2000:]}")
+    row = json.loads(proc.stdout.strip().splitlines()[-1])
+    row['process_ms'] = wall_ms
+    return row, parse_importtime(proc.stderr)
+
+
+def summarize(rows, packages, top):
+    summary = {}
+    for key in ('import_ms', 'first_request_ms', 'gemini_init_ms', 'process_ms'):
+        values = [row[key] for row in rows]
+        summary[key] = {'mean': round(sum(values) / len(values), 1), 'p50': round(percentile(values, 50), 1),
+                        'max': round(max(values), 1)}
+    totals = {}
+    for entry in packages:
+        for name, value in entry.items():
+            totals[name] = totals.get(name, 0.0) + value / len(packages)
+    ranked = sorted(totals.items(), key=lambda item: -item[1])[:top]
+    summary['top_packages_ms'] = {name: round(value, 1) for name, value in ranked}
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', '--repeat', type=int, default=5, help='모드별 측정 횟수 (매번 새 프로세스)')
+    parser.add_argument('--mode', choices=['both', *MODES], default='both', help='측정할 초기화 모드')
+    parser.add_argument('--top', type=int, default=10, help='출력할 import 시간 상위 패키지 수')
+    parser.add_argument('--json', help='결과를 저장할 JSON 파일 경로')
+    args = parser.parse_args()
+
+    modes = list(MODES) if args.mode == 'both' else [args.mode]
+    results = {mode: ([], []) for mode in modes}
+    workdir = tempfile.mkdtemp(prefix='news-startup-')
+    for _ in range(args.repeat):
+        for mode in modes:  # 번갈아 실행해 디스크 캐시 등의 영향을 고르게
+            row, packages = run_once(mode, workdir)
+            results[mode][0].append(row)
+            results[mode][1].append(packages)
+
+    report = {'python': sys.version.split()[0], 'repeat': args.repeat, 'modes': {}}
+    print(f"{'모드':<8}{'import':>12}{'첫 요청':>12}{'Gemini 준비':>14}{'프로세스':>12}   (평균 ms)")
+    for mode in modes:
+        summary = report['modes'][mode] = summarize(*results[mode], args.top)
+        print(f"{mode:<8}{summary['import_ms']['mean']:>12}{summary['first_request_ms']['mean']:>12}"
+              f"{summary['gemini_init_ms']['mean']:>14}{summary['process_ms']['mean']:>12}")
+    for mode in modes:
+        print(f"\n[{mode}] import 시간 상위 패키지 (자기 시간 합, ms)")
+        for name, value in report['modes'][mode]['top_packages_ms'].items():
+            print(f"  {name:<28}{value:>10}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
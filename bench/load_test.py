@@ -0,0 +1,119 @@
+"""부하 테스트 - 동시 요청 수별 /search 지연 시간(p50/p95/p99)과 처리량 측정
+
+Flask(WSGI) 서버와 ASGI 서버에 같은 부하를 걸어 비교할 때 사용합니다.
+같은 키워드만 반복하면 결과 캐시 적중만 측정되므로 기본값은 요청마다 다른 키워드를 씁니다.
+
+사용법:
+    python bench/load_test.py --url http://127.0.0.1:8000 -c 1 10 50 -n 100
+    python bench/load_test.py --url http://127.0.0.1:5000 --keywords 반도체 환율 --json out.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+
+import httpx
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+async def run_level(client, url, keywords, concurrency, total):
+    """동시 요청 수 concurrency로 total개 요청을 보내고 결과 집계"""
+    keyword_iter = itertools.cycle(keywords)
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(next(keyword_iter))
+
+    latencies = []
+    statuses = {}
+    cache = {}
+
+    async def worker():
+        while True:
+            try:
+                keyword = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            started = time.perf_counter()
+            try:
+                response = await client.post(url, json={'keyword': keyword})
+                status = str(response.status_code)
+                cache_status = response.headers.get('X-Cache', '-')
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+                cache_status = '-'
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+            cache[cache_status] = cache.get(cache_status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    def ms(value):
+        return round(value * 1000, 1) if value is not None else None
+
+    return {
+        'concurrency': concurrency,
+        'requests': total,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(total / elapsed, 2) if elapsed else None,
+        'p50_ms': ms(percentile(latencies, 50)),
+        'p95_ms': ms(percentile(latencies, 95)),
+        'p99_ms': ms(percentile(latencies, 99)),
+        'statuses': statuses,
+        'x_cache': cache,
+    }
+
+
+async def run(args):
+    url = args.url.rstrip('/') + '/search'
+    if args.keywords:
+        keywords = args.keywords
+    else:
+        keywords = [f"{args.prefix} {i}" for i in range(args.requests * len(args.concurrency))]
+        keywords = keywords or [args.prefix]
+
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    report = {'url': url, 'levels': []}
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        print(f"{'conc':>6}{'reqs':>7}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  status")
+        offset = 0
+        for concurrency in args.concurrency:
+            level_keywords = keywords if args.keywords else keywords[offset:offset + args.requests]
+            offset += args.requests
+            row = await run_level(client, url, level_keywords, concurrency, args.requests)
+            report['levels'].append(row)
+            print(f"{row['concurrency']:>6}{row['requests']:>7}{row['throughput_rps']:>9}"
+                  f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}  {row['statuses']}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help='서버 주소')
+    parser.add_argument('-c', '--concurrency', type=int, nargs='+', default=[1, 10, 50], help='동시 요청 수 단계')
+    parser.add_argument('-n', '--requests', type=int, default=50, help='단계별 요청 수')
+    parser.add_argument('--keywords', nargs='+', help='사용할 키워드 (지정하면 순환 사용)')
+    parser.add_argument('--prefix', default='부하테스트', help='키워드 미지정 시 생성할 키워드 접두어')
+    parser.add_argument('--timeout', type=float, default=120, help='요청 제한 시간(초)')
+    parser.add_argument('--json', help='결과를 저장할 JSON 파일 경로')
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""오프라인 벤치마크용 가짜 네트워크/Gemini - 저장된 RSS/검색 페이지/기사 HTML을 URL별로 돌려줌
+
+- FixtureRouter: URL → (상태 코드, 헤더, 본문). 구글 뉴스 RSS/웹 검색/구글 뉴스 탭 검색은
+  bench/fixtures의 녹화본에서 __KEYWORD__를 검색어로 바꿔 돌려주고, 그 밖의 URL은 기사 HTML 중 하나를 돌려줌
+- FixtureAdapter: requests(http_client 공유 Session)에 끼우는 전송 어댑터
+- mock_transport(): ASGI 모드 httpx 클라이언트용 전송 계층
+- FakeGeminiModel: 지연 시간을 정할 수 있는 genai.GenerativeModel 대역 (스트리밍 포함)
+"""
+import asyncio
+import glob
+import io
+import os
+import re
+import time
+import zlib
+from html import escape
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+HTML = 'text/html; charset=utf-8'
+XML = 'application/xml; charset=utf-8'
+
+
+def _read(*parts):
+    with open(os.path.join(FIXTURE_DIR, *parts), encoding='utf-8') as f:
+        return f.read()
+
+
+class FixtureRouter:
+    """URL별 녹화 응답. latency는 응답마다 더하는 가짜 네트워크 지연(초)"""
+
+    def __init__(self, latency=0.0, rss=True):
+        self.latency = latency
+        self.rss = rss   # False면 RSS 요청을 503으로 돌려 웹 검색 대체 경로를 측정
+        self.feed = _read('feeds', 'search.xml')
+        self.news_search = _read('search', 'news_google.html')
+        self.google_search = _read('search', 'google_nws.html')
+        self.articles = [open(path, 'rb').read()
+                         for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, 'articles', '*.html')))]
+        self.requests = 0
+
+    def respond(self, method, url):
+        """(상태 코드, 헤더 dict, 본문 bytes)"""
+        self.requests += 1
+        parts = urlsplit(url)
+        keyword = (parse_qs(parts.query).get('q') or [''])[0]
+        if parts.netloc == 'news.google.com' and parts.path == '/rss/search':
+            if not self.rss:
+                return 503, {'Content-Type': HTML}, b''
+            return 200, {'Content-Type': XML}, self.feed.replace('__KEYWORD__', escape(keyword)).encode('utf-8')
+        if parts.netloc == 'news.google.com' and parts.path == '/search':
+            return 200, {'Content-Type': HTML}, self.news_search.replace('__KEYWORD__', escape(keyword)).encode('utf-8')
+        if parts.netloc == 'www.google.com' and parts.path == '/search':
+            return 200, {'Content-Type': HTML}, self.google_search.replace('__KEYWORD__', escape(keyword)).encode('utf-8')
+        if method != 'GET' or not self.articles:
+            return 404, {'Content-Type': HTML}, b''
+        # 같은 기사 URL에는 항상 같은 픽스처
+        body = self.articles[zlib.crc32(url.encode('utf-8')) % len(self.articles)]
+        return 200, {'Content-Type': HTML}, body
+
+
+class FixtureAdapter(HTTPAdapter):
+    """requests 전송 어댑터 - 실제 연결 없이 FixtureRouter 응답을 돌려줌"""
+
+    def __init__(self, router):
+        super().__init__()
+        self.router = router
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        status, headers, body = self.router.respond(request.method, request.url)
+        if self.router.latency:
+            time.sleep(self.router.latency)
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(dict(headers, **{'Content-Length': str(len(body))}))
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = io.BytesIO(body)
+        response.reason = requests.status_codes._codes.get(status, ('',))[0].upper()
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+
+def install_requests(router, session):
+    """http_client 공유 Session의 http/https 요청을 FixtureRouter로 보냄"""
+    adapter = FixtureAdapter(router)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return adapter
+
+
+def mock_transport(router):
+    """httpx.AsyncClient(transport=...)에 넣을 전송 계층 (ASGI 모드용)"""
+    import httpx
+
+    async def handler(request):
+        status, headers, body = router.respond(request.method, str(request.url))
+        if router.latency:
+            await asyncio.sleep(router.latency)
+        return httpx.Response(status, headers=headers, content=body)
+
+    return httpx.MockTransport(handler)
+
+
+class _Usage:
+    def __init__(self, prompt_tokens, response_tokens):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = response_tokens
+
+
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeResponse:
+    """generate_content 응답 대역 - .text, usage_metadata, 스트리밍이면 조각 순회"""
+
+    def __init__(self, text, prompt, chunks=None, chunk_delay=0.0):
+        self.text = text
+        self._chunks = chunks
+        self._chunk_delay = chunk_delay
+        self.usage_metadata = _Usage(max(1, len(prompt) // 2), max(1, len(text) // 2))
+
+    def __iter__(self):
+        for piece in self._chunks or [self.text]:
+            if self._chunk_delay:
+                time.sleep(self._chunk_delay)
+            yield _Chunk(piece)
+
+
+class FakeGeminiModel:
+    """genai.GenerativeModel 대역. latency초 뒤 프롬프트 길이에 맞춘 고정 형식 답변을 돌려줌"""
+
+    def __init__(self, latency=0.8, stream_chunks=4):
+        self.latency = latency
+        self.stream_chunks = max(1, stream_chunks)
+        self.calls = 0
+
+    @staticmethod
+    def _summary(prompt):
+        lines = [line.strip() for line in prompt.splitlines() if line.strip().startswith(tuple('123456789'))]
+        return "오프라인 벤치마크 요약입니다.\n" + "\n".join(f"- {line[:80]}" for line in lines[:8])
+
+    def generate_content(self, prompt, generation_config=None, stream=False):
+        self.calls += 1
+        sections = re.split(r'^=== (\d+) ===$', prompt, flags=re.M)
+        if len(sections) > 1:  # 여러 키워드 묶음 요약 - 같은 번호 구획으로 답변
+            text = "\n\n".join(f"=== {number} ===\n{self._summary(body)}"
+                                for number, body in zip(sections[1::2], sections[2::2]))
+        else:
+            text = self._summary(prompt)
+        if not stream:
+            time.sleep(self.latency)
+            return FakeResponse(text, prompt)
+        # 첫 조각까지 지연의 절반, 나머지는 조각마다 나눠서
+        time.sleep(self.latency / 2)
+        size = max(1, len(text) // self.stream_chunks + 1)
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        return FakeResponse(text, prompt, chunks, self.latency / 2 / len(chunks))
@@ -0,0 +1,287 @@
+"""세션별 대화 컨텍스트 저장소 - 사용자(세션)마다 최근 검색 결과와 검색 인덱스를 보관
+
+- memory 백엔드: 프로세스 메모리 (OrderedDict, TTL + LRU 제거)
+- sqlite 백엔드: 로컬 SQLite 파일 - 같은 서버의 여러 워커 프로세스가 세션을 공유
+세션마다 검색 시점에 만든 NewsIndex를 함께 두고, 같은 검색 결과를 받은 세션끼리는 인덱스를 공유합니다.
+"""
+import json
+import os
+import re
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from news_index import NewsIndex, fingerprint
+
+CHAT_SESSION_BACKEND = os.getenv('CHAT_SESSION_BACKEND', 'memory')        # memory / sqlite
+CHAT_SESSION_PATH = os.getenv(
+    'CHAT_SESSION_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'chat_sessions.sqlite3')
+)
+CHAT_SESSION_TTL = float(os.getenv('CHAT_SESSION_TTL', '3600'))           # 마지막 사용 후 유지 시간(초)
+CHAT_SESSION_MAX = int(os.getenv('CHAT_SESSION_MAX', '1000'))             # 최대 세션 수 (LRU)
+CHAT_INDEX_CACHE_SIZE = int(os.getenv('CHAT_INDEX_CACHE_SIZE', '128'))    # 프로세스별 인덱스 캐시 수
+
+SESSION_COOKIE = 'news_session'
+SESSION_HEADER = 'X-Session-Id'
+
+_SESSION_ID_RE = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+
+# sqlite 백엔드는 매 저장마다 정리하지 않고 일정 횟수마다 정리
+_EVICT_EVERY = 50
+
+
+def new_session_id():
+    return secrets.token_urlsafe(16)
+
+
+def valid_session_id(session_id):
+    return bool(session_id) and bool(_SESSION_ID_RE.match(session_id))
+
+
+@dataclass
+class ChatSession:
+    keyword: str
+    summary: str
+    index: NewsIndex
+
+    @property
+    def news(self):
+        return self.index.items
+
+
+class _IndexCache:
+    """fingerprint → NewsIndex LRU (인기 키워드는 여러 세션이 같은 인덱스를 참조)"""
+
+    def __init__(self, size=CHAT_INDEX_CACHE_SIZE):
+        self.size = max(1, size)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.builds = 0
+
+    def get(self, key):
+        with self._lock:
+            index = self._entries.get(key)
+            if index is not None:
+                self._entries.move_to_end(key)
+            return index
+
+    def build(self, news_items):
+        index = self.get(fingerprint(news_items))
+        if index is not None:
+            return index
+        index = NewsIndex(news_items)
+        with self._lock:
+            self.builds += 1
+            self._entries[index.fingerprint] = index
+            self._entries.move_to_end(index.fingerprint)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return index
+
+
+class MemorySessionStore:
+    """프로세스 메모리 세션 저장소"""
+
+    backend = 'memory'
+
+    def __init__(self, ttl=CHAT_SESSION_TTL, max_sessions=CHAT_SESSION_MAX):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.indexes = _IndexCache()
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()  # session_id -> (ChatSession, last_access)
+        self._stats = {'saves': 0, 'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0}
+
+    def put(self, session_id, keyword, news_items, summary):
+        session = ChatSession(keyword or '', summary or '', self.indexes.build(news_items))
+        with self._lock:
+            self._sessions[session_id] = (session, time.monotonic())
+            self._sessions.move_to_end(session_id)
+            self._stats['saves'] += 1
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self._stats['evictions'] += 1
+        return session
+
+    def get(self, session_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            session, last_access = entry
+            if now - last_access > self.ttl:
+                del self._sessions[session_id]
+                self._stats['expired'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._sessions[session_id] = (session, now)
+            self._sessions.move_to_end(session_id)
+            self._stats['hits'] += 1
+            return session
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, sessions=len(self._sessions))
+        stats['index_builds'] = self.indexes.builds
+        return stats
+
+
+class SqliteSessionStore:
+    """로컬 SQLite 세션 저장소 (스레드별 연결, 인덱스는 프로세스마다 캐시)"""
+
+    backend = 'sqlite'
+
+    def __init__(self, path=CHAT_SESSION_PATH, ttl=CHAT_SESSION_TTL, max_sessions=CHAT_SESSION_MAX):
+        self.path = path
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.indexes = _IndexCache()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._puts_since_evict = 0
+        self._stats = {'saves': 0, 'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn().executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                keyword TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                news TEXT NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_sessions_last_access ON sessions(last_access);
+        """)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def put(self, session_id, keyword, news_items, summary):
+        index = self.indexes.build(news_items)
+        self._conn().execute(
+            'INSERT OR REPLACE INTO sessions (session_id, keyword, summary, fingerprint, news, last_access) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (session_id, keyword or '', summary or '', index.fingerprint,
+             json.dumps(index.items, ensure_ascii=False), time.time())
+        )
+        self._count('saves')
+
+        with self._lock:
+            self._puts_since_evict += 1
+            should_evict = self._puts_since_evict >= _EVICT_EVERY
+            if should_evict:
+                self._puts_since_evict = 0
+        if should_evict:
+            self.evict()
+        return ChatSession(keyword or '', summary or '', index)
+
+    def get(self, session_id):
+        conn = self._conn()
+        row = conn.execute(
+            'SELECT keyword, summary, fingerprint, last_access FROM sessions WHERE session_id = ?', (session_id,)
+        ).fetchone()
+        now = time.time()
+        if row is None:
+            self._count('misses')
+            return None
+        keyword, summary, key, last_access = row
+        if now - last_access > self.ttl:
+            conn.execute('DELETE FROM sessions WHERE session_id = ?', (session_id,))
+            self._count('expired')
+            self._count('misses')
+            return None
+        conn.execute('UPDATE sessions SET last_access = ? WHERE session_id = ?', (now, session_id))
+
+        # 이 프로세스에 인덱스가 없을 때만 기사 JSON을 읽어 다시 만듦
+        index = self.indexes.get(key)
+        if index is None:
+            news = conn.execute('SELECT news FROM sessions WHERE session_id = ?', (session_id,)).fetchone()
+            index = self.indexes.build(json.loads(news[0]) if news else [])
+        self._count('hits')
+        return ChatSession(keyword, summary, index)
+
+    def evict(self):
+        """만료된 세션과 최대 개수를 넘은 세션(오래 안 쓴 순서) 제거"""
+        conn = self._conn()
+        removed = conn.execute('DELETE FROM sessions WHERE last_access < ?', (time.time() - self.ttl,)).rowcount
+        overflow = conn.execute('SELECT COUNT(*) FROM sessions').fetchone()[0] - self.max_sessions
+        if overflow > 0:
+            conn.execute(
+                'DELETE FROM sessions WHERE session_id IN '
+                '(SELECT session_id FROM sessions ORDER BY last_access ASC LIMIT ?)', (overflow,)
+            )
+            removed += overflow
+        self._count('evictions', max(0, removed))
+        return removed
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['sessions'] = self._conn().execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+        stats['index_builds'] = self.indexes.builds
+        return stats
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """설정된 백엔드의 공유 저장소 반환 (sqlite를 열 수 없으면 memory 사용)"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if CHAT_SESSION_BACKEND == 'sqlite':
+                    try:
+                        _store = SqliteSessionStore()
+                    except Exception as e:
+                        print(f"대화 세션 저장소 초기화 오류: {e}")
+                if _store is None:
+                    _store = MemorySessionStore()
+    return _store
+
+
+def save(session_id, keyword, news_items, summary):
+    try:
+        return get_store().put(session_id, keyword, news_items, summary)
+    except Exception as e:
+        print(f"대화 세션 저장 오류: {e}")
+        return None
+
+
+def load(session_id):
+    """세션의 최근 검색 컨텍스트. 없거나 만료되었으면 None"""
+    if not valid_session_id(session_id):
+        return None
+    try:
+        return get_store().get(session_id)
+    except Exception as e:
+        print(f"대화 세션 조회 오류: {e}")
+        return None
+
+
+def stats():
+    store = get_store()
+    try:
+        return dict(store.stats(), backend=store.backend)
+    except Exception as e:
+        return {'backend': store.backend, 'error': str(e)}
@@ -0,0 +1,225 @@
+"""기사 본문 디스크 캐시 - SQLite 기반, TTL/LRU 제거/실패 결과(negative) 캐시 지원
+
+구글 뉴스 리다이렉트 URL과 실제 기사 URL 모두를 키로 사용할 수 있도록
+본문은 실제 URL 기준으로 한 번만 저장하고, 리다이렉트 URL은 별칭(alias)으로 연결합니다.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+CONTENT_CACHE_ENABLED = os.getenv('CONTENT_CACHE_ENABLED', '1') == '1'
+CONTENT_CACHE_PATH = os.getenv(
+    'CONTENT_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'content_cache.sqlite3')
+)
+CONTENT_CACHE_TTL = float(os.getenv('CONTENT_CACHE_TTL', str(24 * 3600)))      # 본문 유효 시간(초)
+CONTENT_CACHE_NEGATIVE_TTL = float(os.getenv('CONTENT_CACHE_NEGATIVE_TTL', '900'))  # 실패 결과 유효 시간(초)
+CONTENT_CACHE_MAX_ENTRIES = int(os.getenv('CONTENT_CACHE_MAX_ENTRIES', '5000'))   # 최대 저장 기사 수
+
+# 매 저장마다 정리하지 않고 일정 횟수마다 LRU 정리
+_EVICT_EVERY = 50
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS contents (
+    url TEXT PRIMARY KEY,
+    content TEXT NOT NULL,
+    ok INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    cost REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_contents_last_access ON contents(last_access);
+CREATE TABLE IF NOT EXISTS aliases (
+    alias TEXT PRIMARY KEY,
+    url TEXT NOT NULL
+);
+"""
+
+
+class ContentCache:
+    """URL → 추출된 본문 캐시 (스레드별 SQLite 연결 사용)"""
+
+    def __init__(self, path=CONTENT_CACHE_PATH, ttl=CONTENT_CACHE_TTL,
+                 negative_ttl=CONTENT_CACHE_NEGATIVE_TTL, max_entries=CONTENT_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._puts_since_evict = 0
+        self._stats = {
+            'hits': 0,
+            'negative_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'evictions': 0,
+            'saved_seconds': 0.0,
+            'saved_chars': 0,
+        }
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def _resolve_alias(self, conn, url):
+        row = conn.execute('SELECT url FROM aliases WHERE alias = ?', (url,)).fetchone()
+        return row[0] if row else url
+
+    def get(self, url, count_miss=True):
+        """캐시된 본문 반환. 없거나 만료되면 None, 실패가 캐시된 경우 빈 문자열
+
+        count_miss=False면 미스를 통계에 넣지 않음 (리다이렉트 후 실제 URL로 다시 조회하는 경우)
+        """
+        conn = self._conn()
+        key = self._resolve_alias(conn, url)
+        row = conn.execute(
+            'SELECT content, ok, fetched_at, cost FROM contents WHERE url = ?', (key,)
+        ).fetchone()
+        now = time.time()
+        if row:
+            content, ok, fetched_at, cost = row
+            ttl = self.ttl if ok else self.negative_ttl
+            if now - fetched_at <= ttl:
+                conn.execute('UPDATE contents SET last_access = ? WHERE url = ?', (now, key))
+                if ok:
+                    self._count('hits')
+                    self._count('saved_seconds', cost)
+                    self._count('saved_chars', len(content))
+                else:
+                    self._count('negative_hits')
+                return content
+        if count_miss:
+            self._count('misses')
+        return None
+
+    def put(self, url, content, ok=True, cost=0.0, aliases=()):
+        """본문 저장. aliases에 준 URL(리다이렉트 URL 등)로도 같은 본문을 찾을 수 있게 연결"""
+        conn = self._conn()
+        now = time.time()
+        conn.execute(
+            'INSERT OR REPLACE INTO contents (url, content, ok, fetched_at, last_access, cost) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (url, content or '', 1 if ok else 0, now, now, cost)
+        )
+        for alias in aliases:
+            self.add_alias(alias, url)
+        self._count('stores')
+
+        with self._lock:
+            self._puts_since_evict += 1
+            should_evict = self._puts_since_evict >= _EVICT_EVERY
+            if should_evict:
+                self._puts_since_evict = 0
+        if should_evict:
+            self.evict()
+
+    def add_alias(self, alias, url):
+        """alias URL로 조회해도 url의 본문을 찾도록 연결"""
+        if alias and alias != url:
+            self._conn().execute('INSERT OR REPLACE INTO aliases (alias, url) VALUES (?, ?)', (alias, url))
+
+    def evict(self):
+        """최대 개수를 넘은 항목을 오래 사용하지 않은 순서로 제거"""
+        conn = self._conn()
+        total = conn.execute('SELECT COUNT(*) FROM contents').fetchone()[0]
+        overflow = total - self.max_entries
+        if overflow <= 0:
+            return 0
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'DELETE FROM contents WHERE url IN '
+                '(SELECT url FROM contents ORDER BY last_access ASC LIMIT ?)', (overflow,)
+            )
+            conn.execute('DELETE FROM aliases WHERE url NOT IN (SELECT url FROM contents)')
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        self._count('evictions', overflow)
+        return overflow
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['negative_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['negative_hits']) / lookups, 3) if lookups else 0.0
+        stats['saved_seconds'] = round(stats['saved_seconds'], 3)
+        stats['entries'] = self._conn().execute('SELECT COUNT(*) FROM contents').fetchone()[0]
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """공유 캐시 인스턴스 반환. 비활성화되었거나 열 수 없으면 None"""
+    global _cache, CONTENT_CACHE_ENABLED
+    if not CONTENT_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None and CONTENT_CACHE_ENABLED:
+                try:
+                    _cache = ContentCache()
+                except Exception as e:
+                    print(f"본문 캐시 초기화 오류: {e}")
+                    CONTENT_CACHE_ENABLED = False
+    return _cache
+
+
+def lookup(url, count_miss=True):
+    cache = get_cache()
+    if cache is None:
+        return None
+    try:
+        return cache.get(url, count_miss=count_miss)
+    except Exception as e:
+        print(f"본문 캐시 조회 오류: {e}")
+        return None
+
+
+def store(url, content, ok=True, cost=0.0, aliases=()):
+    cache = get_cache()
+    if cache is None:
+        return
+    try:
+        cache.put(url, content, ok=ok, cost=cost, aliases=aliases)
+    except Exception as e:
+        print(f"본문 캐시 저장 오류: {e}")
+
+
+def add_alias(alias, url):
+    cache = get_cache()
+    if cache is None:
+        return
+    try:
+        cache.add_alias(alias, url)
+    except Exception as e:
+        print(f"본문 캐시 저장 오류: {e}")
+
+
+def stats():
+    cache = get_cache()
+    if cache is None:
+        return {'enabled': False}
+    try:
+        return dict(cache.stats(), enabled=True)
+    except Exception as e:
+        return {'enabled': True, 'error': str(e)}
@@ -0,0 +1,363 @@
+"""기사 HTML에서 본문 텍스트를 뽑는 추출기 - lxml 빠른 경로 + BeautifulSoup 대체 경로
+
+두 추출기 모두 같은 4단계 규칙을 순서대로 적용합니다.
+  1. 첫 <article> 안의 본문 클래스(article/content/body/text/post) p·div
+  2. 본문 클래스(… /main) div·section 중 p가 3개 넘게 들어 있는 첫 번째 것의 p들
+  3. 문서 전체 p가 3개 넘고 50자 넘는 문단이 2개 넘으면 그중 앞 10개
+  4. og:description 메타 태그
+
+EXTRACTOR_BACKEND 환경변수로 선택: auto(기본, lxml 설치 시 lxml) / lxml / bs4
+
+StreamingExtractor는 응답을 조각 단위로 받아 파싱하면서 ARTICLE_MAX_BYTES에서 읽기를 멈추고,
+본문을 충분히 모으면(첫 <article>의 본문이 확정되거나 문단 글자 수가 ARTICLE_TEXT_TARGET 이상)
+나머지 페이지는 받지 않습니다.
+"""
+import codecs
+import os
+import re
+import threading
+import time
+from itertools import islice
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:  # lxml이 없으면 BeautifulSoup만 사용
+    lxml = None
+    etree = None
+
+EXTRACTOR_BACKEND = os.getenv('EXTRACTOR_BACKEND', 'auto')
+ARTICLE_MAX_BYTES = int(os.getenv('ARTICLE_MAX_BYTES', str(2 * 1024 * 1024)))   # 기사 페이지 최대 다운로드 크기
+ARTICLE_TEXT_TARGET = int(os.getenv('ARTICLE_TEXT_TARGET', '6000'))            # 이만큼 문단 글자를 모으면 읽기 중단
+
+REMOVE_TAGS = ['script', 'style', 'nav', 'header', 'footer', 'aside', 'iframe', 'noscript']
+ARTICLE_CLASS_RE = re.compile(r'(article|content|body|text|post)', re.I)
+CONTAINER_CLASS_RE = re.compile(r'(article|content|body|text|post|main)', re.I)
+
+
+def extract_with_bs4(html):
+    """BeautifulSoup(html.parser) 기반 추출 - 기존 동작 그대로"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # 불필요한 태그 제거
+    for tag in soup(REMOVE_TAGS):
+        tag.decompose()
+
+    # 본문 내용 추출 - 여러 패턴 시도
+    content = ""
+
+    # 패턴 1: article 태그
+    article = soup.find('article')
+    if article:
+        paragraphs = article.find_all(['p', 'div'], class_=ARTICLE_CLASS_RE)
+        if paragraphs:
+            content = '\n'.join([p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True)])
+
+    # 패턴 2: 본문 클래스 찾기
+    if not content:
+        content_divs = soup.find_all(['div', 'section'], class_=CONTAINER_CLASS_RE)
+        for div in content_divs:
+            paragraphs = div.find_all('p')
+            if len(paragraphs) > 3:  # 최소 3개 이상의 문단이 있어야 본문으로 인정
+                content = '\n'.join([p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True)])
+                break
+
+    # 패턴 3: 일반 p 태그들
+    if not content:
+        paragraphs = soup.find_all('p')
+        if len(paragraphs) > 3:
+            # 너무 짧은 문단 제외
+            valid_paragraphs = [p.get_text(strip=True) for p in paragraphs
+                              if len(p.get_text(strip=True)) > 50]
+            if len(valid_paragraphs) > 2:
+                content = '\n'.join(valid_paragraphs[:10])  # 최대 10개 문단
+
+    # 패턴 4: 메타 태그에서 설명 가져오기
+    if not content:
+        meta_desc = soup.find('meta', property='og:description')
+        if meta_desc:
+            content = meta_desc.get('content', '')
+
+    return content
+
+
+def _text(element, cache):
+    """BeautifulSoup get_text(strip=True)와 같은 결과 (요소별로 한 번만 계산)"""
+    key = id(element)
+    entry = cache.get(key)
+    if entry is None:
+        # 요소 자체도 함께 보관해 lxml 프록시 객체(id)가 재사용되지 않게 함
+        entry = (element, ''.join(s.strip() for s in element.itertext()))
+        cache[key] = entry
+    return entry[1]
+
+
+def extract_with_lxml(html):
+    """lxml 기반 추출 - 문서를 한 번 순회하며 4단계 규칙에 필요한 후보를 모두 모음"""
+    if isinstance(html, str):
+        html = html.encode('utf-8', 'replace')
+    try:
+        root = lxml.html.document_fromstring(html, parser=_lxml_parser())
+    except (etree.ParserError, ValueError):
+        return ""
+    return _extract_lxml_root(root)
+
+
+def _article_paragraphs(article, texts):
+    """패턴 1: article 안 본문 클래스 p·div 텍스트"""
+    matched = [
+        el for el in article.iter('p', 'div')
+        if ARTICLE_CLASS_RE.search(el.get('class', ''))
+    ]
+    return '\n'.join(t for t in (_text(el, texts) for el in matched) if t)
+
+
+def _extract_lxml_root(root):
+    # 불필요한 태그 제거 (뒤따르는 텍스트는 유지)
+    etree.strip_elements(root, *REMOVE_TAGS, with_tail=False)
+
+    article = None
+    containers = []
+    paragraphs = []
+    meta_desc = None
+    for el in root.iter(etree.Element):
+        tag = el.tag
+        if tag == 'p':
+            paragraphs.append(el)
+        elif tag == 'article':
+            if article is None:
+                article = el
+        elif tag == 'meta':
+            if meta_desc is None and el.get('property') == 'og:description':
+                meta_desc = el
+        if (tag == 'div' or tag == 'section') and CONTAINER_CLASS_RE.search(el.get('class', '')):
+            containers.append(el)
+
+    texts = {}
+    content = ""
+
+    # 패턴 1: article 태그
+    if article is not None:
+        content = _article_paragraphs(article, texts)
+
+    # 패턴 2: 본문 클래스 찾기
+    if not content:
+        for container in containers:
+            # p가 4개 이상인지만 먼저 확인 (전체를 다 세지 않음)
+            if len(list(islice(container.iter('p'), 4))) > 3:
+                content = '\n'.join(t for t in (_text(p, texts) for p in container.iter('p')) if t)
+                break
+
+    # 패턴 3: 일반 p 태그들
+    if not content and len(paragraphs) > 3:
+        valid_paragraphs = [t for t in (_text(p, texts) for p in paragraphs) if len(t) > 50]
+        if len(valid_paragraphs) > 2:
+            content = '\n'.join(valid_paragraphs[:10])
+
+    # 패턴 4: 메타 태그에서 설명 가져오기
+    if not content and meta_desc is not None:
+        content = meta_desc.get('content', '')
+
+    return content
+
+
+_parser = None
+
+
+def _lxml_parser():
+    global _parser
+    if _parser is None:
+        _parser = lxml.html.HTMLParser(encoding='utf-8', remove_comments=True)
+    return _parser
+
+
+BACKENDS = {
+    'bs4': extract_with_bs4,
+}
+if lxml is not None:
+    BACKENDS['lxml'] = extract_with_lxml
+
+
+def get_extractor(name=None):
+    """이름으로 추출 함수 선택 (auto면 lxml 우선)"""
+    name = name or EXTRACTOR_BACKEND
+    if name == 'auto':
+        name = 'lxml' if 'lxml' in BACKENDS else 'bs4'
+    if name not in BACKENDS:
+        print(f"본문 추출기 '{name}'를 사용할 수 없어 bs4로 대체합니다.")
+        name = 'bs4'
+    return BACKENDS[name]
+
+
+def extract_article_text(html, backend=None):
+    """HTML에서 본문 텍스트 추출. 빠른 경로가 실패하면 BeautifulSoup으로 다시 시도"""
+    extractor = get_extractor(backend)
+    if extractor is not extract_with_bs4:
+        try:
+            return extractor(html)
+        except Exception as e:
+            print(f"본문 추출기 오류, bs4로 재시도: {e}")
+    return extract_with_bs4(html)
+
+
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml', 'text/plain', 'application/xml', 'text/xml')
+_CHARSET_RE = re.compile(rb'charset\s*=\s*["\']?([\w.:-]+)', re.I)
+_SNIFF_BYTES = 2048
+# 한국 언론사 페이지의 euc-kr 선언은 대부분 실제로 cp949 (확장 완성형)
+_ENCODING_ALIASES = {'euc-kr': 'cp949', 'euc_kr': 'cp949', 'ks_c_5601-1987': 'cp949', 'iso-8859-1': 'cp1252'}
+
+_stream_lock = threading.Lock()
+_stream_stats = {'downloads': 0, 'bytes_read': 0, 'early_stops': 0, 'truncated': 0, 'skipped_content_type': 0}
+
+
+def count_stream(key, amount=1):
+    with _stream_lock:
+        _stream_stats[key] += amount
+
+
+def stream_stats():
+    with _stream_lock:
+        return dict(_stream_stats, max_bytes=ARTICLE_MAX_BYTES, text_target=ARTICLE_TEXT_TARGET)
+
+
+def is_html_content_type(content_type):
+    """기사로 파싱할 수 있는 Content-Type인지 (없으면 HTML로 간주, PDF/이미지/영상 등은 제외)"""
+    if not content_type:
+        return True
+    return content_type.split(';', 1)[0].strip().lower() in HTML_CONTENT_TYPES
+
+
+def _charset(data):
+    match = _CHARSET_RE.search(data or b'')
+    if not match:
+        return None
+    name = match.group(1).decode('ascii', 'ignore').lower()
+    name = _ENCODING_ALIASES.get(name, name)
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+class StreamingExtractor:
+    """기사 HTML을 조각 단위로 받아 본문을 추출 (네트워크와 무관)
+
+    feed(chunk)가 True를 돌려주면(바이트 한도 도달 또는 본문 충분) 더 읽지 말고 close()로 결과를 받습니다.
+    인코딩은 Content-Type 헤더, 없으면 문서 앞부분의 meta charset, 그것도 없으면 UTF-8로 판단합니다.
+    """
+
+    def __init__(self, content_type=None, max_bytes=ARTICLE_MAX_BYTES, text_target=ARTICLE_TEXT_TARGET,
+                 backend=None):
+        self.max_bytes = max_bytes
+        self.text_target = text_target
+        self.bytes_read = 0
+        self.parse_seconds = 0.0   # 다운로드 대기를 뺀 파싱/추출 시간
+        self.done = False
+        self.truncated = False
+        self.early_stop = False
+        self.encoding = _charset((content_type or '').encode('latin-1', 'ignore'))
+        self._decoder = None
+        self._pending = b''
+        self._chunks = []          # UTF-8로 바꾼 조각 (bs4 경로/대체용)
+        self._paragraph_chars = 0
+        self._article = None       # 첫 <article>
+        self._article_open = False
+        self._pull = None
+        if get_extractor(backend) is not extract_with_bs4:
+            self._pull = etree.HTMLPullParser(events=('start', 'end'), tag=('p', 'article'),
+                                              encoding='utf-8', remove_comments=True)
+
+    def feed(self, chunk):
+        """조각 하나를 파싱하고 더 읽을 필요가 없으면 True"""
+        if self.done or not chunk:
+            return self.done
+        room = self.max_bytes - self.bytes_read
+        if len(chunk) >= room:
+            chunk = chunk[:room]
+            self.done = self.truncated = True
+        self.bytes_read += len(chunk)
+
+        if self._decoder is None:
+            self._pending += chunk
+            if len(self._pending) < _SNIFF_BYTES and not self.done:
+                return False
+            chunk, self._pending = self._pending, b''
+            self._start_decoder(chunk)
+        self._parse(self._decoder.decode(chunk, final=self.done).encode('utf-8'))
+        return self.done
+
+    def _start_decoder(self, head):
+        encoding = self.encoding or _charset(head[:_SNIFF_BYTES]) or 'utf-8'
+        self.encoding = encoding
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+
+    def _parse(self, data):
+        if not data:
+            return
+        self._chunks.append(data)
+        if self._pull is None:
+            return
+        started = time.perf_counter()
+        try:
+            self._pull.feed(data)
+            for event, el in self._pull.read_events():
+                self._on_event(event, el)
+        except (etree.ParserError, ValueError) as e:
+            print(f"스트리밍 파싱 오류, 전체 파싱으로 대체: {e}")
+            self._pull = None
+        self.parse_seconds += time.perf_counter() - started
+
+    def _on_event(self, event, el):
+        if el.tag == 'article':
+            if event == 'start' and self._article is None:
+                self._article = el
+                self._article_open = True
+            elif event == 'end' and el is self._article:
+                self._article_open = False
+                # 첫 article이 닫히면 패턴 1의 결과가 확정되므로 본문이 있으면 그만 읽음
+                etree.strip_elements(el, *REMOVE_TAGS, with_tail=False)
+                if _article_paragraphs(el, {}):
+                    self._stop()
+        elif event == 'end':
+            self._paragraph_chars += len(''.join(s.strip() for s in el.itertext()))
+            # 첫 article이 열려 있는 동안에는 article이 닫힐 때까지 읽음
+            if self._paragraph_chars >= self.text_target and not self._article_open:
+                self._stop()
+
+    def _stop(self):
+        if not self.done:
+            self.done = self.early_stop = True
+
+    def close(self):
+        """읽은 부분까지로 본문 추출"""
+        started = time.perf_counter()
+        try:
+            return self._close()
+        finally:
+            self.parse_seconds += time.perf_counter() - started
+
+    def _close(self):
+        if self._decoder is None:
+            self._start_decoder(self._pending)
+            chunk, self._pending = self._pending, b''
+            self._parse(self._decoder.decode(chunk, final=True).encode('utf-8'))
+        if self._pull is not None:
+            try:
+                content = _extract_lxml_root(self._pull.close())
+            except Exception as e:
+                print(f"본문 추출기 오류, bs4로 재시도: {e}")
+            else:
+                self._count()
+                return content
+        self._count()
+        return extract_with_bs4(b''.join(self._chunks).decode('utf-8', 'replace'))
+
+    def _count(self):
+        count_stream('downloads')
+        count_stream('bytes_read', self.bytes_read)
+        if self.early_stop:
+            count_stream('early_stops')
+        elif self.truncated:
+            count_stream('truncated')
@@ -0,0 +1,490 @@
+"""검색 히스토리 저장소 - SQLite(WAL) 기반 추가 전용 저장
+
+history.json 전체를 읽고 다시 쓰던 방식 대신 레코드 한 건씩 INSERT 하므로
+저장 비용이 누적 히스토리 크기와 무관하고, 여러 요청이 동시에 써도 기록이 사라지지 않습니다.
+키워드/시간 인덱스로 조회하며, 오래된 기록은 JSON Lines 파일로 옮긴 뒤 정리(compact)할 수 있습니다.
+
+기사 본문은 내용 해시(SHA-1)를 키로 articles 테이블에 한 번만 저장하고 검색 기록에는 해시만 남기므로
+같은 기사가 여러 검색에 나와도 본문은 중복 저장되지 않습니다.
+키워드/요약/제목/본문은 FTS5 역색인(search_text)에 넣어 두어 과거 결과를 전문 검색할 수 있고,
+목록/검색은 id 커서로 페이지를 나눠 읽으므로 메모리 사용이 전체 기록 크기와 무관합니다.
+
+기존 history.json은 처음 열 때 한 번 자동으로 가져오며, 직접 실행할 수도 있습니다:
+    python history_store.py migrate [history.json 경로] [--force]   # --force: 이미 가져온 파일도 다시 (같은 기록은 건너뜀)
+    python history_store.py compact --max-records 5000
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+
+from news_index import NGRAM, tokenize
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+HISTORY_DB_PATH = os.getenv('HISTORY_DB_PATH', os.path.join(BASE_DIR, 'history.db'))
+LEGACY_HISTORY_FILE = os.path.join(BASE_DIR, 'history.json')
+HISTORY_MAX_RECORDS = int(os.getenv('HISTORY_MAX_RECORDS', '0'))  # 0이면 제한 없음
+HISTORY_PAGE_MAX = int(os.getenv('HISTORY_PAGE_MAX', '100'))       # 목록/검색 한 페이지 최대 건수
+
+SCHEMA_VERSION = 2   # 2: 본문 내용 주소 저장 + 전문 색인
+_UPGRADE_BATCH = 200
+_WORD_RE = re.compile(r'[0-9a-z가-힣]+')   # news_index.tokenize와 같은 단어 단위
+_HANGUL_RE = re.compile(r'[가-힣]')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS searches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    keyword TEXT NOT NULL,
+    keyword_norm TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    news TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_searches_keyword ON searches(keyword_norm, timestamp);
+CREATE INDEX IF NOT EXISTS idx_searches_timestamp ON searches(timestamp);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS articles (
+    hash TEXT PRIMARY KEY,
+    content TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS search_articles (
+    search_id INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    PRIMARY KEY (search_id, hash)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_search_articles_hash ON search_articles(hash);
+"""
+
+# 토큰은 news_index.tokenize로 미리 나눠 공백으로 이어 넣음 (한글 2글자 n-gram 포함).
+# 본문은 articles에 있으므로 색인만 저장(contentless)하고, 용어 존재 여부만 쓰므로 detail=none
+_FTS_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS search_text USING fts5(body, content='', detail=none)"
+
+
+def _normalize(keyword):
+    return re.sub(r'\s+', ' ', (keyword or '').strip()).casefold()
+
+
+def utc_timestamp():
+    return datetime.utcnow().isoformat() + "Z"
+
+
+def content_hash(content):
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+def split_contents(news_items):
+    """기사 본문을 떼어 내고 content_hash를 붙인 기사 목록과 {해시: 본문} 반환"""
+    news, contents = [], {}
+    for item in news_items or []:
+        item = dict(item)
+        content = item.pop('content', None)
+        if content:
+            digest = content_hash(content)
+            contents[digest] = content
+            item['content_hash'] = digest
+        news.append(item)
+    return news, contents
+
+
+def query_terms(text):
+    """전문 검색 질의 용어 - 한글 단어는 n-gram만 사용 ('반도체' → '반도', '도체'가 '반도체가'에도 일치)"""
+    terms = []
+    for word in _WORD_RE.findall((text or '').lower()):
+        if len(word) < 2:
+            continue
+        if len(word) > NGRAM and _HANGUL_RE.match(word):
+            terms.extend(word[i:i + NGRAM] for i in range(len(word) - NGRAM + 1))
+        else:
+            terms.append(word)
+    return list(dict.fromkeys(terms))
+
+
+def _document(keyword, summary, news_items):
+    """색인할 토큰 문자열 (중복 용어 제거, 같은 입력이면 항상 같은 결과 - 색인 삭제에 필요)"""
+    parts = [keyword, summary]
+    for item in news_items:
+        parts.extend((item.get('title'), item.get('snippet'), item.get('content')))
+    tokens = []
+    for part in parts:
+        tokens.extend(tokenize(part))
+    return ' '.join(dict.fromkeys(tokens))
+
+
+class HistoryStore:
+    def __init__(self, path=HISTORY_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        try:
+            conn.execute(_FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError as e:  # FTS5 없이 빌드된 SQLite
+            print(f"히스토리 전문 색인을 사용할 수 없습니다: {e}")
+            self.fts = False
+        self._upgrade()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def append(self, keyword, news_items, summary, timestamp=None):
+        """검색 기록 한 건 추가 (본문은 처음 보는 것만 저장, 색인 포함)"""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            search_id = self._insert(conn, keyword, news_items, summary, timestamp or utc_timestamp())
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return search_id
+
+    def _insert(self, conn, keyword, news_items, summary, timestamp):
+        news, contents = split_contents(news_items)
+        cur = conn.execute(
+            'INSERT INTO searches (keyword, keyword_norm, timestamp, summary, news) VALUES (?, ?, ?, ?, ?)',
+            (keyword, _normalize(keyword), timestamp, summary or '', json.dumps(news, ensure_ascii=False))
+        )
+        self._link_contents(conn, cur.lastrowid, contents)
+        self._index(conn, cur.lastrowid, keyword, summary, news_items)
+        return cur.lastrowid
+
+    def put_contents(self, news_items):
+        """검색 기록 없이 기사 본문만 저장 (프리페치 결과의 본문을 /article로 제공하기 위함)
+
+        어느 기록에서도 참조하지 않는 본문은 다음 compact 때 정리됩니다.
+        """
+        _, contents = split_contents(news_items)
+        self._conn().executemany('INSERT OR IGNORE INTO articles (hash, content) VALUES (?, ?)', contents.items())
+
+    def has_content(self, digest):
+        """내용 해시의 기사 본문이 저장돼 있는지 (본문은 읽지 않음)"""
+        return self._conn().execute('SELECT 1 FROM articles WHERE hash = ?', (digest,)).fetchone() is not None
+
+    def content(self, digest):
+        """내용 해시로 기사 본문 조회. 없으면 None"""
+        row = self._conn().execute('SELECT content FROM articles WHERE hash = ?', (digest,)).fetchone()
+        return row[0] if row else None
+
+    def _link_contents(self, conn, search_id, contents):
+        conn.executemany('INSERT OR IGNORE INTO articles (hash, content) VALUES (?, ?)', contents.items())
+        conn.executemany('INSERT OR IGNORE INTO search_articles (search_id, hash) VALUES (?, ?)',
+                         [(search_id, digest) for digest in contents])
+
+    def _index(self, conn, search_id, keyword, summary, news_items, delete=False):
+        """전문 색인에 추가 (delete=True면 같은 내용으로 색인에서 제거)"""
+        if not self.fts:
+            return
+        document = _document(keyword, summary or '', news_items or [])
+        if delete:
+            conn.execute("INSERT INTO search_text (search_text, rowid, body) VALUES ('delete', ?, ?)",
+                         (search_id, document))
+        else:
+            conn.execute('INSERT INTO search_text (rowid, body) VALUES (?, ?)', (search_id, document))
+
+    def _upgrade(self):
+        """본문을 기록마다 통째로 담던 이전 형식 기록을 내용 주소 저장 + 색인으로 한 번 변환"""
+        conn = self._conn()
+        row = conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+        if row and int(row[0]) >= SCHEMA_VERSION:
+            return
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+            if row and int(row[0]) >= SCHEMA_VERSION:  # 다른 프로세스가 먼저 변환
+                conn.execute('COMMIT')
+                return
+            last_id = upgraded = 0
+            while True:
+                rows = conn.execute('SELECT id, keyword, summary, news FROM searches WHERE id > ? ORDER BY id LIMIT ?',
+                                    (last_id, _UPGRADE_BATCH)).fetchall()
+                if not rows:
+                    break
+                for search_id, keyword, summary, news_json in rows:
+                    news_items = json.loads(news_json)
+                    news, contents = split_contents(news_items)
+                    conn.execute('UPDATE searches SET news = ? WHERE id = ?',
+                                 (json.dumps(news, ensure_ascii=False), search_id))
+                    self._link_contents(conn, search_id, contents)
+                    self._index(conn, search_id, keyword, summary, news_items)
+                    upgraded += 1
+                last_id = rows[-1][0]
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        if upgraded:
+            print(f"히스토리 {upgraded}건을 본문 중복 제거 + 전문 색인 형식으로 변환했습니다.")
+
+    def _hydrate(self, records):
+        """기록들의 content_hash를 본문으로 채움 (한 번의 조회로)"""
+        hashes = {item['content_hash'] for record in records for item in record['news'] if item.get('content_hash')}
+        contents = {}
+        hashes = list(hashes)
+        for start in range(0, len(hashes), 500):
+            chunk = hashes[start:start + 500]
+            contents.update(self._conn().execute(
+                f"SELECT hash, content FROM articles WHERE hash IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall())
+        for record in records:
+            for item in record['news']:
+                if 'content' not in item:
+                    item['content'] = contents.get(item.get('content_hash'), '')
+        return records
+
+    def query(self, keyword=None, since=None, until=None, limit=50, offset=0):
+        """최신순 조회. keyword는 정규화해서 정확히 일치, since/until은 ISO 시각 문자열"""
+        clauses, params = [], []
+        if keyword:
+            clauses.append('keyword_norm = ?')
+            params.append(_normalize(keyword))
+        if since:
+            clauses.append('timestamp >= ?')
+            params.append(since)
+        if until:
+            clauses.append('timestamp <= ?')
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        rows = self._conn().execute(
+            f'SELECT id, keyword, summary, news, timestamp FROM searches {where} '
+            'ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?',
+            params + [limit, offset]
+        ).fetchall()
+        return self._hydrate([
+            {'id': row[0], 'keyword': row[1], 'summary': row[2], 'news': json.loads(row[3]), 'timestamp': row[4]}
+            for row in rows
+        ])
+
+    def get(self, search_id):
+        """기록 한 건 (본문 포함). 없으면 None"""
+        row = self._conn().execute(
+            'SELECT id, keyword, summary, news, timestamp FROM searches WHERE id = ?', (search_id,)
+        ).fetchone()
+        if not row:
+            return None
+        return self._hydrate([{'id': row[0], 'keyword': row[1], 'summary': row[2], 'news': json.loads(row[3]),
+                               'timestamp': row[4]}])[0]
+
+    def page(self, keyword=None, since=None, until=None, before=None, limit=20, text=None):
+        """최신 저장순 한 페이지 (본문 제외) → (기록 목록, 다음 페이지 커서 또는 None)
+
+        before: 이전 페이지의 커서(마지막 기록 id). text가 있으면 전문 검색 결과만,
+        각 기록에 질의 용어가 모두 들어 있는 기사 번호(matches)를 붙입니다.
+        """
+        limit = max(1, min(limit, HISTORY_PAGE_MAX))
+        clauses, params = [], []
+        if keyword:
+            clauses.append('s.keyword_norm = ?')
+            params.append(_normalize(keyword))
+        if since:
+            clauses.append('s.timestamp >= ?')
+            params.append(since)
+        if until:
+            clauses.append('s.timestamp <= ?')
+            params.append(until)
+        if before:
+            clauses.append('s.id < ?')
+            params.append(before)
+
+        terms = None
+        if text is not None:
+            if not self.fts:
+                raise RuntimeError('이 환경의 SQLite는 전문 검색(FTS5)을 지원하지 않습니다.')
+            terms = query_terms(text)
+            if not terms:
+                return [], None
+            # 색인(search_text)을 바깥 루프로 두고 rowid 역순으로 읽어 LIMIT만큼만 확인
+            clauses.insert(0, 'search_text MATCH ?')
+            params.insert(0, ' '.join(f'"{term}"' for term in terms))
+            sql = ('SELECT s.id, s.keyword, s.summary, s.news, s.timestamp FROM search_text '
+                   'JOIN searches s ON s.id = search_text.rowid '
+                   f"WHERE {' AND '.join(clauses)} ORDER BY search_text.rowid DESC LIMIT ?")
+        else:
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+            sql = f'SELECT s.id, s.keyword, s.summary, s.news, s.timestamp FROM searches s {where} ORDER BY s.id DESC LIMIT ?'
+
+        rows = self._conn().execute(sql, params + [limit + 1]).fetchall()
+        records = [{'id': row[0], 'keyword': row[1], 'summary': row[2], 'news': json.loads(row[3]),
+                    'timestamp': row[4]} for row in rows[:limit]]
+        if terms:
+            self._hydrate(records)
+            wanted = set(terms)
+            for record in records:
+                record['matches'] = [
+                    index for index, item in enumerate(record['news'])
+                    if wanted <= set(tokenize(f"{item.get('title', '')} {item.get('snippet', '')} {item.get('content', '')}"))
+                ]
+                for item in record['news']:
+                    item.pop('content', None)
+        return records, (records[-1]['id'] if len(rows) > limit else None)
+
+    def keyword_counts(self, since=None, limit=20):
+        """자주 검색된 키워드와 횟수 (인덱스만 사용)"""
+        params = []
+        where = ''
+        if since:
+            where = 'WHERE timestamp >= ?'
+            params.append(since)
+        rows = self._conn().execute(
+            f'SELECT MIN(keyword), COUNT(*) AS n FROM searches {where} '
+            'GROUP BY keyword_norm ORDER BY n DESC LIMIT ?',
+            params + [limit]
+        ).fetchall()
+        return [(row[0], row[1]) for row in rows]
+
+    def count(self):
+        return self._conn().execute('SELECT COUNT(*) FROM searches').fetchone()[0]
+
+    def compact(self, max_records=None, archive_path=None):
+        """가장 최근 max_records건만 남기고 정리. archive_path가 있으면 지운 기록을 JSON Lines로 보관"""
+        if not max_records or max_records <= 0:
+            return 0
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT id FROM searches ORDER BY id DESC LIMIT 1 OFFSET ?', (max_records - 1,)
+            ).fetchone()
+            if not row:
+                conn.execute('COMMIT')
+                return 0
+            cutoff = row[0]
+            archive = open(archive_path, 'a', encoding='utf-8') if archive_path else None
+            try:
+                last_id = 0
+                while True:
+                    batch = conn.execute(
+                        'SELECT id, keyword, summary, news, timestamp FROM searches WHERE id < ? AND id > ? '
+                        'ORDER BY id LIMIT ?', (cutoff, last_id, _UPGRADE_BATCH)
+                    ).fetchall()
+                    if not batch:
+                        break
+                    records = self._hydrate([{'id': old[0], 'keyword': old[1], 'summary': old[2],
+                                              'news': json.loads(old[3]), 'timestamp': old[4]} for old in batch])
+                    for record in records:
+                        self._index(conn, record['id'], record['keyword'], record['summary'], record['news'],
+                                    delete=True)
+                        if archive:
+                            for item in record['news']:
+                                item.pop('content_hash', None)
+                            archive.write(json.dumps({key: record[key] for key in ('keyword', 'summary', 'news', 'timestamp')},
+                                                     ensure_ascii=False) + '\n')
+                    last_id = batch[-1][0]
+            finally:
+                if archive:
+                    archive.close()
+            removed = conn.execute('DELETE FROM searches WHERE id < ?', (cutoff,)).rowcount
+            conn.execute('DELETE FROM search_articles WHERE search_id < ?', (cutoff,))
+            # 남은 기록 어디에서도 참조하지 않는 본문 제거
+            conn.execute('DELETE FROM articles WHERE NOT EXISTS '
+                         '(SELECT 1 FROM search_articles WHERE search_articles.hash = articles.hash)')
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        if removed:
+            conn.execute('VACUUM')
+        return removed
+
+    def migrate_from_json(self, path=LEGACY_HISTORY_FILE, force=False):
+        """기존 history.json(레코드 배열)을 한 번만 가져옴. 가져온 건수 반환
+
+        force=True면 이미 가져온 파일도 다시 읽되, 키워드와 시각이 같은 기록은 건너뜁니다.
+        """
+        if not os.path.exists(path):
+            return 0
+        conn = self._conn()
+        marker = f"migrated:{os.path.abspath(path)}"
+        if not force and conn.execute('SELECT 1 FROM meta WHERE key = ?', (marker,)).fetchone():
+            return 0
+
+        with open(path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+        if not isinstance(records, list):
+            records = []
+
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # 여러 워커가 동시에 시작한 경우 다른 프로세스가 먼저 가져왔을 수 있음
+            if not force and conn.execute('SELECT 1 FROM meta WHERE key = ?', (marker,)).fetchone():
+                conn.execute('COMMIT')
+                return 0
+            imported = 0
+            for record in records:
+                if not isinstance(record, dict) or not record.get('keyword'):
+                    continue
+                timestamp = record.get('timestamp') or utc_timestamp()
+                if force and conn.execute(
+                    'SELECT 1 FROM searches WHERE keyword_norm = ? AND timestamp = ? AND keyword = ?',
+                    (_normalize(record['keyword']), timestamp, record['keyword'])
+                ).fetchone():
+                    continue
+                self._insert(conn, record['keyword'], record.get('news') or [], record.get('summary'), timestamp)
+                imported += 1
+            conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (marker, utc_timestamp()))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return imported
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """공유 저장소 반환 (처음 열 때 history.json 가져오기)"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store = HistoryStore()
+                try:
+                    imported = store.migrate_from_json()
+                    if imported:
+                        print(f"history.json에서 히스토리 {imported}건을 가져왔습니다.")
+                except Exception as e:
+                    print(f"히스토리 가져오기 오류: {e}")
+                _store = store
+    return _store
+
+
+def main(argv):
+    if not argv or argv[0] not in ('migrate', 'compact'):
+        print(__doc__)
+        return 1
+    store = HistoryStore()
+    if argv[0] == 'migrate':
+        paths = [arg for arg in argv[1:] if arg != '--force']
+        path = paths[0] if paths else LEGACY_HISTORY_FILE
+        print(f"{store.migrate_from_json(path, force='--force' in argv)}건을 가져왔습니다.")
+    else:
+        max_records = HISTORY_MAX_RECORDS
+        if '--max-records' in argv:
+            max_records = int(argv[argv.index('--max-records') + 1])
+        archive = os.path.join(BASE_DIR, f"history-{datetime.utcnow():%Y%m%d%H%M%S}.jsonl")
+        removed = store.compact(max_records, archive_path=archive)
+        print(f"{removed}건을 {archive}로 옮기고 정리했습니다." if removed else "정리할 기록이 없습니다.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
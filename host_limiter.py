@@ -0,0 +1,171 @@
+"""호스트별 요청 속도 제한(토큰 버킷) + 429/503 적응형 감속 + 서킷 브레이커
+
+- 토큰 버킷: 호스트마다 초당 HOST_RATE개, 최대 HOST_BURST개까지 몰아서 요청
+- 429/503 응답: 그 호스트의 속도를 절반으로 줄이고 Retry-After 동안 요청 보류,
+  이후 정상 응답마다 조금씩 원래 속도로 회복 (AIMD)
+- 서킷 브레이커: 연속 HOST_CIRCUIT_FAILURES번 실패(연결 오류/시간 초과/5xx/429)하면
+  HOST_CIRCUIT_COOLDOWN초 동안 그 호스트 요청을 보내지 않고 바로 CircuitOpenError,
+  쿨다운이 끝나면 요청 하나만 시험 삼아 보내 성공하면 다시 열어 줌
+"""
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+
+HOST_RATE = float(os.getenv('HOST_RATE', '5'))                         # 호스트당 초당 요청 수
+HOST_BURST = float(os.getenv('HOST_BURST', '5'))                       # 몰아서 보낼 수 있는 요청 수
+HOST_MIN_RATE = float(os.getenv('HOST_MIN_RATE', '0.2'))               # 감속 하한(초당)
+HOST_MAX_WAIT = float(os.getenv('HOST_MAX_WAIT', '15'))                # 토큰/Retry-After 최대 대기(초)
+HOST_CIRCUIT_FAILURES = int(os.getenv('HOST_CIRCUIT_FAILURES', '5'))   # 서킷을 여는 연속 실패 수
+HOST_CIRCUIT_COOLDOWN = float(os.getenv('HOST_CIRCUIT_COOLDOWN', '60'))  # 서킷 열림 유지 시간(초)
+
+THROTTLE_STATUSES = (429, 503)
+FAILURE_STATUSES = (429, 500, 502, 503, 504)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """서킷이 열린 호스트로의 요청 - 네트워크 요청 없이 바로 실패"""
+
+
+def host_of(url):
+    return (urlsplit(url).hostname or '').lower()
+
+
+def parse_retry_after(value):
+    """Retry-After 헤더(초 또는 HTTP 날짜)를 초로 변환. 없거나 잘못되면 None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class _Host:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.state = CLOSED
+        self.failures = 0
+        self.open_until = 0.0
+        self.trial_in_flight = False
+        self.stats = {'requests': 0, 'throttled': 0, 'failures': 0, 'short_circuited': 0,
+                      'circuit_opens': 0, 'waited_seconds': 0.0}
+
+
+class HostLimiter:
+    def __init__(self, rate=HOST_RATE, burst=HOST_BURST, min_rate=HOST_MIN_RATE, max_wait=HOST_MAX_WAIT,
+                 failures=HOST_CIRCUIT_FAILURES, cooldown=HOST_CIRCUIT_COOLDOWN):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.min_rate = min_rate
+        self.max_wait = max_wait
+        self.failure_threshold = failures
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def _host(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _Host(self.rate, self.burst)
+        return state
+
+    def reserve(self, host):
+        """요청 하나를 예약하고 기다려야 할 시간(초)을 반환. 서킷이 열려 있으면 CircuitOpenError"""
+        with self._lock:
+            state = self._host(host)
+            now = time.monotonic()
+            if state.state == OPEN:
+                if now < state.open_until:
+                    state.stats['short_circuited'] += 1
+                    raise CircuitOpenError(f"{host} 요청 일시 중단 (연속 실패, {state.open_until - now:.0f}초 남음)")
+                state.state = HALF_OPEN
+            if state.state == HALF_OPEN:
+                if state.trial_in_flight:
+                    state.stats['short_circuited'] += 1
+                    raise CircuitOpenError(f"{host} 요청 일시 중단 (복구 확인 중)")
+                state.trial_in_flight = True
+
+            state.tokens = min(self.burst, state.tokens + (now - state.updated) * state.rate)
+            state.updated = now
+            state.tokens -= 1  # 음수면 그만큼 미래의 토큰을 미리 씀
+            wait = max(-state.tokens / state.rate if state.tokens < 0 else 0.0, state.blocked_until - now)
+            wait = min(wait, self.max_wait)
+            state.stats['requests'] += 1
+            state.stats['waited_seconds'] += wait
+            return wait
+
+    def acquire(self, host):
+        """토큰을 얻을 때까지 대기 (동기 코드용)"""
+        wait = self.reserve(host)
+        if wait > 0:
+            time.sleep(wait)
+
+    def cancel(self, host):
+        """응답 없이 중단된 요청 (비동기 취소 등) - 시험 요청 자리만 반납"""
+        with self._lock:
+            self._host(host).trial_in_flight = False
+
+    def record(self, host, status=None, error=None, retry_after=None):
+        """응답 상태 코드 또는 예외를 기록해 속도와 서킷 상태를 조정"""
+        failed = error is not None or status in FAILURE_STATUSES
+        with self._lock:
+            state = self._host(host)
+            now = time.monotonic()
+            state.trial_in_flight = False
+
+            if status in THROTTLE_STATUSES:
+                state.stats['throttled'] += 1
+                state.rate = max(self.min_rate, state.rate / 2)
+                delay = parse_retry_after(retry_after)
+                if delay is None:
+                    delay = 1.0 / state.rate
+                state.blocked_until = max(state.blocked_until, now + min(delay, self.max_wait))
+            elif not failed:
+                state.rate = min(self.rate, state.rate + self.rate * 0.1)
+
+            if failed:
+                state.stats['failures'] += 1
+                state.failures += 1
+                if state.state == HALF_OPEN or state.failures >= self.failure_threshold:
+                    state.state = OPEN
+                    state.open_until = now + self.cooldown
+                    state.stats['circuit_opens'] += 1
+                    print(f"{host} 연속 실패 {state.failures}회 - {self.cooldown:.0f}초 동안 요청 중단")
+            else:
+                state.failures = 0
+                state.state = CLOSED
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            hosts = {}
+            for host, state in self._hosts.items():
+                entry = dict(state.stats, waited_seconds=round(state.stats['waited_seconds'], 3))
+                entry['rate'] = round(state.rate, 3)
+                entry['circuit'] = state.state
+                if state.state == OPEN:
+                    entry['reopens_in_s'] = round(max(0.0, state.open_until - now), 1)
+                hosts[host] = entry
+        return hosts
+
+
+_limiter = HostLimiter()
+
+
+def get_limiter():
+    return _limiter
@@ -0,0 +1,114 @@
+"""공유 HTTP 클라이언트 - 커넥션 풀/keep-alive/재시도/호스트별 속도 제한을 적용한 requests.Session 래퍼"""
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import host_limiter
+from host_limiter import CircuitOpenError  # noqa: F401 (호출하는 쪽에서 http_client.CircuitOpenError로 사용)
+
+# 커넥션 풀 설정 (환경변수로 조정 가능)
+HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '32'))  # 유지할 호스트별 풀 개수
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '8'))           # 호스트당 최대 연결 수
+HTTP_POOL_BLOCK = os.getenv('HTTP_POOL_BLOCK', '1') == '1'             # 한도 초과 시 새 연결 대신 대기
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', '2'))                     # 일시적 오류 재시도 횟수
+HTTP_BACKOFF = float(os.getenv('HTTP_BACKOFF', '0.3'))                 # 재시도 간격 계수(초)
+HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', '10'))                  # 기본 요청 제한 시간(초)
+
+RETRY_STATUSES = (500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _build_session():
+    retry = Retry(
+        total=HTTP_RETRIES,
+        connect=HTTP_RETRIES,
+        read=HTTP_RETRIES,
+        status=HTTP_RETRIES,
+        backoff_factor=HTTP_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        pool_block=HTTP_POOL_BLOCK,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session():
+    """프로세스 전체에서 공유하는 Session 반환 (최초 호출 시 생성)"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def _limited(method, url, **kwargs):
+    """호스트 토큰을 얻은 뒤 요청하고 결과(상태 코드/예외)를 제한기에 기록"""
+    limiter = host_limiter.get_limiter()
+    host = host_limiter.host_of(url)
+    limiter.acquire(host)
+    try:
+        response = get_session().request(method, url, **kwargs)
+    except requests.RequestException as e:
+        limiter.record(host, error=e)
+        raise
+    limiter.record(host, status=response.status_code, retry_after=response.headers.get('Retry-After'))
+    return response
+
+
+def get(url, headers=None, timeout=None, **kwargs):
+    """공유 Session으로 GET 요청 (timeout 미지정 시 HTTP_TIMEOUT 사용)"""
+    return _limited('GET', url, headers=headers, timeout=timeout or HTTP_TIMEOUT, **kwargs)
+
+
+def post(url, data=None, headers=None, timeout=None, **kwargs):
+    """공유 Session으로 POST 요청 (재시도는 GET/HEAD에만 적용)"""
+    return _limited('POST', url, data=data, headers=headers, timeout=timeout or HTTP_TIMEOUT, **kwargs)
+
+
+def connection_stats():
+    """호스트별 요청 수/새 연결 수/재사용 수 집계
+
+    urllib3 커넥션 풀이 기록하는 num_requests, num_connections 값을 사용하므로
+    '재사용 = 요청 수 - 새 연결 수'가 keep-alive로 절약한 TCP/TLS 핸드셰이크 수입니다.
+    """
+    hosts = {}
+    if _session is None:
+        return {'requests': 0, 'new_connections': 0, 'reused': 0, 'hosts': hosts}
+
+    seen = set()
+    for adapter in _session.adapters.values():
+        if id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+        pools = adapter.poolmanager.pools
+        with pools.lock:
+            pool_list = list(pools._container.values())
+        for pool in pool_list:
+            host = f"{pool.scheme}://{pool.host}"
+            entry = hosts.setdefault(host, {'requests': 0, 'new_connections': 0, 'reused': 0})
+            entry['requests'] += pool.num_requests
+            entry['new_connections'] += pool.num_connections
+            entry['reused'] += max(0, pool.num_requests - pool.num_connections)
+
+    return {
+        'requests': sum(h['requests'] for h in hosts.values()),
+        'new_connections': sum(h['new_connections'] for h in hosts.values()),
+        'reused': sum(h['reused'] for h in hosts.values()),
+        'hosts': hosts,
+    }
@@ -0,0 +1,78 @@
+"""응답 압축 - Accept-Encoding에 맞춰 brotli(설치된 경우) 또는 gzip으로 본문 압축
+
+Flask(after_request)와 ASGI 서버가 함께 사용합니다. 작은 응답(COMPRESS_MIN_BYTES 미만),
+압축해도 효과가 없는 형식, 스트리밍 응답은 압축하지 않습니다.
+"""
+import gzip
+import os
+
+import tracing
+
+try:
+    import brotli
+except ImportError:  # brotli가 없으면 gzip만 사용
+    brotli = None
+
+RESPONSE_COMPRESSION = os.getenv('RESPONSE_COMPRESSION', '1') == '1'   # 0이면 압축하지 않음
+COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', '1024'))      # 이보다 작은 응답은 그대로
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', '6'))                         # gzip 압축 수준 (1~9)
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', '5'))                 # brotli 품질 (0~11, 높을수록 느림)
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript')
+
+
+def parse_accept_encoding(header):
+    """Accept-Encoding 헤더 → {인코딩: q값}"""
+    codings = {}
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings[name] = q
+    return codings
+
+
+def choose_encoding(accept_encoding):
+    """클라이언트가 받는 인코딩 중 br(brotli 설치 시) > gzip 순으로 선택. 압축하지 않으면 None"""
+    if not RESPONSE_COMPRESSION:
+        return None
+    codings = parse_accept_encoding(accept_encoding)
+    candidates = (['br'] if brotli is not None else []) + ['gzip']
+    accepted = [name for name in candidates if codings.get(name, codings.get('*', 0.0)) > 0]
+    if not accepted:
+        return None
+    return max(accepted, key=lambda name: codings.get(name, codings.get('*', 0.0)))  # 같은 q면 앞(br) 우선
+
+
+def compressible(content_type, size):
+    mimetype = (content_type or '').split(';')[0].strip().lower()
+    return size >= COMPRESS_MIN_BYTES and mimetype in COMPRESSIBLE_TYPES
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def encode_body(body, content_type, accept_encoding):
+    """(보낼 본문, Content-Encoding 값 또는 None). 보내기 전/후 바이트 수를 news_response_bytes_total에 기록"""
+    encoding = choose_encoding(accept_encoding) if compressible(content_type, len(body)) else None
+    tracing.count('response_bytes', len(body), kind='raw')
+    if encoding:
+        compressed = compress(body, encoding)
+        if len(compressed) < len(body):
+            body = compressed
+        else:
+            encoding = None
+    tracing.count('response_bytes', len(body), kind=encoding or 'identity')
+    return body, encoding
@@ -0,0 +1,220 @@
+"""관심 키워드 백그라운드 프리페치 - 자주 찾는 키워드를 미리 검색해 캐시를 데워 둠
+
+대상 키워드: PREFETCH_KEYWORDS(쉼표 구분) + 최근 PREFETCH_TRENDING_DAYS일 동안 많이 검색된 상위 PREFETCH_TRENDING개
+스케줄러가 PREFETCH_INTERVAL초마다 마지막 갱신 후 PREFETCH_REFRESH_AGE초가 지난 키워드를 큐에 넣고,
+작업 스레드가 한 시간에 PREFETCH_MAX_PER_HOUR회를 넘지 않게 하나씩 검색합니다.
+
+- 서버 프로세스 안 (PREFETCH_ENABLED=1): 결과 캐시까지 데워 /search가 바로 캐시 적중
+- 별도 워커 (python prefetch.py): 디스크 캐시(기사 본문, 링크 해석, 요약)를 데움
+
+사용법:
+    python prefetch.py                # 계속 실행
+    python prefetch.py --once         # 대상 키워드를 한 번씩만 검색하고 종료
+"""
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+import history_store
+from result_cache import normalize_keyword
+
+PREFETCH_ENABLED = os.getenv('PREFETCH_ENABLED', '0') == '1'
+PREFETCH_KEYWORDS = [k.strip() for k in os.getenv('PREFETCH_KEYWORDS', '').split(',') if k.strip()]
+PREFETCH_TRENDING = int(os.getenv('PREFETCH_TRENDING', '5'))                  # 히스토리 인기 키워드 수
+PREFETCH_TRENDING_DAYS = float(os.getenv('PREFETCH_TRENDING_DAYS', '7'))      # 인기 키워드 집계 기간(일)
+PREFETCH_INTERVAL = float(os.getenv('PREFETCH_INTERVAL', '60'))               # 스케줄 확인 간격(초)
+PREFETCH_REFRESH_AGE = float(os.getenv('PREFETCH_REFRESH_AGE', '240'))        # 이 시간(초)이 지난 키워드를 다시 검색
+PREFETCH_MAX_PER_HOUR = int(os.getenv('PREFETCH_MAX_PER_HOUR', '60'))         # 시간당 최대 프리페치 검색 수
+
+
+def trending_keywords(limit=PREFETCH_TRENDING, days=PREFETCH_TRENDING_DAYS):
+    """검색 히스토리에서 최근 많이 검색된 키워드"""
+    if limit <= 0:
+        return []
+    since = (datetime.utcnow() - timedelta(days=days)).isoformat() + "Z"
+    try:
+        return [keyword for keyword, _ in history_store.get_store().keyword_counts(since=since, limit=limit)]
+    except Exception as e:
+        print(f"인기 키워드 조회 오류: {e}")
+        return []
+
+
+class Prefetcher:
+    """스케줄러 스레드 + 작업 스레드 하나. warm(keyword)는 검색을 실행해 캐시를 채우고 결과 유무를 반환"""
+
+    def __init__(self, warm, keywords=None, trending=PREFETCH_TRENDING, interval=PREFETCH_INTERVAL,
+                 refresh_age=PREFETCH_REFRESH_AGE, max_per_hour=PREFETCH_MAX_PER_HOUR):
+        self.warm = warm
+        self.keywords = list(PREFETCH_KEYWORDS if keywords is None else keywords)
+        self.trending = trending
+        self.interval = interval
+        self.refresh_age = refresh_age
+        self.max_per_hour = max_per_hour
+        self._queue = queue.Queue()
+        self._queued = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+        self._runs = deque()         # 최근 1시간 검색 시각 (예산 계산)
+        self._status = {}            # 정규화 키워드 -> 상태 dict
+        self._in_progress = None
+        self._next_schedule = None
+
+    def watchlist(self):
+        """설정 키워드 + 인기 키워드 (중복 제거, 설정 키워드 우선)"""
+        seen = set()
+        keywords = []
+        for keyword in self.keywords + trending_keywords(self.trending):
+            norm = normalize_keyword(keyword)
+            if norm and norm not in seen:
+                seen.add(norm)
+                keywords.append(keyword)
+        return keywords
+
+    def schedule(self):
+        """갱신할 때가 된 키워드를 큐에 넣고 넣은 개수 반환"""
+        now = time.time()
+        added = 0
+        for keyword in self.watchlist():
+            norm = normalize_keyword(keyword)
+            with self._lock:
+                last = self._status.get(norm, {}).get('last_refresh_ts', 0)
+                if norm in self._queued or now - last < self.refresh_age:
+                    continue
+                self._queued.add(norm)
+            self._queue.put(keyword)
+            added += 1
+        return added
+
+    def _wait_for_budget(self):
+        """시간당 예산을 넘으면 가장 오래된 실행이 1시간을 지날 때까지 대기. 중지되면 False"""
+        while not self._stop.is_set():
+            with self._lock:
+                now = time.time()
+                while self._runs and now - self._runs[0] >= 3600:
+                    self._runs.popleft()
+                if len(self._runs) < self.max_per_hour:
+                    self._runs.append(now)
+                    return True
+                wait = 3600 - (now - self._runs[0])
+            self._stop.wait(min(wait, self.interval))
+        return False
+
+    def refresh(self, keyword):
+        """키워드 하나를 검색해 캐시를 데우고 상태 기록"""
+        norm = normalize_keyword(keyword)
+        started = time.time()
+        with self._lock:
+            self._in_progress = keyword
+        try:
+            found = self.warm(keyword)
+            result, error = ('ok' if found else 'empty'), None
+        except Exception as e:
+            print(f"프리페치 오류 ({keyword}): {e}")
+            result, error = 'error', str(e)
+        with self._lock:
+            self._in_progress = None
+            self._queued.discard(norm)
+            entry = self._status.setdefault(norm, {'keyword': keyword, 'refreshes': 0, 'errors': 0})
+            entry['refreshes'] += 1
+            entry['errors'] += 1 if error else 0
+            entry['last_refresh_ts'] = started
+            entry['last_refresh'] = datetime.utcfromtimestamp(started).isoformat() + "Z"
+            entry['last_duration_s'] = round(time.time() - started, 3)
+            entry['last_result'] = result
+            entry['last_error'] = error
+
+    def _worker(self):
+        while not self._stop.is_set():
+            try:
+                keyword = self._queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            if not self._wait_for_budget():
+                return
+            self.refresh(keyword)
+
+    def _scheduler(self):
+        while not self._stop.is_set():
+            try:
+                self.schedule()
+            except Exception as e:
+                print(f"프리페치 스케줄 오류: {e}")
+            self._next_schedule = time.time() + self.interval
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._scheduler, name='prefetch-scheduler', daemon=True),
+            threading.Thread(target=self._worker, name='prefetch-worker', daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+    def run_once(self):
+        """대상 키워드를 예산 안에서 한 번씩 검색 (스레드 없이)"""
+        self.schedule()
+        while not self._queue.empty():
+            keyword = self._queue.get_nowait()
+            if not self._wait_for_budget():
+                break
+            self.refresh(keyword)
+
+    def status(self):
+        with self._lock:
+            now = time.time()
+            used = sum(1 for t in self._runs if now - t < 3600)
+            keywords = [{k: v for k, v in entry.items() if k != 'last_refresh_ts'} for entry in self._status.values()]
+            return {
+                'running': bool(self._threads) and not self._stop.is_set(),
+                'queue_depth': self._queue.qsize(),
+                'in_progress': self._in_progress,
+                'next_schedule_in_s': round(max(0.0, self._next_schedule - now), 1) if self._next_schedule else None,
+                'budget': {'max_per_hour': self.max_per_hour, 'used_last_hour': used},
+                'keywords': keywords,
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--once', action='store_true', help='대상 키워드를 한 번씩만 검색하고 종료')
+    parser.add_argument('--keywords', help='쉼표로 구분한 키워드 (PREFETCH_KEYWORDS 대신 사용)')
+    args = parser.parse_args()
+
+    # 워커로 실행할 때만 앱 모듈을 불러오고, 앱 쪽 프리페처는 띄우지 않음
+    os.environ['PREFETCH_ENABLED'] = '0'
+    import app as news_app
+
+    keywords = [k.strip() for k in args.keywords.split(',') if k.strip()] if args.keywords else None
+    prefetcher = Prefetcher(news_app.warm_search, keywords=keywords)
+    if args.once:
+        prefetcher.run_once()
+    else:
+        prefetcher.start()
+        try:
+            while True:
+                time.sleep(60)
+                print(f"프리페치 상태: 대기 {prefetcher.status()['queue_depth']}건")
+        except KeyboardInterrupt:
+            prefetcher.stop()
+    for entry in prefetcher.status()['keywords']:
+        print(f"{entry['keyword']}: {entry['last_result']} ({entry['last_duration_s']}초)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""Gemini 프롬프트 토큰 예산 - 기사 컨텍스트를 정리/중복 제거해 예산 안에서 관련 높은 문장부터 채움
+
+- 토큰 수는 글자 종류별 근사치로 추정 (한글 약 1.5자당 1토큰, 그 외 약 4자당 1토큰)
+- URL, HTML 태그/엔티티, 구글 뉴스 안내 문구 같은 상투 문구는 프롬프트에서 제거
+- 같은 문장이나 거의 같은 문장(용어 겹침 비율 기준)은 한 번만 넣음
+- 호출마다 실제 프롬프트/응답 토큰 수(usage_metadata)를 로그로 남기고 /stats용으로 집계
+"""
+import html
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from news_index import tokenize
+
+PROMPT_SUMMARY_BUDGET = int(os.getenv('PROMPT_SUMMARY_BUDGET', '1500'))  # 요약 프롬프트 기사 컨텍스트 토큰 예산
+PROMPT_CHAT_BUDGET = int(os.getenv('PROMPT_CHAT_BUDGET', '1200'))        # 대화 프롬프트 기사 컨텍스트 토큰 예산
+NEAR_DUPLICATE_RATIO = 0.8   # 용어 겹침 비율이 이 이상이면 같은 문장으로 봄
+
+BOILERPLATE_PATTERNS = [
+    r'Google 뉴스가 전세계 매체로부터 종합한 최신 뉴스',
+    r'Comprehensive up-to-date news coverage, aggregated from sources all over the world by Google News\.?',
+    r'무단\s*전재\s*(및|밎)?\s*재배포\s*금지',
+    r'저작권자\s*[ⓒ©(][^\n]{0,40}',
+    r'Copyright\s*[ⓒ©(][^\n]{0,60}',
+    r'All rights reserved\.?',
+]
+
+_BOILERPLATE_RE = re.compile('|'.join(f'(?:{p})' for p in BOILERPLATE_PATTERNS), re.I)
+_URL_RE = re.compile(r'(?:https?://|www\.)\S+', re.I)
+_TAG_RE = re.compile(r'<[^>]+>|<[^>]*$')  # 잘린 채 끝나는 태그 포함
+_SPACE_RE = re.compile(r'\s+')
+_SENTENCE_RE = re.compile(r'(?<=[.!?。])\s+|\n+')
+_HANGUL_RE = re.compile(r'[가-힣ㄱ-ㅎㅏ-ㅣ]')
+_NORMALIZE_RE = re.compile(r'[\W_]+')
+
+# 기사 한 건의 번호/머리말("1. 제목: ", "   내용: ") 토큰 근사치
+_SECTION_OVERHEAD = 6
+
+
+def estimate_tokens(text):
+    """토큰 수 근사치 (요청 없이 계산)"""
+    if not text:
+        return 0
+    hangul = len(_HANGUL_RE.findall(text))
+    return int(hangul / 1.5 + (len(text) - hangul) / 4) + 1
+
+
+def clean_text(text):
+    """HTML 엔티티/태그, URL, 상투 문구를 지우고 공백 정리"""
+    if not text:
+        return ''
+    text = _TAG_RE.sub(' ', html.unescape(html.unescape(text)))
+    text = _URL_RE.sub(' ', text)
+    text = _BOILERPLATE_RE.sub(' ', text)
+    return _SPACE_RE.sub(' ', text).strip()
+
+
+def split_sentences(text):
+    return [s.strip() for s in _SENTENCE_RE.split(text or '') if len(s.strip()) > 1]
+
+
+class _Deduplicator:
+    """이미 넣은 문장과 같거나 거의 같은 문장 판별"""
+
+    def __init__(self, ratio=NEAR_DUPLICATE_RATIO):
+        self.ratio = ratio
+        self._exact = set()
+        self._term_sets = []
+
+    def seen(self, sentence):
+        key = _NORMALIZE_RE.sub('', sentence.lower())
+        if not key or key in self._exact:
+            return True
+        terms = set(tokenize(sentence))
+        if terms:
+            for other in self._term_sets:
+                overlap = len(terms & other)
+                if overlap and overlap / min(len(terms), len(other)) >= self.ratio:
+                    return True
+        self._exact.add(key)
+        self._term_sets.append(terms)
+        return False
+
+
+def _article_sentences(item):
+    return (split_sentences(clean_text(item.get('content')))
+            or split_sentences(clean_text(item.get('snippet'))))
+
+
+def _round_robin(news_items):
+    """기사마다 앞 문장부터 번갈아 (기사 번호, 문장) - 모든 기사가 고르게 예산을 나눠 씀"""
+    sentences = [_article_sentences(item) for item in news_items]
+    for position in range(max((len(s) for s in sentences), default=0)):
+        for doc, article in enumerate(sentences):
+            if position < len(article):
+                yield doc, article[position]
+
+
+def pack_news(news_items, budget_tokens, passages=None):
+    """기사 컨텍스트를 토큰 예산 안에서 구성해 (텍스트, 추정 토큰 수) 반환
+
+    passages가 없으면 모든 기사 제목을 넣고 기사별 앞 문장부터 고르게 채웁니다 (요약용).
+    passages에 관련도 순 (기사 번호, 문단 텍스트) 목록을 주면 그 순서대로 채우고,
+    문장이 들어간 기사만 제목과 함께 넣습니다 (대화용).
+    """
+    dedup = _Deduplicator()
+    sections = OrderedDict()  # 기사 번호 -> (제목, 문장 목록)
+    used = 0
+
+    def open_section(doc):
+        nonlocal used
+        title = clean_text(news_items[doc].get('title', ''))
+        cost = estimate_tokens(title) + _SECTION_OVERHEAD
+        if used + cost > budget_tokens:
+            return False
+        dedup.seen(title)  # 본문 첫 문장이 제목을 반복하는 경우 제거
+        sections[doc] = (title, [])
+        used += cost
+        return True
+
+    if passages is None:
+        for doc in range(len(news_items)):
+            open_section(doc)
+        candidates = _round_robin(news_items)
+    else:
+        candidates = ((doc, sentence) for doc, text in passages for sentence in split_sentences(clean_text(text)))
+
+    for doc, sentence in candidates:
+        cost = estimate_tokens(sentence)
+        if used + cost > budget_tokens:
+            continue  # 더 짧은 문장은 아직 들어갈 수 있음
+        if doc not in sections and not open_section(doc):
+            continue
+        if used + cost > budget_tokens or dedup.seen(sentence):
+            continue
+        sections[doc][1].append(sentence)
+        used += cost
+
+    order = sorted(sections) if passages is None else list(sections)
+    lines = []
+    for number, doc in enumerate(order, 1):
+        title, sentences = sections[doc]
+        line = f"{number}. 제목: {title}"
+        if sentences:
+            line += f"\n   내용: {' '.join(sentences)}"
+        lines.append(line)
+    return "\n\n".join(lines), used
+
+
+_usage_lock = threading.Lock()
+_usage = {}
+
+
+def record_usage(kind, prompt, response, elapsed):
+    """Gemini 호출 한 번의 토큰 사용량을 로그로 남기고 종류별로 집계"""
+    estimated = estimate_tokens(prompt)
+    prompt_tokens = response_tokens = 0
+    try:
+        meta = getattr(response, 'usage_metadata', None)
+        prompt_tokens = getattr(meta, 'prompt_token_count', 0) or 0
+        response_tokens = getattr(meta, 'candidates_token_count', 0) or 0
+    except Exception:
+        pass
+    print(f"Gemini 사용량 [{kind}] 프롬프트 {prompt_tokens}토큰 (추정 {estimated}) / 응답 {response_tokens}토큰 / {elapsed:.2f}초")
+
+    with _usage_lock:
+        entry = _usage.setdefault(kind, {'calls': 0, 'prompt_tokens': 0, 'estimated_prompt_tokens': 0,
+                                         'response_tokens': 0, 'seconds': 0.0})
+        entry['calls'] += 1
+        entry['prompt_tokens'] += prompt_tokens
+        entry['estimated_prompt_tokens'] += estimated
+        entry['response_tokens'] += response_tokens
+        entry['seconds'] += elapsed
+
+
+def usage_stats():
+    with _usage_lock:
+        stats = {kind: dict(entry) for kind, entry in _usage.items()}
+    for entry in stats.values():
+        entry['avg_prompt_tokens'] = round(entry['prompt_tokens'] / entry['calls'], 1)
+        entry['avg_seconds'] = round(entry['seconds'] / entry['calls'], 3)
+        entry['seconds'] = round(entry['seconds'], 3)
+    return stats
@@ -0,0 +1,253 @@
+"""키워드 검색 결과 캐시 - stale-while-revalidate + 동일 요청 합치기(single flight)
+
+- 신선 구간(RESULT_CACHE_FRESH) 안: 캐시된 결과를 바로 반환
+- 오래된 구간(RESULT_CACHE_STALE) 안: 캐시된 결과를 반환하고 백그라운드에서 갱신
+- 그 이후 또는 캐시 없음: 새로 계산. 같은 키를 동시에 요청하면 계산은 한 번만 수행
+"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+RESULT_CACHE_ENABLED = os.getenv('RESULT_CACHE_ENABLED', '1') == '1'
+RESULT_CACHE_FRESH = float(os.getenv('RESULT_CACHE_FRESH', '300'))        # 신선 구간(초)
+RESULT_CACHE_STALE = float(os.getenv('RESULT_CACHE_STALE', '3600'))       # 오래된 결과 제공 한도(초)
+RESULT_CACHE_MAX_KEYS = int(os.getenv('RESULT_CACHE_MAX_KEYS', '256'))    # 최대 키 수 (LRU)
+
+FRESH = 'HIT'
+STALE = 'STALE'
+MISS = 'MISS'
+SHARED = 'SHARED'
+
+
+class Abandoned(Exception):
+    """claim()으로 맡은 계산을 결과 없이 그만둠 (스트림 연결 끊김 등) - 기다리던 요청은 다시 계산"""
+
+
+def normalize_keyword(keyword):
+    """공백 정리 + 대소문자 무시한 키워드"""
+    return re.sub(r'\s+', ' ', (keyword or '').strip()).casefold()
+
+
+def make_key(keyword, hl='ko', gl='KR', num_results=10):
+    return (normalize_keyword(keyword), hl, gl, int(num_results))
+
+
+class ResultCache:
+    def __init__(self, fresh=RESULT_CACHE_FRESH, stale=RESULT_CACHE_STALE, max_keys=RESULT_CACHE_MAX_KEYS):
+        self.fresh = fresh
+        self.stale = stale
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, stored_at)
+        self._inflight = {}            # key -> Future
+        self._stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'shared': 0,
+                       'refreshes': 0, 'refresh_errors': 0}
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+
+    def _run(self, key, compute, future):
+        """compute 실행 후 결과를 캐시에 넣고 대기 중인 요청들에 전달"""
+        try:
+            value = compute()
+            if value is not None:
+                self._store(key, value)
+            future.set_result(value)
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _refresh_in_background(self, key, compute):
+        with self._lock:
+            if key in self._inflight:
+                return
+            future = Future()
+            self._inflight[key] = future
+            self._stats['refreshes'] += 1
+
+        def worker():
+            self._run(key, compute, future)
+            if future.exception() is not None:
+                with self._lock:
+                    self._stats['refresh_errors'] += 1
+                print(f"검색 결과 캐시 갱신 오류 ({key[0]}): {future.exception()}")
+
+        threading.Thread(target=worker, name='result-cache-refresh', daemon=True).start()
+
+    def get_or_compute(self, key, compute):
+        """(결과, 상태) 반환. 상태는 HIT / STALE / MISS / SHARED
+
+        compute가 None을 반환하면 (예: 검색 결과 없음) 캐시하지 않습니다.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                age = time.monotonic() - stored_at
+                if age <= self.fresh:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return value, FRESH
+                if age <= self.stale:
+                    self._entries.move_to_end(key)
+                    self._stats['stale_hits'] += 1
+                    serve_stale = True
+                else:
+                    del self._entries[key]
+                    serve_stale = False
+            else:
+                serve_stale = False
+
+            if not serve_stale:
+                future = self._inflight.get(key)
+                if future is not None:
+                    self._stats['shared'] += 1
+                    owner = False
+                else:
+                    future = Future()
+                    self._inflight[key] = future
+                    self._stats['misses'] += 1
+                    owner = True
+
+        if serve_stale:
+            self._refresh_in_background(key, compute)
+            return value, STALE
+
+        if owner:
+            self._run(key, compute, future)
+            return future.result(), MISS
+        try:
+            return future.result(), SHARED
+        except Abandoned:
+            return self.get_or_compute(key, compute)
+
+    def claim(self, key):
+        """캐시 밖에서 직접 계산(스트리밍 등)하기 전에 호출 - (Future, 직접 계산할 차례인지)
+
+        같은 키를 이미 계산 중이면 그 Future를 돌려주고, 아니면 새 Future를 등록합니다.
+        직접 계산하게 된 쪽은 끝나면 반드시 settle()을 호출해야 합니다.
+        중간에 그만두면 error=Abandoned()로 settle해 기다리던 요청이 다시 계산하게 합니다.
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self._stats['shared'] += 1
+                return future, False
+            future = self._inflight[key] = Future()
+            self._stats['misses'] += 1
+            return future, True
+
+    def settle(self, key, future, value=None, error=None):
+        """claim()으로 맡은 계산 종료 - 결과를 캐시하고 기다리는 요청들에 전달"""
+        if error is None and value is not None:
+            self._store(key, value)
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(value)
+
+    def note(self, status):
+        """캐시 밖(비동기 서버 등)에서 처리한 조회 결과를 통계에 반영"""
+        key = {FRESH: 'hits', STALE: 'stale_hits', MISS: 'misses', SHARED: 'shared'}.get(status)
+        if key:
+            with self._lock:
+                self._stats[key] += 1
+
+    def peek(self, key):
+        """오래된 구간 안의 캐시 값을 (값, 상태)로 반환. 없으면 (None, MISS), 통계는 세지 않음"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None, MISS
+        value, stored_at = entry
+        age = time.monotonic() - stored_at
+        if age <= self.fresh:
+            return value, FRESH
+        if age <= self.stale:
+            return value, STALE
+        return None, MISS
+
+    def put(self, key, value):
+        if value is not None:
+            self._store(key, value)
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['keys'] = len(self._entries)
+            stats['inflight'] = len(self._inflight)
+        lookups = stats['hits'] + stats['stale_hits'] + stats['misses'] + stats['shared']
+        stats['hit_rate'] = round((lookups - stats['misses']) / lookups, 3) if lookups else 0.0
+        return stats
+
+
+_cache = ResultCache()
+
+
+def get_or_compute(key, compute):
+    """공유 캐시로 결과 조회/계산. 캐시가 꺼져 있으면 매번 계산"""
+    if not RESULT_CACHE_ENABLED:
+        return compute(), MISS
+    return _cache.get_or_compute(key, compute)
+
+
+def peek(key):
+    if not RESULT_CACHE_ENABLED:
+        return None, MISS
+    return _cache.peek(key)
+
+
+def claim(key):
+    if not RESULT_CACHE_ENABLED:
+        return Future(), True
+    return _cache.claim(key)
+
+
+def settle(key, future, value=None, error=None):
+    if RESULT_CACHE_ENABLED:
+        _cache.settle(key, future, value, error)
+
+
+def note(status):
+    if RESULT_CACHE_ENABLED:
+        _cache.note(status)
+
+
+def refresh(key, compute):
+    """백그라운드에서 다시 계산 (이미 진행 중이면 무시)"""
+    if RESULT_CACHE_ENABLED:
+        _cache._refresh_in_background(key, compute)
+
+
+def put(key, value):
+    if RESULT_CACHE_ENABLED:
+        _cache.put(key, value)
+
+
+def invalidate(key=None):
+    _cache.invalidate(key)
+
+
+def stats():
+    if not RESULT_CACHE_ENABLED:
+        return {'enabled': False}
+    return dict(_cache.stats(), enabled=True)
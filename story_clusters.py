@@ -0,0 +1,173 @@
+"""같은 사건 기사 묶기 - 여러 매체가 낸 같은 소식은 대표 기사 하나만 본문 수집/요약
+
+1단계(본문 수집 전): 묶음의 대표(첫) 기사 제목과 MinHash로 추정한 글자 2-gram 자카드 유사도가
+  STORY_TITLE_THRESHOLD 이상이면 같은 묶음 (멤버끼리 사슬처럼 이어 붙지 않도록 대표 기사하고만 비교)
+2단계(본문 수집 후): 본문 SimHash 해밍 거리가 STORY_BODY_DISTANCE 이하인 대표 기사끼리 다시 묶음
+묶인 기사는 대표 기사의 'duplicates'에 제목/링크/출처만 남깁니다.
+"""
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import threading
+import zlib
+
+from news_index import tokenize
+from prompt_budget import clean_text
+
+STORY_CLUSTERING = os.getenv('STORY_CLUSTERING', '1') == '1'
+STORY_TITLE_THRESHOLD = float(os.getenv('STORY_TITLE_THRESHOLD', '0.5'))   # 제목 유사도(자카드) 기준
+STORY_BODY_DISTANCE = int(os.getenv('STORY_BODY_DISTANCE', '6'))          # 본문 SimHash 해밍 거리 기준
+MINHASH_PERMUTATIONS = 64
+TITLE_MIN_SHINGLES = 4   # 키워드/말머리를 빼고 남은 2-gram이 이보다 적은 제목('[인사] 키워드' 등)은 제목으로 묶지 않음
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240601)  # 프로세스마다 같은 서명이 나오도록 고정 시드
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(MINHASH_PERMUTATIONS)]
+
+# 제목 앞 말머리 중 내용과 무관한 것 ([속보], [종합] 등)
+_TAG_RE = re.compile(r'[\[(【<](속보|종합|단독|컨콜|포토|영상|사진|오늘의\s*IR|1보|2보|상보)[\])】>]|\((종합\d*)\)')
+_SOURCE_SUFFIX_RE = re.compile(r'\s+-\s+[^-]+$')
+_NORMALIZE_RE = re.compile(r'[\W_]+')
+
+_stats_lock = threading.Lock()
+_stats = {'clustered_searches': 0, 'title_merged': 0, 'body_merged': 0, 'fetches_skipped': 0}
+
+
+def _count(key, amount=1):
+    with _stats_lock:
+        _stats[key] += amount
+
+
+def title_shingles(title, keyword='', source=''):
+    """출처/말머리/검색 키워드를 뺀 제목의 글자 2-gram 집합"""
+    title = title or ''
+    if source and title.endswith(f" - {source}"):
+        title = title[:-len(source) - 3]
+    else:
+        title = _SOURCE_SUFFIX_RE.sub('', title)
+    text = _NORMALIZE_RE.sub('', _TAG_RE.sub(' ', title).lower())
+    keyword = _NORMALIZE_RE.sub('', (keyword or '').lower())
+    if keyword:
+        text = text.replace(keyword, '')  # 모든 기사에 들어 있는 키워드는 유사도를 부풀림
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def minhash(shingles):
+    """MinHash 서명 (빈 집합이면 None)"""
+    if not shingles:
+        return None
+    values = [zlib.crc32(s.encode('utf-8')) for s in shingles]
+    return tuple(min((a * v + b) % _PRIME for v in values) for a, b in _PERMUTATIONS)
+
+
+def estimate_jaccard(a, b):
+    if a is None or b is None:
+        return 0.0
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+def simhash(text):
+    """64비트 SimHash (용어 빈도 가중)"""
+    weights = [0] * 64
+    counts = {}
+    for term in tokenize(text):
+        counts[term] = counts.get(term, 0) + 1
+    if not counts:
+        return None
+    for term, count in counts.items():
+        value = int.from_bytes(hashlib.blake2b(term.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(64):
+            weights[bit] += count if value >> bit & 1 else -count
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def _duplicate_entry(item):
+    return {'title': item.get('title', ''), 'link': item.get('link', ''), 'source': item.get('source', '')}
+
+
+def _merge(representative, item):
+    duplicates = representative.setdefault('duplicates', [])
+    duplicates.append(_duplicate_entry(item))
+    duplicates.extend(item.pop('duplicates', []))
+
+
+def cluster_by_title(news_items, keyword=''):
+    """제목이 비슷한 기사를 묶어 대표 기사 목록 반환 (순서 유지, 앞 기사가 대표)"""
+    if not STORY_CLUSTERING or len(news_items) < 2:
+        return news_items
+    _count('clustered_searches')
+
+    signatures = []
+    for item in news_items:
+        shingles = title_shingles(item.get('title'), keyword, item.get('source', ''))
+        signatures.append(minhash(shingles) if len(shingles) >= TITLE_MIN_SHINGLES else None)
+    representatives = []  # (대표 기사, 대표 기사 서명)
+    for item, signature in zip(news_items, signatures):
+        for representative, rep_signature in representatives:
+            if estimate_jaccard(signature, rep_signature) >= STORY_TITLE_THRESHOLD:
+                _merge(representative, item)
+                _count('title_merged')
+                _count('fetches_skipped')
+                break
+        else:
+            representatives.append((item, signature))
+    return [item for item, _ in representatives]
+
+
+def merge_by_body(news_items):
+    """본문 수집 후 본문이 거의 같은 대표 기사끼리 다시 묶음 (통신사 기사 전재 등)"""
+    if not STORY_CLUSTERING or len(news_items) < 2:
+        return news_items
+    kept = []  # (기사, SimHash)
+    for item in news_items:
+        fingerprint = simhash(clean_text(item.get('content')))
+        if fingerprint is not None:
+            match = next((rep for rep, other in kept
+                          if other is not None and hamming(fingerprint, other) <= STORY_BODY_DISTANCE), None)
+            if match is not None:
+                _merge(match, item)
+                _count('body_merged')
+                continue
+        kept.append((item, fingerprint))
+    return [item for item, _ in kept]
+
+
+def stats():
+    with _stats_lock:
+        return dict(_stats, enabled=STORY_CLUSTERING)
+
+
+def main(argv):
+    """저장된 검색 결과 제목으로 제목 묶기 결과 확인: python story_clusters.py check [history.json]"""
+    if not argv or argv[0] != 'check':
+        print(main.__doc__)
+        return 1
+    path = argv[1] if len(argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), 'history.json')
+    with open(path, encoding='utf-8') as f:
+        records = json.load(f)
+    total = kept = 0
+    for record in records:
+        news_items = [{'title': item.get('title', ''), 'link': item.get('link', ''), 'source': item.get('source', '')}
+                      for item in record.get('news') or []]
+        groups = cluster_by_title(news_items, record.get('keyword', ''))
+        total += len(news_items)
+        kept += len(groups)
+        print(f"\n[{record.get('keyword')}] {len(news_items)}건 → {len(groups)}묶음")
+        for group in groups:
+            if group.get('duplicates'):
+                print(f"  - {group['title']}")
+                for duplicate in group['duplicates']:
+                    print(f"      = {duplicate['title']}")
+    print(f"\n전체 {total}건 → {kept}묶음 (기준 {STORY_TITLE_THRESHOLD})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,234 @@
+"""뉴스 요약 캐시 - 기사 묶음(키워드 + 기사별 내용 해시)을 키로 Gemini 요약을 재사용
+
+- 같은 키워드에 같은 기사 묶음이면 저장된 요약을 그대로 반환 (Gemini 호출 없음)
+- 최근 요약과 비교해 바뀐 기사가 SUMMARY_DELTA_MAX개 이하면
+  이전 요약 + 새 기사만으로 요약을 갱신하도록 계획(plan)을 돌려줌
+Gemini로 만든 요약만 저장하고, API 키 없음/오류 시의 기본 요약은 저장하지 않습니다.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from prompt_budget import clean_text
+from result_cache import normalize_keyword
+from rss_feed import canonical_url
+
+SUMMARY_CACHE_ENABLED = os.getenv('SUMMARY_CACHE_ENABLED', '1') == '1'
+SUMMARY_CACHE_PATH = os.getenv(
+    'SUMMARY_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'summary_cache.sqlite3')
+)
+SUMMARY_CACHE_TTL = float(os.getenv('SUMMARY_CACHE_TTL', str(6 * 3600)))         # 요약 유효 시간(초)
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv('SUMMARY_CACHE_MAX_ENTRIES', '2000'))  # 최대 저장 요약 수
+SUMMARY_DELTA_MAX = int(os.getenv('SUMMARY_DELTA_MAX', '3'))                     # 부분 갱신할 최대 변경 기사 수
+
+FULL = 'full'
+DELTA = 'delta'
+HIT = 'hit'
+
+_EVICT_EVERY = 50
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    set_key TEXT PRIMARY KEY,
+    keyword_norm TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    articles TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_summaries_keyword ON summaries(keyword_norm, created_at);
+CREATE INDEX IF NOT EXISTS idx_summaries_last_access ON summaries(last_access);
+"""
+
+
+def article_hash(item):
+    """기사 식별 해시 - 정규화 URL + 제목 + 정리된 본문(없으면 스니펫)"""
+    text = clean_text(item.get('content')) or clean_text(item.get('snippet'))
+    raw = f"{canonical_url(item.get('link') or '')}\0{item.get('title', '')}\0{text}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def set_key(keyword, hashes):
+    """키워드 + 기사 해시 집합 키 (기사 순서와 무관)"""
+    raw = normalize_keyword(keyword) + '\0' + ','.join(sorted(hashes))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+@dataclass
+class SummaryPlan:
+    key: str
+    keyword: str
+    articles: List[dict]                 # [{'hash', 'title'}] 이번 기사 묶음
+    mode: str = FULL                     # hit / delta / full
+    summary: Optional[str] = None        # hit: 저장된 요약
+    base_summary: Optional[str] = None   # delta: 갱신할 이전 요약
+    added: List[dict] = field(default_factory=list)    # delta: 새로 들어온 기사(news item)
+    removed: List[str] = field(default_factory=list)   # delta: 빠진 기사 제목
+
+
+class SummaryCache:
+    """기사 묶음 → 요약 캐시 (스레드별 SQLite 연결 사용)"""
+
+    def __init__(self, path=SUMMARY_CACHE_PATH, ttl=SUMMARY_CACHE_TTL,
+                 max_entries=SUMMARY_CACHE_MAX_ENTRIES, delta_max=SUMMARY_DELTA_MAX):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.delta_max = delta_max
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._puts_since_evict = 0
+        self._stats = {HIT: 0, DELTA: 0, FULL: 0, 'stores': 0, 'evictions': 0}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def plan(self, news_items, keyword):
+        """기사 묶음에 대한 요약 계획 - 저장된 요약(hit), 부분 갱신(delta), 전체 요약(full)"""
+        hashes = [article_hash(item) for item in news_items]
+        articles = [{'hash': h, 'title': item.get('title', '')} for h, item in zip(hashes, news_items)]
+        plan = SummaryPlan(set_key(keyword, hashes), keyword, articles)
+
+        conn = self._conn()
+        now = time.time()
+        row = conn.execute('SELECT summary, created_at FROM summaries WHERE set_key = ?', (plan.key,)).fetchone()
+        if row and now - row[1] <= self.ttl:
+            conn.execute('UPDATE summaries SET last_access = ? WHERE set_key = ?', (now, plan.key))
+            plan.mode, plan.summary = HIT, row[0]
+            self._count(HIT)
+            return plan
+
+        # 같은 키워드의 가장 최근 요약과 비교해 바뀐 기사만 요약할 수 있는지 확인
+        if self.delta_max > 0:
+            row = conn.execute(
+                'SELECT summary, articles FROM summaries WHERE keyword_norm = ? AND created_at >= ? '
+                'ORDER BY created_at DESC LIMIT 1',
+                (normalize_keyword(keyword), now - self.ttl)
+            ).fetchone()
+            if row:
+                previous = json.loads(row[1])
+                previous_hashes = {a['hash'] for a in previous}
+                current_hashes = set(hashes)
+                added = [item for h, item in zip(hashes, news_items) if h not in previous_hashes]
+                removed = [a['title'] for a in previous if a['hash'] not in current_hashes]
+                kept = len(current_hashes & previous_hashes)
+                if added and len(added) <= self.delta_max and kept >= len(added):
+                    plan.mode, plan.base_summary = DELTA, row[0]
+                    plan.added, plan.removed = added, removed
+                    self._count(DELTA)
+                    return plan
+
+        self._count(FULL)
+        return plan
+
+    def put(self, plan, summary):
+        conn = self._conn()
+        now = time.time()
+        conn.execute(
+            'INSERT OR REPLACE INTO summaries (set_key, keyword_norm, summary, articles, created_at, last_access) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (plan.key, normalize_keyword(plan.keyword), summary,
+             json.dumps(plan.articles, ensure_ascii=False), now, now)
+        )
+        self._count('stores')
+
+        with self._lock:
+            self._puts_since_evict += 1
+            should_evict = self._puts_since_evict >= _EVICT_EVERY
+            if should_evict:
+                self._puts_since_evict = 0
+        if should_evict:
+            self.evict()
+
+    def evict(self):
+        """만료된 요약과 최대 개수를 넘은 요약(오래 안 쓴 순서) 제거"""
+        conn = self._conn()
+        removed = conn.execute('DELETE FROM summaries WHERE created_at < ?', (time.time() - self.ttl,)).rowcount
+        overflow = conn.execute('SELECT COUNT(*) FROM summaries').fetchone()[0] - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                'DELETE FROM summaries WHERE set_key IN '
+                '(SELECT set_key FROM summaries ORDER BY last_access ASC LIMIT ?)', (overflow,)
+            )
+            removed += overflow
+        self._count('evictions', max(0, removed))
+        return removed
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        plans = stats[HIT] + stats[DELTA] + stats[FULL]
+        stats['hit_rate'] = round(stats[HIT] / plans, 3) if plans else 0.0
+        stats['entries'] = self._conn().execute('SELECT COUNT(*) FROM summaries').fetchone()[0]
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """공유 캐시 인스턴스 반환. 비활성화되었거나 열 수 없으면 None"""
+    global _cache, SUMMARY_CACHE_ENABLED
+    if not SUMMARY_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None and SUMMARY_CACHE_ENABLED:
+                try:
+                    _cache = SummaryCache()
+                except Exception as e:
+                    print(f"요약 캐시 초기화 오류: {e}")
+                    SUMMARY_CACHE_ENABLED = False
+    return _cache
+
+
+def plan(news_items, keyword):
+    """요약 계획. 캐시를 쓸 수 없으면 전체 요약 계획(key 없음)"""
+    cache = get_cache()
+    if cache is not None:
+        try:
+            return cache.plan(news_items, keyword)
+        except Exception as e:
+            print(f"요약 캐시 조회 오류: {e}")
+    return SummaryPlan('', keyword, [])
+
+
+def store(summary_plan, summary):
+    cache = get_cache()
+    if cache is None or not summary_plan.key or not summary:
+        return
+    try:
+        cache.put(summary_plan, summary)
+    except Exception as e:
+        print(f"요약 캐시 저장 오류: {e}")
+
+
+def stats():
+    cache = get_cache()
+    if cache is None:
+        return {'enabled': False}
+    try:
+        return dict(cache.stats(), enabled=True)
+    except Exception as e:
+        return {'enabled': True, 'error': str(e)}
@@ -0,0 +1,196 @@
+"""요청별 단계 시간 추적 + Prometheus 형식 지표 (/metrics)
+
+- stage(name): 구간 시간을 프로세스 전체 히스토그램(news_stage_seconds)과 현재 요청의 추적(Trace)에 기록
+- count(name, amount, **labels): 받은 바이트 수, 캐시 적중, 대체 경로 사용 같은 카운터 (news_<name>_total)
+- 요청마다 trace()로 추적을 시작하면 단계별 합계를 Server-Timing 헤더나 로그 한 줄로 남길 수 있음
+
+스레드 풀로 넘기는 작업은 in_context(func)로 감싸야 같은 요청의 추적에 기록됩니다.
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+TRACE_HEADER = os.getenv('TRACE_HEADER', '0') == '1'   # 모든 응답에 Server-Timing 헤더 추가 (0이면 요청 헤더 X-Trace: 1일 때만)
+TRACE_LOG = os.getenv('TRACE_LOG', '0') == '1'         # 요청마다 단계별 시간을 JSON 한 줄로 출력
+
+TRACE_REQUEST_HEADER = 'X-Trace'
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_current = contextvars.ContextVar('news_trace', default=None)
+
+_lock = threading.Lock()
+_histograms = {}   # (이름, 라벨) -> [버킷별 개수..., 합계, 개수]
+_counters = {}     # (이름, 라벨) -> 값
+
+
+class Trace:
+    """요청 하나의 단계별 시간/카운터 (여러 스레드에서 기록)"""
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.monotonic()
+        self.stages = {}   # 단계 -> [횟수, 초]
+        self.counts = {}
+        self.header = False   # 응답에 Server-Timing 헤더를 붙일지 (ASGI 처리기용)
+        self._lock = threading.Lock()
+
+    def add_stage(self, name, seconds):
+        with self._lock:
+            entry = self.stages.setdefault(name, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+
+    def add_count(self, name, amount):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + amount
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def server_timing(self):
+        """Server-Timing 헤더 값 (단계 이름;dur=밀리초). 병렬 단계는 스레드별 시간의 합"""
+        with self._lock:
+            parts = [f"{name};dur={seconds * 1000:.1f}" + (f';desc="x{count}"' if count > 1 else '')
+                     for name, (count, seconds) in self.stages.items()]
+        parts.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ', '.join(parts)
+
+    def summary(self):
+        with self._lock:
+            return {
+                'request': self.name,
+                'total_ms': round(self.elapsed() * 1000, 1),
+                'stages': {name: {'count': count, 'ms': round(seconds * 1000, 1)}
+                           for name, (count, seconds) in self.stages.items()},
+                'counts': dict(self.counts),
+            }
+
+
+def current():
+    return _current.get()
+
+
+def start(name):
+    """요청 하나의 추적 시작 (Flask before_request 등) - finish(tracer, token)으로 종료"""
+    tracer = Trace(name)
+    return tracer, _current.set(tracer)
+
+
+def finish(tracer, token):
+    """추적 종료. 요청 시간을 news_request_seconds에 기록하고 TRACE_LOG면 한 줄 출력"""
+    try:
+        _current.reset(token)
+    except ValueError:  # 시작한 곳과 다른 컨텍스트에서 종료되는 경우
+        pass
+    observe('request', tracer.elapsed(), endpoint=tracer.name)
+    if TRACE_LOG:
+        print(json.dumps(tracer.summary(), ensure_ascii=False))
+
+
+@contextmanager
+def trace(name):
+    tracer, token = start(name)
+    try:
+        yield tracer
+    finally:
+        finish(tracer, token)
+
+
+def wants_header(request_value):
+    """Server-Timing 헤더를 붙일지 - TRACE_HEADER=1이거나 요청의 X-Trace 헤더 값이 1"""
+    return TRACE_HEADER or request_value == '1'
+
+
+def in_context(func):
+    """현재 요청의 추적을 이어받아 실행하는 함수 (스레드 풀 제출용)"""
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        # 같은 함수가 여러 스레드에서 동시에 실행될 수 있으므로 호출마다 컨텍스트 복사
+        return context.copy().run(func, *args, **kwargs)
+    return run
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def observe(name, seconds, **labels):
+    """히스토그램 news_<name>_seconds에 값 하나 기록"""
+    key = _key(name, labels)
+    with _lock:
+        entry = _histograms.get(key)
+        if entry is None:
+            entry = _histograms[key] = [0] * len(BUCKETS) + [0.0, 0]
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                entry[i] += 1
+        entry[-2] += seconds
+        entry[-1] += 1
+
+
+@contextmanager
+def stage(name):
+    """구간 시간을 news_stage_seconds{stage=name}과 현재 요청 추적에 기록"""
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        record_stage(name, time.monotonic() - started)
+
+
+def record_stage(name, seconds):
+    """이미 잰 구간 시간 기록 (stage()로 감쌀 수 없는 경우)"""
+    observe('stage', seconds, stage=name)
+    tracer = _current.get()
+    if tracer is not None:
+        tracer.add_stage(name, seconds)
+
+
+def count(name, amount=1, **labels):
+    """카운터 news_<name>_total 증가 (현재 요청 추적에도 기록)"""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+    tracer = _current.get()
+    if tracer is not None:
+        label = ','.join(f"{k}={v}" for k, v in sorted(labels.items()))
+        tracer.add_count(f"{name}[{label}]" if label else name, amount)
+
+
+def _labels(pairs, extra=()):
+    pairs = list(pairs) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def render_metrics(prefix='news'):
+    """Prometheus 텍스트 형식(0.0.4)으로 모든 지표 출력"""
+    with _lock:
+        histograms = {key: list(entry) for key, entry in _histograms.items()}
+        counters = dict(_counters)
+
+    lines = []
+    for family in sorted({name for name, _ in histograms}):
+        metric = f"{prefix}_{family}_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        for (name, labels), entry in sorted(histograms.items()):
+            if name != family:
+                continue
+            for bound, value in zip(BUCKETS, entry):
+                lines.append(f"{metric}_bucket{_labels(labels, [('le', bound)])} {value}")
+            lines.append(f"{metric}_bucket{_labels(labels, [('le', '+Inf')])} {entry[-1]}")
+            lines.append(f"{metric}_sum{_labels(labels)} {entry[-2]:.6f}")
+            lines.append(f"{metric}_count{_labels(labels)} {entry[-1]}")
+    for family in sorted({name for name, _ in counters}):
+        metric = f"{prefix}_{family}_total"
+        lines.append(f"# TYPE {metric} counter")
+        for (name, labels), value in sorted(counters.items()):
+            if name == family:
+                lines.append(f"{metric}{_labels(labels)} {value}")
+    return '\n'.join(lines) + '\n'